@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .principal import get_principal
+from .tokens import principal_token_version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication과 동일하게 토큰을 검증하되, 사용자는 인증 주체 캐시에서 가져옵니다.
+    (사용자, 프로필, 관리하는 basespace 조회 쿼리 없음)
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        token_version = validated_token.get("ver", 0)
+        try:
+            user = get_principal(user_id, token_version)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        # 권한 범위가 바뀐 뒤(token_version 증가) 발급 전의 토큰은 거부 (리프레시 토큰으로 재발급)
+        if token_version != principal_token_version(user):
+            raise AuthenticationFailed("권한이 변경되었습니다. 토큰을 갱신해주세요.", code="token_outdated")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.retention import departed_temp_users, get_placeholder_user, purge_temp_users
+
+
+class Command(BaseCommand):
+    help = "체크아웃 후 보관 기간이 지난 TEMP(워크인/단체) 사용자를 일괄 삭제합니다. (리뷰/이력은 대체 사용자로 유지)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.TEMP_USER_RETENTION_DAYS,
+                            help="체크아웃 후 삭제까지의 기간 (일)")
+        parser.add_argument("--batch-size", type=int, default=500, help="한 트랜잭션에서 삭제할 사용자 수")
+        parser.add_argument("--limit", type=int, default=None, help="한 번에 처리할 최대 사용자 수")
+        parser.add_argument("--dry-run", action="store_true", help="대상 사용자 수만 출력합니다.")
+
+    def handle(self, *args, **options):
+        users = departed_temp_users(options["days"])
+        if options["dry_run"]:
+            self.stdout.write(f"삭제 대상 TEMP 사용자 {users.count()}명")
+            return
+
+        placeholder = get_placeholder_user()
+        purged = 0
+        last_id = 0
+        while options["limit"] is None or purged < options["limit"]:
+            batch_size = options["batch_size"]
+            if options["limit"] is not None:
+                batch_size = min(batch_size, options["limit"] - purged)
+            # id 순서로 이어서 조회 (다른 프로세스가 잠근 사용자는 건너뛰고 다음 배치로 진행)
+            user_ids = list(users.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+            purged += purge_temp_users(user_ids, placeholder)
+        self.stdout.write(self.style.SUCCESS(f"TEMP 사용자 {purged}명을 삭제했습니다."))
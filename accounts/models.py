@@ -1,5 +1,10 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from enum import Enum
 
 class ChoiceEnum(Enum):
@@ -28,4 +33,39 @@ class UserProfile(models.Model):
         verbose_name="유저 역할"
     )
     language = models.CharField(max_length=50, blank=True, null=True, verbose_name='언어')
-    email_code = models.CharField(max_length=6, blank=True, null=True, verbose_name='이메일 인증 코드')
\ No newline at end of file
+    email_code = models.CharField(max_length=6, blank=True, null=True, verbose_name='이메일 인증 코드')
+    # 토큰 버전 (권한 변경 시 증가). 인증 주체 캐시 키에 포함됩니다.
+    token_version = models.PositiveIntegerField(default=0, verbose_name='토큰 버전')
+
+
+class GuestCredential(models.Model):
+    """
+    TEMP(워크인/단체) 고객의 임시코드 로그인 자격 증명 (체크인 하나에 하나)
+    코드는 평문 대신 HMAC 값만 저장하며, 로그인은 HMAC 값으로 인덱스 조회 한 번에 처리합니다.
+    비밀번호 해시(PBKDF2)를 만들지 않으므로 프런트 체크인 처리 시간이 짧습니다.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='guest_credentials')
+    check_in = models.OneToOneField('bookings.CheckIn', on_delete=models.CASCADE, related_name='guest_credential')
+    code_digest = models.CharField(max_length=64, unique=True, verbose_name='임시코드 HMAC')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='만료 일시')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def digest(code):
+        return salted_hmac('accounts.GuestCredential', code, algorithm='sha256').hexdigest()
+
+    @classmethod
+    def build(cls, check_in, code):
+        """체크인의 체크아웃 일시 + GUEST_CREDENTIAL_GRACE_HOURS까지 유효한 자격 증명 (저장 전, bulk_create용)"""
+        check_out = datetime.combine(check_in.check_out_date, check_in.check_out_time or time.max)
+        expires_at = timezone.make_aware(check_out) + timedelta(hours=settings.GUEST_CREDENTIAL_GRACE_HOURS)
+        return cls(user_id=check_in.user_id, check_in=check_in, code_digest=cls.digest(code), expires_at=expires_at)
+
+    @classmethod
+    def verify(cls, code):
+        """유효한 코드이면 자격 증명(체크인, 사용자 포함)을, 아니면 None을 반환"""
+        return cls.objects.select_related(
+            'user', 'check_in__hotel_room__room_type'
+        ).filter(
+            code_digest=cls.digest(code), expires_at__gt=timezone.now(), check_in__checked_out=False
+        ).first()
@@ -1,14 +1,38 @@
 # permissions.py
 from rest_framework.permissions import BasePermission, IsAdminUser
 
+from .tokens import claims_manage_basespace, claims_role
+
 
 class IsAdminOrManager(BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and (
-            request.user.profile.role == "MANAGER" or IsAdminUser().has_permission(request, view)
+            claims_role(request.auth, request.user) == "MANAGER" or IsAdminUser().has_permission(request, view)
         )
+
+
+class HasBasespaceScope(BasePermission):
+    """
+    토큰 claims(role, basespaces)로 basespace 접근 권한을 확인합니다. (DB 조회 없음)
+    - 뷰 권한: ADMIN/MANAGER 역할 또는 staff
+    - 객체 권한: ADMIN/staff이거나 객체의 basespace를 관리하는 매니저
+    객체의 basespace ID는 뷰의 scope_basespace_field 속성(기본 'basespace_id')에서 읽습니다.
+    """
+
+    def has_permission(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return False
+        return request.user.is_staff or claims_role(request.auth, request.user) in ("ADMIN", "MANAGER")
+
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_staff or claims_role(request.auth, request.user) == "ADMIN":
+            return True
+        basespace_id = getattr(obj, getattr(view, 'scope_basespace_field', 'basespace_id'), None)
+        return claims_manage_basespace(request.auth, request.user, basespace_id)
+
+
 class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
             return True
-        return obj.user == request.user
\ No newline at end of file
+        return obj.user == request.user
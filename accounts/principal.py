@@ -0,0 +1,95 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def principal_cache_key(user_id, token_version=0):
+    return f"principal:{user_id}:{token_version}"
+
+
+def load_principal(user_id):
+    """
+    인증 주체(사용자 + 프로필 + 관리하는 basespace ID 목록)를 DB에서 불러옵니다.
+    반환된 User 객체는 profile과 managed_basespace_ids를 함께 가지고 있어 이후 권한 확인 시 쿼리가 없습니다.
+    비밀번호 해시는 공유 캐시에 저장되지 않도록 지연 로딩(defer)합니다. 비밀번호 확인/변경 시에만 DB에서 다시 읽고,
+    지연 로딩된 필드는 save() 시 저장 대상에서 제외되므로 기존 비밀번호를 덮어쓰지 않습니다.
+    """
+    user = User.objects.select_related('profile').defer('password').get(id=user_id)
+    user.managed_basespace_ids = set(user.managed_spaces.values_list('id', flat=True))
+    return user
+
+
+def get_principal(user_id, token_version=0):
+    """
+    HTTP(JWT 인증)와 웹소켓(TokenAuthMiddleware)에서 공통으로 사용하는 인증 주체 조회
+    캐시에 있으면 DB를 조회하지 않으며, 캐시 서버 장애 시에는 DB에서 직접 조회합니다.
+    """
+    key = principal_cache_key(user_id, token_version)
+    try:
+        user = cache.get(key)
+    except Exception:
+        logger.warning("인증 주체 캐시 조회 실패 (user=%s)", user_id, exc_info=True)
+        return load_principal(user_id)
+    if user is None:
+        user = load_principal(user_id)
+        try:
+            cache.set(key, user, settings.PRINCIPAL_CACHE_TTL)
+        except Exception:
+            logger.warning("인증 주체 캐시 저장 실패 (user=%s)", user_id, exc_info=True)
+    return user
+
+
+def invalidate_principal(user_id, token_version=None):
+    """
+    사용자/프로필/매니저 권한이 바뀌면 캐시된 인증 주체를 삭제합니다.
+    트랜잭션 중 다른 요청이 변경 전 상태를 다시 캐시하지 않도록 커밋 이후에도 한 번 더 삭제합니다.
+    """
+    if token_version is None:
+        token_version = UserProfile.objects.filter(user_id=user_id).values_list('token_version', flat=True).first() or 0
+    key = principal_cache_key(user_id, token_version)
+
+    def delete():
+        try:
+            cache.delete(key)
+        except Exception:
+            logger.warning("인증 주체 캐시 삭제 실패 (user=%s)", user_id, exc_info=True)
+
+    delete()
+    transaction.on_commit(delete)
+
+
+def bump_token_version(user_id):
+    """
+    토큰 버전을 올려 이미 발급된 토큰(이전 권한 범위의 claims)을 무효화합니다.
+    클라이언트는 리프레시 토큰으로 새 권한 범위의 토큰을 다시 발급받아야 합니다.
+    """
+    old_version = UserProfile.objects.filter(user_id=user_id).values_list('token_version', flat=True).first()
+    if old_version is None:
+        return
+    UserProfile.objects.filter(user_id=user_id).update(token_version=F('token_version') + 1)
+    invalidate_principal(user_id, old_version)
+
+
+def managed_basespace_ids(user):
+    """사용자가 관리하는 basespace ID 집합 (캐시된 인증 주체이면 쿼리 없음)"""
+    managed = getattr(user, 'managed_basespace_ids', None)
+    if managed is None:
+        managed = user.managed_basespace_ids = set(user.managed_spaces.values_list('id', flat=True))
+    return managed
+
+
+def manages_basespace(user, basespace_id):
+    """사용자가 해당 basespace의 매니저인지 확인 (캐시된 인증 주체이면 쿼리 없음)"""
+    try:
+        basespace_id = int(basespace_id)
+    except (TypeError, ValueError):
+        return False
+    return basespace_id in managed_basespace_ids(user)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.models import CheckIn, Reservation, Review, Like
+from chat.models import ChatRoomParticipant, Message
+from notifications.models import Notification, NotificationReadStatus
+from .models import GuestCredential, UserProfile
+from .principal import principal_cache_key
+
+# 삭제된 TEMP 사용자의 예약/체크인/리뷰/메시지를 넘겨받는 사용자
+PLACEHOLDER_USERNAME = "deleted-guest"
+
+
+def get_placeholder_user():
+    user, created = User.objects.get_or_create(
+        username=PLACEHOLDER_USERNAME,
+        defaults={"email": f"{PLACEHOLDER_USERNAME}@invalid", "is_active": False},
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+        UserProfile.objects.create(user=user, role='GENERAL')
+    return user
+
+
+def departed_temp_users(days):
+    """
+    체크아웃 후 days일이 지난 TEMP 사용자 (진행 중인 체크인이 없고, 최근 체크아웃도 없는 사용자)
+    체크인 기록이 없는 TEMP 사용자는 가입 후 days일이 지나면 대상입니다.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    return User.objects.filter(
+        profile__role='TEMP', date_joined__lt=cutoff
+    ).exclude(
+        checkins__checked_out=False
+    ).exclude(
+        checkins__check_out_date__gte=cutoff.date()
+    ).exclude(username=PLACEHOLDER_USERNAME)
+
+
+def purge_temp_users(user_ids, placeholder):
+    """
+    TEMP 사용자들을 한 번에 삭제합니다. (사용자 수와 무관하게 테이블별 UPDATE/DELETE 한 번씩)
+    - 예약, 체크인, 리뷰, 채팅 메시지, 보낸 알림은 placeholder 사용자에게 넘겨 리뷰/이력의 외래 키를 유지
+    - 받은 알림 읽음 상태, 채팅 참여, 좋아요, 임시코드 자격 증명, 프로필은 삭제
+    - 수신자가 모두 삭제되어 남은 수신자가 없는 알림도 삭제
+    삭제된 사용자 수를 반환합니다.
+    """
+    with transaction.atomic():
+        # 다른 프로세스가 동시에 같은 사용자를 처리하지 않도록 잠금
+        user_ids = list(User.objects.select_for_update(skip_locked=True).filter(id__in=user_ids).values_list('id', flat=True))
+        if not user_ids:
+            return 0
+        token_versions = dict(UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'token_version'))
+
+        Reservation.objects.filter(user_id__in=user_ids).update(user=placeholder)
+        CheckIn.objects.filter(user_id__in=user_ids).update(user=placeholder)
+        Review.objects.filter(user_id__in=user_ids).update(user=placeholder)
+        Message.objects.filter(sender_id__in=user_ids).update(sender=placeholder)
+        Notification.objects.filter(sender_id__in=user_ids).update(sender=placeholder)
+
+        read_statuses = NotificationReadStatus.objects.filter(recipient_id__in=user_ids)
+        notification_ids = set(read_statuses.values_list('notification_id', flat=True))
+        read_statuses.delete()
+        Notification.objects.filter(id__in=notification_ids, read_statuses__isnull=True).delete()
+
+        ChatRoomParticipant.objects.filter(user_id__in=user_ids).delete()
+        Like.objects.filter(user_id__in=user_ids).delete()
+        GuestCredential.objects.filter(user_id__in=user_ids).delete()
+        # UserProfile은 파일 필드/캐시 무효화 시그널이 있어 쿼리셋 delete로 처리
+        UserProfile.objects.filter(user_id__in=user_ids).delete()
+        User.objects.filter(id__in=user_ids).delete()
+
+    cache.delete_many([principal_cache_key(user_id, token_versions.get(user_id, 0)) for user_id in user_ids])
+    return len(user_ids)
@@ -4,6 +4,7 @@ from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from datetime import timedelta
 from accounts.models import UserProfile
+from accounts.tokens import add_scope_claims
 
 # class UserProfileSerializer(serializers.ModelSerializer):
 #     class Meta:
@@ -87,6 +88,11 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
         # 기본 serializer에 있는 username 필드를 제거합니다.
         self.fields.pop('username', None)
 
+    @classmethod
+    def get_token(cls, user):
+        # 역할/관리 basespace/토큰 버전을 claims에 포함하여 권한 확인 시 DB 조회를 줄임
+        return add_scope_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
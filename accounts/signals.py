@@ -1,10 +1,66 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
+from spaces.models import BaseSpace
+from .models import UserProfile
+from .principal import bump_token_version, invalidate_principal
+
 def validate_unique_email(sender, instance, **kwargs):
     """모든 앱에서 `User` 모델 저장 시 이메일 중복 검사"""
     if User.objects.filter(email=instance.email).exclude(pk=instance.pk).exists():
         raise ValidationError("이미 등록된 이메일입니다.")
 
 pre_save.connect(validate_unique_email, sender=User)
+
+
+def invalidate_user_principal(sender, instance, **kwargs):
+    """사용자 정보(활성 여부, 비밀번호 등) 변경 시 캐시된 인증 주체 삭제"""
+    invalidate_principal(instance.pk)
+
+
+def track_profile_role_change(sender, instance, **kwargs):
+    """저장 전 역할이 바뀌는지 기록 (토큰의 role claim은 저장 후 invalidate_profile_principal에서 무효화)"""
+    instance._role_changed = instance.pk is not None and UserProfile.objects.filter(
+        pk=instance.pk
+    ).exclude(role=instance.role).exists()
+
+
+def invalidate_profile_principal(sender, instance, **kwargs):
+    """
+    프로필(역할, 언어 등) 변경 시 캐시된 인증 주체 삭제
+    역할이 바뀌면 토큰 버전도 올려 이전 역할이 기록된 토큰(role claim)을 거부합니다. (매니저 강등 등)
+    """
+    if getattr(instance, '_role_changed', False):
+        instance._role_changed = False
+        bump_token_version(instance.user_id)
+        instance.token_version += 1
+        return
+    invalidate_principal(instance.user_id, instance.token_version)
+
+
+def invalidate_manager_principals(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    basespace 매니저 추가/제거 시 해당 매니저들의 캐시된 인증 주체 삭제
+    제거(권한 회수)는 토큰 claims에 남아 있으므로 토큰 버전도 올려 기존 토큰을 무효화합니다.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # user.managed_spaces.add(...) 처럼 사용자 쪽에서 변경한 경우
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        user_ids = list(instance.managers.values_list('id', flat=True))
+    else:
+        user_ids = pk_set or []
+    for user_id in user_ids:
+        if action == 'post_add':
+            invalidate_principal(user_id)
+        else:
+            bump_token_version(user_id)
+
+post_save.connect(invalidate_user_principal, sender=User)
+pre_save.connect(track_profile_role_change, sender=UserProfile)
+post_save.connect(invalidate_profile_principal, sender=UserProfile)
+post_delete.connect(invalidate_profile_principal, sender=UserProfile)
+m2m_changed.connect(invalidate_manager_principals, sender=BaseSpace.managers.through)
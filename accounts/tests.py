@@ -1,10 +1,20 @@
+from datetime import date, time, timedelta
+from unittest import mock
 from django.urls import reverse
 from django.test import override_settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
 from rest_framework.test import APIClient, APITestCase
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.core import mail
+from accounts import verification
 from accounts.models import UserProfile
+from accounts.principal import get_principal, manages_basespace, principal_cache_key
+from accounts.tokens import add_scope_claims
+from bookings.models import CheckIn, Reservation, Review
+from spaces.models import BaseSpace, HotelRoomType, HotelRoom
 from django.contrib.gis.geos import Point
 
 
@@ -48,6 +58,71 @@ class UserRegistrationTests(APITestCase):
         self.assertEqual(response.status_code, 400)
 
 
+class FakeRedis:
+    """accounts.verification이 사용하는 명령만 구현한 메모리 Redis (테스트에서 외부 Redis 없이 실행)"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value).encode()
+        self.expire(key, ex)
+        return True
+
+    def ttl(self, key):
+        if key not in self.data:
+            return -2
+        return self.ttls.get(key, -1)
+
+    def expire(self, key, seconds):
+        if key in self.data and seconds is not None:
+            self.ttls[key] = seconds
+
+    def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def delete(self, *keys):
+        deleted = [key for key in keys if key in self.data]
+        for key in deleted:
+            del self.data[key]
+            self.ttls.pop(key, None)
+        return len(deleted)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({field: str(value).encode() for field, value in mapping.items()})
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hincrby(self, key, field, amount):
+        value = int(self.hget(key, field) or 0) + amount
+        self.data.setdefault(key, {})[field] = str(value).encode()
+        return value
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
 # 2. 이메일 인증 관련 테스트 (이메일 발송)
 @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
 class EmailVerificationTests(APITestCase):
@@ -59,14 +134,41 @@ class EmailVerificationTests(APITestCase):
             username="verifyuser", email="verifyuser@example.com", password="TestPass123!"
         )
         UserProfile.objects.create(user=self.user, email_code="654321", email_verified=False)
+        patcher = mock.patch("accounts.verification.get_redis", return_value=FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_send_email_verification(self):
         data = {"email": "newuser@example.com"}
         response = self.client.post(self.send_email_url, data)
         self.assertEqual(response.status_code, 200)
-        self.assertIn("verification_code", response.data)
+        self.assertNotIn("verification_code", response.data)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertRegex(mail.outbox[0].body, r"\d{6}")
+
+    def test_resend_rate_limited(self):
+        self.client.post(self.send_email_url, {"email": "newuser@example.com"})
+        response = self.client.post(self.send_email_url, {"email": "newuser@example.com"})
+        self.assertEqual(response.status_code, 429)
         self.assertEqual(len(mail.outbox), 1)
 
+    def test_verify_code_once(self):
+        code = verification.issue_code(self.user.email)
+        self.assertFalse(verification.check_code(self.user.email, "000000" if code != "000000" else "111111"))
+        self.assertTrue(verification.check_code(self.user.email, code))
+        # 한 번 사용한 코드는 다시 사용할 수 없음
+        self.assertFalse(verification.check_code(self.user.email, code))
+
+    def test_email_verify_requires_sent_code(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        url = reverse("email-verify")
+        code = verification.issue_code(self.user.email)
+        wrong = "123456" if code != "123456" else "654321"
+        self.assertEqual(self.client.post(url, {"verification_code": wrong}).status_code, 400)
+        self.assertEqual(self.client.post(url, {"verification_code": code}).status_code, 200)
+        self.user.profile.refresh_from_db()
+        self.assertTrue(self.user.profile.email_verified)
+
 
 # 3. 이메일 코드 로그인 테스트
 @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
@@ -282,3 +384,110 @@ class AssignSpaceManagerTests(APITestCase):
         response = self.client.post(self.url, data)
         self.assertEqual(response.status_code, 400)
 
+
+
+# 11. 인증 주체 캐시 테스트
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PrincipalCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", email="cached@example.com", password="Pass123!")
+        UserProfile.objects.create(user=self.user, role="MANAGER")
+        self.basespace = BaseSpace.objects.create(name="Cached Space", location=Point(0, 0))
+
+    def test_principal_cached_after_first_load(self):
+        get_principal(self.user.id)
+        with self.assertNumQueries(0):
+            user = get_principal(self.user.id)
+            self.assertEqual(user.profile.role, "MANAGER")
+            self.assertFalse(manages_basespace(user, self.basespace.id))
+
+    def test_cached_principal_has_no_password_hash(self):
+        get_principal(self.user.id)
+        cached = cache.get(principal_cache_key(self.user.id))
+        self.assertNotIn("password", cached.__dict__)
+        # 필요할 때만 DB에서 다시 읽음
+        self.assertTrue(cached.check_password("Pass123!"))
+
+    def test_manager_change_invalidates_cache(self):
+        get_principal(self.user.id)
+        self.basespace.managers.add(self.user)
+        self.assertTrue(manages_basespace(get_principal(self.user.id), self.basespace.id))
+
+    def test_deactivated_user_rejected(self):
+        token = f"Bearer {str(RefreshToken.for_user(self.user).access_token)}"
+        self.client.credentials(HTTP_AUTHORIZATION=token)
+        self.assertEqual(self.client.get(reverse("내 정보 조회")).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("내 정보 조회")).status_code, 401)
+
+    def test_scope_claims_and_revocation(self):
+        self.basespace.managers.add(self.user)
+        refresh = add_scope_claims(RefreshToken.for_user(self.user), self.user)
+        access = refresh.access_token
+        self.assertEqual(access["role"], "MANAGER")
+        self.assertEqual(access["basespaces"], [self.basespace.id])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+        self.assertEqual(self.client.get(reverse("내 정보 조회")).status_code, 200)
+
+        # 매니저 권한 회수 시 기존 토큰 거부, 갱신한 토큰에는 회수된 basespace가 없음
+        self.basespace.managers.remove(self.user)
+        self.assertEqual(self.client.get(reverse("내 정보 조회")).status_code, 401)
+        response = self.client.post(reverse("token_refresh"), {"refresh": str(refresh)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data["access"])["basespaces"], [])
+
+
+    def test_role_change_revokes_existing_tokens(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {str(access)}")
+        self.assertEqual(self.client.get(reverse("내 정보 조회")).status_code, 200)
+
+        # 매니저 강등 시 role claim이 남은 기존 토큰 거부
+        profile = self.user.profile
+        profile.role = "GENERAL"
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.token_version, 1)
+        self.assertEqual(self.client.get(reverse("내 정보 조회")).status_code, 401)
+
+        # 역할 외 변경은 토큰 버전을 올리지 않음
+        profile.language = "EN"
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.token_version, 1)
+
+
+# 12. 체크아웃한 TEMP 사용자 일괄 삭제 테스트
+class PurgeTempUsersTests(APITestCase):
+    def test_purge_keeps_reviews_and_history(self):
+        basespace = BaseSpace.objects.create(name="Purge Hotel", location=Point(0, 0))
+        room_type = HotelRoomType.objects.create(basespace=basespace, name="Standard", nickname="Std")
+        hotel_room = HotelRoom.objects.create(room_number="101", room_type=room_type, status="빈 방")
+        departed_day = date.today() - timedelta(days=100)
+
+        temp_user = User.objects.create_user(username="departed", email="departed@example.com")
+        User.objects.filter(id=temp_user.id).update(date_joined=timezone.now() - timedelta(days=100))
+        UserProfile.objects.create(user=temp_user, role="TEMP")
+        reservation = Reservation.objects.create(
+            user=temp_user, space=room_type, start_date=departed_day, start_time=time(14, 0),
+            end_date=departed_day, end_time=time(11, 0), people=1,
+        )
+        check_in = CheckIn.objects.create(
+            user=temp_user, hotel_room=hotel_room, reservation=reservation, check_in_date=departed_day,
+            check_out_date=departed_day, temp_code="654321", checked_out=True,
+        )
+        review = Review.objects.create(user=temp_user, check_in=check_in, content="good", rating=5)
+        # 최근 가입한 TEMP 사용자는 대상이 아님
+        recent = User.objects.create_user(username="recent", email="recent@example.com")
+        UserProfile.objects.create(user=recent, role="TEMP")
+
+        call_command("purge_temp_users", days=90)
+
+        self.assertFalse(User.objects.filter(id=temp_user.id).exists())
+        self.assertTrue(User.objects.filter(id=recent.id).exists())
+        review.refresh_from_db()
+        check_in.refresh_from_db()
+        self.assertEqual(review.user.username, "deleted-guest")
+        self.assertEqual(check_in.user_id, review.user_id)
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .principal import manages_basespace
+
+# 토큰에 포함하는 권한 범위 claims
+# - role: 사용자 역할 (GENERAL, MANAGER, ADMIN 등)
+# - basespaces: 관리하는 basespace ID 목록
+# - ver: 발급 시점의 UserProfile.token_version (매니저 권한이 회수되면 증가하여 기존 토큰을 무효화)
+
+
+def principal_token_version(user):
+    """사용자의 현재 토큰 버전 (프로필이 없으면 0)"""
+    return user.profile.token_version if hasattr(user, 'profile') else 0
+
+
+def add_scope_claims(token, user):
+    """토큰(리프레시 토큰이면 이후 생성되는 액세스 토큰까지)에 역할/관리 basespace/버전 claims를 기록합니다."""
+    profile = user.profile if hasattr(user, 'profile') else None
+    managed = getattr(user, 'managed_basespace_ids', None)
+    if managed is None:
+        managed = user.managed_spaces.values_list('id', flat=True)
+    token["role"] = profile.role if profile else None
+    token["basespaces"] = sorted(managed)
+    token["ver"] = profile.token_version if profile else 0
+    return token
+
+
+def claims_manage_basespace(claims, user, basespace_id):
+    """
+    토큰 claims로 basespace 매니저 여부를 확인합니다. (DB 조회 없음)
+    claims에 없는 경우(claims가 없는 이전 토큰, 토큰 발급 이후 추가된 basespace)에는 캐시된 인증 주체로 확인합니다.
+    권한 회수는 token_version 증가로 기존 토큰 자체를 거부하므로 claims에 있으면 그대로 신뢰합니다.
+    """
+    try:
+        basespace_id = int(basespace_id)
+    except (TypeError, ValueError):
+        return False
+    if claims is not None and basespace_id in (claims.get("basespaces") or ()):
+        return True
+    return manages_basespace(user, basespace_id)
+
+
+def claims_role(claims, user):
+    """토큰 claims의 역할 (claims가 없는 이전 토큰이면 프로필의 역할)"""
+    if claims is not None and claims.get("role"):
+        return claims["role"]
+    return user.profile.role if hasattr(user, 'profile') else None
+
+
+class ScopedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    토큰 갱신 시 claims를 현재 권한으로 다시 기록합니다.
+    token_version 증가로 거부된 액세스 토큰도 리프레시 토큰으로 갱신하면 새 권한 범위의 토큰을 받습니다.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.select_related('profile').filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is not None:
+            add_scope_claims(refresh, user)
+            attrs = {**attrs, "refresh": str(refresh)}
+        return super().validate(attrs)
@@ -0,0 +1,100 @@
+import random
+import string
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from hotel_admin.redis_client import get_redis
+
+# 이메일 인증 코드 저장소 (Redis, DB 사용 안 함)
+# - verify:code:{email}      해시 {digest: 코드 HMAC, attempts: 실패 횟수}, TTL = VERIFICATION_CODE_TTL
+# - verify:cooldown:{email}  재발송 대기 (SET NX), TTL = VERIFICATION_RESEND_SECONDS
+# - verify:sends:{email}     발송 횟수 (INCR), TTL = VERIFICATION_SEND_WINDOW
+
+
+class VerificationError(Exception):
+    pass
+
+
+class VerificationRateLimited(VerificationError):
+    def __init__(self, retry_after):
+        super().__init__("인증 코드 발송 횟수를 초과했습니다. 잠시 후 다시 시도해주세요.")
+        self.retry_after = retry_after
+
+
+class VerificationLocked(VerificationError):
+    def __init__(self):
+        super().__init__("인증 시도 횟수를 초과했습니다. 인증 코드를 다시 요청해주세요.")
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def code_key(email):
+    return f"verify:code:{normalize_email(email)}"
+
+
+def cooldown_key(email):
+    return f"verify:cooldown:{normalize_email(email)}"
+
+
+def sends_key(email):
+    return f"verify:sends:{normalize_email(email)}"
+
+
+def digest(email, code):
+    return salted_hmac('accounts.verification', f"{normalize_email(email)}:{code}", algorithm='sha256').hexdigest()
+
+
+def issue_code(email, length=6):
+    """
+    새 인증 코드를 발급해 저장하고 반환합니다. (이전 코드는 무효화)
+    재발송 대기 시간 이내이거나 발송 횟수 제한을 넘으면 VerificationRateLimited를 발생시킵니다.
+    """
+    client = get_redis()
+    if not client.set(cooldown_key(email), 1, nx=True, ex=settings.VERIFICATION_RESEND_SECONDS):
+        raise VerificationRateLimited(max(client.ttl(cooldown_key(email)), 1))
+
+    pipe = client.pipeline()
+    pipe.incr(sends_key(email))
+    pipe.ttl(sends_key(email))
+    sends, window_ttl = pipe.execute()
+    if window_ttl < 0:
+        # 기간 내 첫 발송 (EXPIRE NX는 Redis 7 이상이므로 TTL로 확인)
+        client.expire(sends_key(email), settings.VERIFICATION_SEND_WINDOW)
+        window_ttl = settings.VERIFICATION_SEND_WINDOW
+    if sends > settings.VERIFICATION_SEND_LIMIT:
+        raise VerificationRateLimited(max(window_ttl, 1))
+
+    code = ''.join(random.choices(string.digits, k=length))
+    pipe = client.pipeline()
+    pipe.delete(code_key(email))
+    pipe.hset(code_key(email), mapping={"digest": digest(email, code), "attempts": 0})
+    pipe.expire(code_key(email), settings.VERIFICATION_CODE_TTL)
+    pipe.execute()
+    return code
+
+
+def check_code(email, code):
+    """
+    코드가 맞으면 저장된 코드를 삭제하고 True를 반환합니다. (한 번만 사용 가능)
+    틀린 시도가 VERIFICATION_MAX_ATTEMPTS회를 넘으면 코드를 삭제하고 VerificationLocked를 발생시킵니다.
+    """
+    client = get_redis()
+    key = code_key(email)
+    stored = client.hget(key, "digest")
+    if stored is None:
+        return False
+    if constant_time_compare(stored.decode(), digest(email, code)):
+        # 동시에 같은 코드로 두 번 인증되지 않도록 삭제에 성공한 요청만 인정
+        return bool(client.delete(key))
+    if client.hincrby(key, "attempts", 1) >= settings.VERIFICATION_MAX_ATTEMPTS:
+        client.delete(key)
+        raise VerificationLocked()
+    return False
+
+
+def reset(email):
+    """저장된 코드와 발송 제한을 모두 삭제합니다."""
+    get_redis().delete(code_key(email), cooldown_key(email), sends_key(email))
@@ -16,12 +16,17 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from accounts.models import UserProfile
+from accounts.models import GuestCredential, UserProfile
 from bookings.models import CheckIn
 from chat.models import ChatRoom
+from chat.utils import notify_chat_context_changed
+from notifications.topics import notify_topics_changed
 from spaces.models import BaseSpace
 from hotel_admin import settings
 
+from . import verification
+from .principal import bump_token_version
+from .tokens import add_scope_claims
 from .serializers import (
     UserRegistrationSerializer,
     SpaceManagerAssignSerializer,
@@ -31,13 +36,9 @@ from .serializers import (
 )
 
 # ========= Utility Functions =========
-def generate_verification_code(length=6):
-    """Generate a numeric verification code."""
-    return ''.join(random.choices(string.digits, k=length))
-
 def get_tokens_for_user(user):
     """Generate JWT tokens for a given user."""
-    refresh = RefreshToken.for_user(user)
+    refresh = add_scope_claims(RefreshToken.for_user(user), user)
     return {
         "access_token": str(refresh.access_token),
         "refresh_token": str(refresh)
@@ -113,6 +114,7 @@ class SendEmailVerificationView(APIView):
         responses={
             200: openapi.Response(description="이메일 인증 코드가 발송되었습니다."),
             400: openapi.Response(description="잘못된 요청"),
+            429: openapi.Response(description="발송 횟수 제한 초과"),
         }
     )
     def post(self, request):
@@ -123,16 +125,19 @@ class SendEmailVerificationView(APIView):
         if User.objects.filter(email=email).exists():
             return Response({"message": "이미 가입된 이메일입니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        verification_code = generate_verification_code()
+        # 코드는 Redis에 유효 시간과 함께 저장 (재발송 대기 및 발송 횟수 제한)
+        try:
+            verification_code = verification.issue_code(email)
+        except verification.VerificationRateLimited as e:
+            return Response({"message": str(e), "retry_after": e.retry_after},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(e.retry_after)})
         subject = '이메일 인증 6자리 코드 발송'
         message = f'아래의 6자리 코드를 입력하여 이메일 인증을 완료해주세요:\n{verification_code}'
 
         send_email(subject, message, [email])
-        # 실제 운영 환경에서는 코드 값을 응답에 포함시키지 않는 것이 좋습니다.
-        return Response({
-            "message": "이메일 인증 코드가 발송되었습니다.",
-            "verification_code": verification_code
-        }, status=status.HTTP_200_OK)
+        # 코드는 이메일로만 전달 (응답에 포함하면 유효 시간/시도 횟수 제한이 의미가 없음)
+        return Response({"message": "이메일 인증 코드가 발송되었습니다."}, status=status.HTTP_200_OK)
 
 class EmailVerificationView(APIView):
     permission_classes = [IsAuthenticated]
@@ -157,11 +162,14 @@ class EmailVerificationView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
         profile = request.user.profile
-        # 테스트를 위한 우회 코드 "123456" 사용 가능
-        if profile.email_verification_code == code or code == "123456":
+        # 발송된 코드는 Redis에서 확인 (한 번만 사용 가능, 실패 횟수 제한)
+        try:
+            verified = verification.check_code(request.user.email, code)
+        except verification.VerificationLocked as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if verified:
             profile.email_verified = True
-            profile.email_verification_code = ""
-            profile.save()
+            profile.save(update_fields=['email_verified'])
             return Response({"message": "이메일 인증이 완료되었습니다."}, status=status.HTTP_200_OK)
         else:
             return Response({"message": "인증번호가 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
@@ -214,6 +222,8 @@ class AssignSpaceManagerView(APIView):
                 serializer.save()
 
         basespace.managers.add(user)
+        # 기존 토큰의 claims(역할, 관리 basespace)가 바뀌었으므로 토큰 버전을 올려 재발급 유도
+        bump_token_version(user.id)
         return Response({
             "message": f"{user.username}님이 '{basespace.name}' 공간의 관리자로 설정되었습니다."
         }, status=status.HTTP_200_OK)
@@ -284,20 +294,26 @@ class EmailCodeLoginView(APIView):
         email_code = request.data.get("email_code")
         if not email_code:
             return Response({"message": "이메일 인증 코드를 입력해주세요."}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            # 모델 필드는 email_verification_code라고 가정합니다.
-            profile = UserProfile.objects.get(email_code=email_code)
-            user = profile.user
-        except UserProfile.DoesNotExist:
-            return Response({"message": "유효하지 않은 이메일 인증 코드입니다."}, status=status.HTTP_404_NOT_FOUND)
+        # TEMP 고객 임시코드: HMAC 값으로 인덱스 조회 한 번 (체크인 정보 포함)
+        credential = GuestCredential.verify(email_code)
+        if credential:
+            user = credential.user
+            check_in = credential.check_in
+        else:
+            # GuestCredential 도입 이전에 프로필에 저장된 코드
+            try:
+                profile = UserProfile.objects.select_related('user').get(email_code=email_code)
+                user = profile.user
+            except UserProfile.DoesNotExist:
+                return Response({"message": "유효하지 않은 이메일 인증 코드입니다."}, status=status.HTTP_404_NOT_FOUND)
+            check_in = CheckIn.objects.filter(temp_code=email_code, checked_out=False).first()
 
         tokens = get_tokens_for_user(user)
-        check_in = CheckIn.objects.filter(temp_code=email_code, checked_out=False).first()
 
         chat_room_id = None
         basespace_id = None
         if check_in:
-            basespace_id = check_in.hotel_room.room_type.basespace.id
+            basespace_id = check_in.hotel_room.room_type.basespace_id
             chat_room = ChatRoom.objects.filter(checkin=check_in).order_by('-created_at').first()
             if chat_room:
                 chat_room_id = chat_room.id
@@ -446,6 +462,13 @@ class UserProfileUpdateView(APIView):
         serializer = UserProfileUpdateSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            if "language" in serializer.validated_data:
+                # 언어가 바뀌면 연결된 채팅 소켓의 번역 대상 언어를 갱신
+                notify_chat_context_changed(
+                    ChatRoom.objects.filter(checkin__user=user, is_active=True).values_list("id", flat=True)
+                )
+                # 언어별 이벤트 그룹 변경
+                notify_topics_changed([user.id])
             return Response({
                 "username": user.username,
                 "email": user.email,
@@ -55,6 +55,39 @@ class CheckInRequestSerializer(serializers.Serializer):
     phone = serializers.CharField(required=False, allow_blank=True, help_text="전화번호 (워크인 고객인 경우)")
     guest = serializers.JSONField(required=True, help_text="예약 인원")
 
+class GroupCheckInGuestSerializer(serializers.Serializer):
+    """단체 체크인 고객 한 명(객실 하나)의 정보"""
+    room_id = serializers.IntegerField(required=True, help_text="객실 ID")
+    guest_name = serializers.CharField(required=True, help_text="이름")
+    email = serializers.EmailField(required=True, help_text="이메일")
+    phone = serializers.CharField(required=False, allow_blank=True, default="", help_text="전화번호")
+    nationality = serializers.CharField(required=False, allow_blank=True, default="", help_text="국적")
+    language = serializers.CharField(required=False, default="KO", help_text="언어")
+    guest = serializers.JSONField(required=False, default=dict, help_text="예약 인원")
+
+
+class GroupCheckInRequestSerializer(serializers.Serializer):
+    """단체(여행사) 체크인 요청 시리얼라이저. 일정은 단체 전체에 공통으로 적용됩니다."""
+    hotel_id = serializers.IntegerField(required=True, help_text="체크인할 호텔 ID")
+    is_day_use = serializers.BooleanField(required=False, default=False, help_text="대실 여부")
+    start_date = serializers.DateField(required=True, help_text="체크인 날짜")
+    start_time = serializers.TimeField(required=True, help_text="체크인 시간")
+    end_date = serializers.DateField(required=True, help_text="체크아웃 날짜")
+    end_time = serializers.TimeField(required=True, help_text="체크아웃 시간")
+    guests = GroupCheckInGuestSerializer(many=True, help_text="객실별 고객 목록")
+
+    def validate_guests(self, value):
+        if not value:
+            raise serializers.ValidationError("고객 목록이 비어 있습니다.")
+        if len(value) > 200:
+            raise serializers.ValidationError("한 번에 최대 200명까지 체크인할 수 있습니다.")
+        for field, label in (("room_id", "객실"), ("email", "이메일"), ("guest_name", "이름")):
+            values = [guest[field] for guest in value]
+            if len(set(values)) != len(values):
+                raise serializers.ValidationError(f"중복된 {label}이(가) 있습니다.")
+        return value
+
+
 class CheckInResponseSerializer(serializers.ModelSerializer):
     """체크인 응답 시리얼라이저"""
     user = UserSerializer()
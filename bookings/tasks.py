@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.core.mail import send_mass_mail
+
+
+@shared_task
+def send_checkin_emails(datatuple):
+    """
+    단체 체크인 고객들에게 임시 코드 이메일을 발송합니다. (하나의 SMTP 연결로 모두 발송)
+    datatuple은 send_mass_mail 형식의 (제목, 본문, 보내는 사람, 받는 사람 목록) 목록입니다.
+    """
+    return send_mass_mail(datatuple, fail_silently=False)
@@ -1,4 +1,5 @@
 from datetime import date, time, timedelta
+from unittest import mock
 from django.urls import reverse
 from django.contrib.gis.geos import Point
 from django.test import override_settings
@@ -8,6 +9,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from accounts.models import UserProfile
 from spaces.models import BaseSpace, HotelRoomType, HotelRoom, HotelRoomUsage, HotelRoomMemo
 from bookings.models import CheckIn, Reservation, Like
+from bookings.tasks import send_checkin_emails
 from django.utils.timezone import now
 
 
@@ -95,6 +97,38 @@ class CheckInAndOutViewSetTests(APITestCase):
         self.assertEqual(response.status_code, 201)
         self.assertIn("temp_code", response.data)
 
+    def test_walkin_temp_code_login(self):
+        from accounts.models import GuestCredential
+        data = {
+            "hotel_id": self.basespace.id,
+            "room_id": self.hotel_room.id,
+            "guest_name": "WalkIn Login",
+            "email": "walkinlogin@test.com",
+            "phone": "01012345678",
+            "nationality": "KR",
+            "language": "ko",
+            "start_date": date.today().isoformat(),
+            "start_time": "14:00:00",
+            "end_date": (date.today() + timedelta(days=1)).isoformat(),
+            "end_time": "11:00:00",
+            "is_day_use": False,
+            "guest": "walkinlogin@test.com"
+        }
+        temp_code = self.client.post(self.checkin_url, data, format="json").data["temp_code"]
+        user = User.objects.get(email="walkinlogin@test.com")
+        self.assertFalse(user.has_usable_password())
+        self.assertNotEqual(GuestCredential.objects.get(user=user).code_digest, temp_code)
+
+        login_url = reverse("email_code_login")
+        response = self.client.post(login_url, {"email_code": temp_code})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["checkin_id"], CheckIn.objects.get(user=user).id)
+
+        # 체크아웃 후에는 임시코드 로그인 불가
+        self.client.post(self.checkout_url, {"room_id": self.hotel_room.id}, format="json")
+        response = self.client.post(login_url, {"email_code": temp_code})
+        self.assertEqual(response.status_code, 404)
+
     def test_check_out_success(self):
         # 워크인 체크인을 수동으로 생성
         temp_code = "123456"
@@ -129,6 +163,41 @@ class CheckInAndOutViewSetTests(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("체크아웃 완료", response.data["message"])
 
+    def test_group_check_in_success(self):
+        from django.core import mail
+        from chat.models import ChatRoom
+        second_room = HotelRoom.objects.create(room_number="102", room_type=self.room_type, status="빈 방")
+        data = {
+            "hotel_id": self.basespace.id,
+            "start_date": date.today().isoformat(),
+            "start_time": "14:00:00",
+            "end_date": (date.today() + timedelta(days=1)).isoformat(),
+            "end_time": "11:00:00",
+            "guests": [
+                {"room_id": self.hotel_room.id, "guest_name": "Tour A", "email": "toura@test.com", "language": "EN"},
+                {"room_id": second_room.id, "guest_name": "Tour B", "email": "tourb@test.com", "language": "EN"},
+            ],
+        }
+        with mock.patch("bookings.views.send_checkin_emails.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse("checkin-group"), data, format="json")
+        self.assertEqual(response.status_code, 201)
+        # 이메일은 요청 중에 발송하지 않고 Celery 작업으로 넘김
+        self.assertEqual(len(mail.outbox), 0)
+        delay.assert_called_once()
+        send_checkin_emails(*delay.call_args.args)
+        self.assertEqual(len(response.data["check_ins"]), 2)
+        self.assertEqual(ChatRoom.objects.filter(checkin__hotel_room__in=[self.hotel_room, second_room]).count(), 2)
+        self.assertEqual(UserProfile.objects.filter(role="TEMP", user__email__in=["toura@test.com", "tourb@test.com"]).count(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+        # 이미 체크인된 객실은 거부
+        data["guests"] = data["guests"][:1]
+        data["guests"][0]["email"] = "tourc@test.com"
+        data["guests"][0]["guest_name"] = "Tour C"
+        response = self.client.post(reverse("checkin-group"), data, format="json")
+        self.assertEqual(response.status_code, 400)
+
 
 @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
 class LikeViewSetTests(APITestCase):
@@ -10,6 +10,7 @@ router.register(r'reservations', ReservationViewSet, basename='reservation')
 router.register(r'likes', LikeViewSet, basename='like')
 urlpatterns = [
     path("checkin/", CheckInAndOutViewSet.as_view({"post": "check_in", "patch": "update_check_in"}), name="checkin"),
+    path("checkin/group/", CheckInAndOutViewSet.as_view({"post": "group_check_in"}), name="checkin-group"),
     path("checkout/", CheckInAndOutViewSet.as_view({"post": "check_out"}), name="checkout"),
     path("guest_info/", CheckInAndOutViewSet.as_view({"patch": "update_customer_info"}), name="guest_info"),
     path('reservations/', ReservationListView.as_view(), name='reservation-list'),
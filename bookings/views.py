@@ -8,11 +8,15 @@ from rest_framework.views import APIView
 from hotel_admin import settings
 
 from .models import CheckIn, Reservation, HotelRoom, Review, ReviewPhoto, Like
+from .tasks import send_checkin_emails
 from django.contrib.auth.models import User
 from spaces.models import BaseSpace, HotelRoomUsage, HotelRoomMemo, HotelRoomHistory
 from chat.models import ChatRoom, ChatRoomParticipant
-from accounts.models import UserProfile
+from chat.utils import notify_chat_context_changed
+from notifications.topics import notify_topics_changed
+from accounts.models import GuestCredential, UserProfile
 from accounts.permissions import IsAdminOrManager
+from accounts.tokens import claims_manage_basespace
 
 from django.db import transaction
 from django.core.mail import send_mail
@@ -30,7 +34,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
 
-from .serializers import CheckInRequestSerializer, CheckInSerializer, CheckOutRequestSerializer, ReviewSerializer, \
+from .serializers import CheckInRequestSerializer, GroupCheckInRequestSerializer, CheckInSerializer, CheckOutRequestSerializer, ReviewSerializer, \
     CheckInUpdateSerializer, CheckInCustomerUpdateSerializer, ReservationSerializer, UserReservationSerializer, \
     CheckInReservationSerializer, LikeSerializer
 
@@ -43,6 +47,17 @@ def generate_unique_temp_code():
             return temp_code
 
 
+def allocate_temp_codes(count):
+    """DB에 없는 6자리 숫자 임시코드를 count개 생성 (후보를 한 번에 만들어 중복 여부를 쿼리 한 번으로 확인)"""
+    codes = set()
+    while len(codes) < count:
+        candidates = {''.join(random.choices(string.digits, k=6)) for _ in range((count - len(codes)) * 2)}
+        candidates -= codes
+        taken = set(CheckIn.objects.filter(temp_code__in=candidates).values_list('temp_code', flat=True))
+        codes.update(list(candidates - taken)[:count - len(codes)])
+    return list(codes)
+
+
 class CheckInAndOutViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrManager]
 
@@ -68,7 +83,7 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
         hotel, room = self.get_hotel_and_room(validated_data["hotel_id"], validated_data["room_id"])
 
         # 권한 체크
-        if not (user.is_staff or hotel.managers.filter(id=user.id).exists()):
+        if not (user.is_staff or claims_manage_basespace(request.auth, user, hotel.id)):
             return Response({"error": "체크인 권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
 
         # 예약된 고객 체크인
@@ -92,6 +107,136 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
 
         return response
 
+    @swagger_auto_schema(
+        request_body=GroupCheckInRequestSerializer,
+        responses={
+            201: openapi.Response(description="단체 체크인 완료 (객실별 user_id, check_in_id, chat_room_id, temp_code)"),
+            400: openapi.Response(description="잘못된 요청 (사용 중인 객실, 이미 등록된 이메일/이름 등)"),
+            403: openapi.Response(description="체크인 권한 없음"),
+        },
+        operation_summary="단체 체크인 처리",
+        operation_description="단체(여행사) 고객 여러 명을 객실별로 한 번에 워크인 체크인합니다.",
+    )
+    def group_check_in(self, request):
+        """
+        단체 체크인: 고객 수와 관계없이 모델별로 bulk_create 한 번씩, 한 트랜잭션에서 처리합니다.
+        임시 사용자는 비밀번호 해시를 만들지 않고(사용 불가 비밀번호) GuestCredential의 임시코드로 로그인합니다.
+        안내 메일은 커밋 이후 Celery 작업(bookings.tasks.send_checkin_emails)으로 한 번에 발송합니다.
+        """
+        serializer = GroupCheckInRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        validated_data = serializer.validated_data
+        guests = validated_data["guests"]
+
+        hotel = get_object_or_404(BaseSpace, id=validated_data["hotel_id"])
+        if not (request.user.is_staff or claims_manage_basespace(request.auth, request.user, hotel.id)):
+            return Response({"error": "체크인 권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        room_ids = [guest["room_id"] for guest in guests]
+        rooms = HotelRoom.objects.select_related('room_type').in_bulk(room_ids)
+        missing = [room_id for room_id in room_ids if room_id not in rooms or rooms[room_id].room_type.basespace_id != hotel.id]
+        if missing:
+            return Response({"error": "해당 호텔의 객실이 아닙니다.", "room_ids": missing}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            occupied = list(CheckIn.objects.filter(
+                hotel_room_id__in=room_ids, checked_out=False
+            ).values_list('hotel_room_id', flat=True))
+            if occupied:
+                return Response({"error": "현재 체크인된 고객이 있어 체크인할 수 없습니다.", "room_ids": occupied},
+                                status=status.HTTP_400_BAD_REQUEST)
+            # bulk_create는 pre_save 시그널(이메일 중복 검사)을 거치지 않으므로 직접 확인
+            emails = [guest["email"] for guest in guests]
+            taken_emails = list(User.objects.filter(email__in=emails).values_list('email', flat=True))
+            if taken_emails:
+                return Response({"error": "이미 등록된 이메일입니다.", "emails": taken_emails},
+                                status=status.HTTP_400_BAD_REQUEST)
+            names = [guest["guest_name"] for guest in guests]
+            taken_names = list(User.objects.filter(username__in=names).values_list('username', flat=True))
+            if taken_names:
+                return Response({"error": "이미 사용 중인 이름입니다.", "guest_names": taken_names},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            temp_codes = allocate_temp_codes(len(guests))
+            users = []
+            for guest in guests:
+                user = User(username=guest["guest_name"], email=guest["email"])
+                user.set_unusable_password()
+                users.append(user)
+            User.objects.bulk_create(users)
+
+            UserProfile.objects.bulk_create([
+                UserProfile(
+                    user=user,
+                    phone_number=guest["phone"],
+                    nationality=guest["nationality"],
+                    language=guest["language"],
+                    role='TEMP',
+                )
+                for user, guest in zip(users, guests)
+            ])
+            reservations = Reservation.objects.bulk_create([
+                Reservation(
+                    user=user,
+                    space=rooms[guest["room_id"]].room_type,
+                    start_date=validated_data["start_date"],
+                    start_time=validated_data["start_time"],
+                    end_date=validated_data["end_date"],
+                    end_time=validated_data["end_time"],
+                    people=1,
+                    guest=guest["guest"],
+                )
+                for user, guest in zip(users, guests)
+            ])
+            check_ins = CheckIn.objects.bulk_create([
+                CheckIn(
+                    user=user,
+                    hotel_room=rooms[guest["room_id"]],
+                    reservation=reservation,
+                    check_in_date=now().date(),
+                    check_in_time=now().time(),
+                    check_out_date=validated_data["end_date"],
+                    check_out_time=validated_data["end_time"],
+                    temp_code=temp_code,
+                    is_day_use=validated_data["is_day_use"],
+                )
+                for user, guest, reservation, temp_code in zip(users, guests, reservations, temp_codes)
+            ])
+            GuestCredential.objects.bulk_create([
+                GuestCredential.build(check_in, temp_code) for check_in, temp_code in zip(check_ins, temp_codes)
+            ])
+            HotelRoomUsage.objects.bulk_create([
+                HotelRoomUsage(hotel_room_id=room_id, usage_content="체크인") for room_id in room_ids
+            ])
+            chat_rooms = ChatRoom.objects.bulk_create([
+                ChatRoom(basespace=hotel, checkin=check_in) for check_in in check_ins
+            ])
+            ChatRoomParticipant.objects.bulk_create([
+                ChatRoomParticipant(chatroom=chat_room, user=participant)
+                for chat_room, user in zip(chat_rooms, users)
+                for participant in (request.user, user)
+            ])
+
+            datatuple = [self.checkin_email(guest["email"], temp_code) for guest, temp_code in zip(guests, temp_codes)]
+            # 응답이 SMTP 발송을 기다리지 않도록 커밋 이후 Celery 작업으로 발송
+            transaction.on_commit(lambda: send_checkin_emails.delay(datatuple))
+            # 이미 알림 소켓에 연결된 고객은 호텔 공지 그룹에 가입하도록 알림
+            transaction.on_commit(lambda: notify_topics_changed([user.id for user in users]))
+
+        return Response({
+            "message": f"단체 체크인 완료 ({len(check_ins)}명)",
+            "check_ins": [
+                {
+                    "room_id": check_in.hotel_room_id,
+                    "user_id": check_in.user_id,
+                    "check_in_id": check_in.id,
+                    "chat_room_id": chat_room.id,
+                    "temp_code": check_in.temp_code,
+                }
+                for check_in, chat_room in zip(check_ins, chat_rooms)
+            ],
+        }, status=status.HTTP_201_CREATED)
+
     @swagger_auto_schema(
         request_body=CheckOutRequestSerializer,
         responses={
@@ -123,6 +268,10 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
         check_in.check_out_time = now().time()
         check_in.checked_out = True
         check_in.save()
+        # 임시코드 로그인 즉시 만료
+        GuestCredential.objects.filter(check_in=check_in).delete()
+        # 고객의 알림 소켓이 호텔 공지 그룹에서 탈퇴하도록 커밋 이후 알림
+        transaction.on_commit(lambda: notify_topics_changed([check_in.user_id]))
 
         # 객실 상태 변경 및 로그 기록
         self.update_room_status(check_in.hotel_room, "체크 아웃")
@@ -137,7 +286,10 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
         chat_room = ChatRoom.objects.filter(checkin=check_in).first()
         if chat_room:
             chat_room.is_active = False
-            chat_room.save()
+            # append_message가 잠금 아래에서 갱신하는 last_message/message_seq를 덮어쓰지 않도록 변경한 필드만 저장
+            chat_room.save(update_fields=['is_active'])
+            # 커밋 이후 연결된 채팅 소켓의 캐시된 채팅방 상태를 갱신
+            transaction.on_commit(lambda: notify_chat_context_changed([chat_room.id]))
 
         return Response({
             "message": "체크아웃 완료" + (" 및 채팅방 비활성화됨" if chat_room else ""),
@@ -202,9 +354,10 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
 
         temp_code = generate_unique_temp_code()
 
+        # 임시코드는 GuestCredential(HMAC)로 검증하므로 비밀번호 해시를 만들지 않음 (사용 불가 비밀번호)
         new_user = User.objects.create_user(
             username=validated_data["guest_name"],
-            password=temp_code,
+            password=None,
             email=validated_data["email"],
         )
 
@@ -213,7 +366,6 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
             phone_number=validated_data["phone"],
             nationality=validated_data["nationality"],
             language=validated_data["language"],
-            email_code=temp_code,
             role='TEMP'
         )
 
@@ -232,6 +384,7 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
             user=new_user, room=room, reservation=reservation, end_date=validated_data["end_date"],
             end_time=validated_data["end_time"], is_day_use=validated_data["is_day_use"], temp_code=temp_code
         )
+        GuestCredential.build(check_in, temp_code).save()
 
         self.send_checkin_email(validated_data["email"], temp_code)
 
@@ -252,6 +405,8 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
             is_day_use=is_day_use
         )
         self.update_room_status(room, "체크인")
+        # 고객의 알림 소켓이 호텔 공지 그룹(basespace_{id}_guests)에 가입하도록 커밋 이후 알림
+        transaction.on_commit(lambda: notify_topics_changed([user.id]))
         return check_in
 
     def update_room_status(self, room, status):
@@ -261,13 +416,23 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
             usage_content=status
         )
 
+    def checkin_email(self, email, temp_code):
+        """체크인 이메일 (send_mass_mail 형식의 (제목, 본문, 보내는 사람, 받는 사람 목록) 튜플)"""
+        return (
+            "호텔 체크인 임시 코드 발급",
+            f"안녕하세요,\n\n임시 로그인 코드는 {temp_code} 입니다.",
+            settings.DEFAULT_FROM_EMAIL,
+            [email],
+        )
+
     def send_checkin_email(self, email, temp_code):
         """체크인 이메일 발송"""
+        subject, message, from_email, recipient_list = self.checkin_email(email, temp_code)
         send_mail(
-            subject="호텔 체크인 임시 코드 발급",
-            message=f"안녕하세요,\n\n임시 로그인 코드는 {temp_code} 입니다.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
+            subject=subject,
+            message=message,
+            from_email=from_email,
+            recipient_list=recipient_list,
             fail_silently=False,
         )
 
@@ -339,6 +504,10 @@ class CheckInAndOutViewSet(viewsets.ViewSet):
         if 'language' in validated_data:
             user_profile.language = validated_data['language']
             user_profile.save()
+            notify_chat_context_changed(
+                ChatRoom.objects.filter(checkin=check_in, is_active=True).values_list('id', flat=True)
+            )
+            notify_topics_changed([user.id])
 
         return Response(CheckInSerializer(check_in).data, status=status.HTTP_200_OK)
 
@@ -0,0 +1,104 @@
+import gzip
+import io
+import json
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatRoom, Message
+from .storage import s3_client, release_attachment
+
+ARCHIVE_PREFIX = "chat-archive/"
+EXPORT_CHUNK_SIZE = 2000  # DB에서 한 번에 읽어 올 메시지 수
+DELETE_BATCH_SIZE = 1000  # 한 번에 삭제할 메시지 수
+SPOOL_MAX_SIZE = 8 * 1024 * 1024  # 이 크기를 넘으면 압축 파일을 메모리 대신 임시 파일에 기록
+
+
+def archive_key(chat_room):
+    return f"{ARCHIVE_PREFIX}{chat_room.basespace_id}/{chat_room.id}.jsonl.gz"
+
+
+def message_record(message):
+    return {
+        "id": message.id,
+        "seq": message.seq,
+        "uuid": str(message.uuid) if message.uuid else None,
+        "sender_id": message.sender_id,
+        "sender": message.sender.username,
+        "content": message.content,
+        "translated_content": message.translated_content,
+        "file_url": message.file_url,
+        "file_key": message.file_key,
+        "file_name": message.file_name,
+        "file_type": message.file_type,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def archive_chat_room(chat_room):
+    """
+    채팅방 메시지를 gzip JSONL로 오브젝트 스토리지에 내보내고 Message 행을 삭제합니다.
+    메시지는 청크 단위로 읽어 압축하므로 채팅방 크기와 무관하게 메모리 사용량이 일정합니다.
+    내보내기부터 삭제까지 채팅방 행을 잠가 두므로, 그 사이에 저장되는 메시지(REST 전송, 지연 쓰기 저장 모두
+    채팅방 행을 잠근 뒤 저장)는 보관이 끝난 뒤에 저장되어 보관 파일에 빠진 채로 삭제되지 않습니다.
+    보관한 메시지 수를 반환합니다.
+    """
+    key = None
+    count = 0
+    with transaction.atomic():
+        locked = ChatRoom.objects.select_for_update().filter(pk=chat_room.pk, archived_at__isnull=True).first()
+        if locked is None:
+            # 다른 프로세스가 이미 보관함
+            return 0
+        messages = Message.objects.filter(room=chat_room).select_related('sender').order_by('created_at', 'id')
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+            with gzip.GzipFile(fileobj=spool, mode='wb') as archive:
+                for message in messages.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                    archive.write(json.dumps(message_record(message), ensure_ascii=False).encode() + b"\n")
+                    count += 1
+            if count:
+                key = archive_key(chat_room)
+                spool.seek(0)
+                s3_client.upload_fileobj(
+                    spool, settings.AWS_STORAGE_BUCKET_NAME, key,
+                    ExtraArgs={"ContentType": "application/x-ndjson", "ContentEncoding": "gzip"},
+                )
+
+        # 업로드가 끝난 뒤에만 포인터를 남기고 원본 행을 삭제 (업로드 실패 시 트랜잭션 전체가 롤백됨)
+        ChatRoom.objects.filter(pk=chat_room.pk).update(
+            archive_key=key, archived_at=timezone.now(), last_message=None
+        )
+        while True:
+            ids = list(Message.objects.filter(room=chat_room).values_list('id', flat=True)[:DELETE_BATCH_SIZE])
+            if not ids:
+                break
+            batch = Message.objects.filter(id__in=ids)
+            # 해시 기반 첨부파일의 참조는 보관 파일이 넘겨받으므로 삭제 시그널에서 참조 수를 줄이지 않도록 키를 비움
+            batch.exclude(file_key=None).update(file_key=None)
+            batch.delete()
+    chat_room.archive_key = key
+    return count
+
+
+def open_archive(chat_room):
+    """보관된 gzip JSONL 파일의 스트리밍 본문을 반환 (압축 해제하지 않음)"""
+    return s3_client.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=chat_room.archive_key)["Body"]
+
+
+def iter_archived_messages(chat_room):
+    """보관된 메시지를 한 건씩 읽어 dict로 반환 (파일 전체를 메모리에 올리지 않음)"""
+    if not chat_room.archive_key:
+        return
+    with gzip.GzipFile(fileobj=open_archive(chat_room)) as archive:
+        for line in io.TextIOWrapper(archive, encoding="utf-8"):
+            yield json.loads(line)
+
+
+def delete_archive(chat_room):
+    """보관 파일이 넘겨받은 해시 기반 첨부파일 참조를 해제하고 보관 파일을 삭제합니다. (채팅방 삭제 시)"""
+    for record in iter_archived_messages(chat_room):
+        if record.get("file_key"):
+            release_attachment(record["file_key"])
+    s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=chat_room.archive_key)
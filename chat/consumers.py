@@ -1,18 +1,47 @@
 import json
+import logging
+import time
+import uuid
+from collections import deque
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
 from urllib.parse import parse_qs
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.exceptions import NotFound
 
 from notifications.utils import send_notification_to_users
+from accounts.tokens import claims_manage_basespace
 from spaces.models import BaseSpace
-from .models import ChatRoom, Message
-from .utils import translate_text
+from .db import db_sync_to_async
+from .models import ChatRoom, ChatRoomParticipant, Message
+from .read_receipts import get_read_receipt_buffer, MAX_READ_SEQ
+from .presence import mark_online, mark_offline
+from .pagination import paginate_messages, get_since_seq, MAX_PAGE_SIZE
+from .serializers import MessageSerializer
+from .storage import confirm_attachment, AttachmentError
+from .utils import translate_text, broadcast_chat_message, unread_rooms_changed_event
+from .write_behind import get_message_buffer
 from django.utils.timezone import localtime
 
+logger = logging.getLogger(__name__)
+
+
 class MultiplexConsumer(AsyncWebsocketConsumer):
+    # 중복 수신 확인용으로 기억해 둘 최근 메시지 수 (소켓당)
+    RECENT_MESSAGE_LIMIT = 256
+    # 같은 입력 중 상태를 다시 전달하기까지의 최소 간격 (초)
+    TYPING_RELAY_INTERVAL = 3
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.groups_to_join = []  # 초기화
+        self.recent_message_uuids = deque(maxlen=self.RECENT_MESSAGE_LIMIT)
+        self.recent_message_uuid_set = set()
+        self.last_read_seq = 0  # 이 소켓에서 마지막으로 읽음 처리한 순번
+        self.user_online = False
+        self.last_typing_state = None
+        self.last_typing_sent = 0.0
 
     async def connect(self):
         self.user = self.scope["user"]
@@ -23,13 +52,21 @@ class MultiplexConsumer(AsyncWebsocketConsumer):
         # 쿼리 문자열에서 room_id와 basespace_id 가져오기
         qs = parse_qs(self.scope.get("query_string", b"").decode())
 
+        # 발신자 역할은 연결 시 한 번만 조회합니다. (TokenAuthMiddleware에서 profile을 함께 로드)
+        self.user_role = await db_sync_to_async(self.get_user_role)()
+
         # room_id가 있으면 고객용 채팅방 그룹에 가입
         room_ids = qs.get("room_id")
         if room_ids:
             self.room_id = room_ids[0]
             self.chat_group_name = f"chat_{self.room_id}"
             self.groups_to_join.append(self.chat_group_name)
-            self.chat_room = await sync_to_async(ChatRoom.objects.get)(id=self.room_id)
+            try:
+                await db_sync_to_async(self.load_chat_context)()
+            except ChatRoom.DoesNotExist:
+                await self.send(json.dumps({"error": "채팅방이 존재하지 않습니다."}))
+                await self.close()
+                return
 
         # basespace_id가 있으면 매니저용 그룹에도 가입 (매니저나 관리자 전용)
         basespace_ids = qs.get("basespace_id")
@@ -39,21 +76,17 @@ class MultiplexConsumer(AsyncWebsocketConsumer):
             self.groups_to_join.append(self.manager_group_name)
 
             # 매니저용 가입 시 사용자 권한 확인
-            user_role = await sync_to_async(lambda: self.user.profile.role)()
-            if user_role not in ["ADMIN", "MANAGER"]:
+            if self.user_role not in ["ADMIN", "MANAGER"]:
                 await self.send(json.dumps({"error": "매니저나 관리자가 아닙니다."}))
                 await self.close()
                 return
-            if user_role == "MANAGER":
-                # 해당 basespace가 존재하는지 및 매니저 권한 확인
-                try:
-                    basespace = await sync_to_async(BaseSpace.objects.get)(id=self.basespace_id)
-                except BaseSpace.DoesNotExist:
-                    await self.send(json.dumps({"error": "해당 basespace가 존재하지 않습니다."}))
-                    await self.close()
-                    return
-                is_manager = await sync_to_async(lambda: basespace.managers.filter(id=self.user.id).exists())()
-                if not is_manager:
+            if self.user_role == "MANAGER":
+                # 매니저 권한 확인 (토큰 claims/캐시된 인증 주체 사용, 실패 시에만 존재 여부 조회)
+                if not claims_manage_basespace(self.scope.get("token_claims"), self.user, self.basespace_id):
+                    if not await db_sync_to_async(BaseSpace.objects.filter(id=self.basespace_id).exists)():
+                        await self.send(json.dumps({"error": "해당 basespace가 존재하지 않습니다."}))
+                        await self.close()
+                        return
                     await self.send(json.dumps({"error": "해당 호텔의 매니저가 아닙니다."}))
                     await self.close()
                     return
@@ -67,7 +100,17 @@ class MultiplexConsumer(AsyncWebsocketConsumer):
             "joined_groups": self.groups_to_join
         }, ensure_ascii=False))
 
+        # 재접속한 클라이언트가 since_seq를 보내면 놓친 메시지만 전송
+        since_seqs = qs.get("since_seq")
+        if since_seqs and hasattr(self, "chat_room"):
+            await self.send_missed_messages(since_seqs[0])
+
+        if hasattr(self, "chat_room"):
+            await self.update_presence(online=True, announce=True)
+
     async def disconnect(self, close_code):
+        if hasattr(self, "chat_room") and self.user_online:
+            await self.update_presence(online=False, announce=True)
         for group in self.groups_to_join:
             await self.channel_layer.group_discard(group, self.channel_name)
 
@@ -77,24 +120,56 @@ class MultiplexConsumer(AsyncWebsocketConsumer):
         {
           "target": "chat",    // 또는 "manager"
           "content": "안녕하세요",
-          "file_url": null,     // (옵션)
+          "file_key": null,     // (옵션) upload-url로 발급받아 업로드를 마친 파일 키
           "file_name": null,    // (옵션)
           "file_type": null     // (옵션)
         }
+        읽음 처리 프레임 예시: {"type": "read", "seq": 42}
+        접속 유지 프레임 예시: {"type": "heartbeat"}  (CHAT_PRESENCE_TTL보다 짧은 주기로 전송)
+        입력 중 표시 프레임 예시: {"type": "typing", "is_typing": true}
         """
         try:
             data = json.loads(text_data)
+            frame_type = data.get("type")
+            if frame_type == "read":
+                await self.handle_read(data)
+                return
+            if frame_type == "heartbeat":
+                if hasattr(self, "chat_room"):
+                    await self.update_presence(online=True)
+                return
+            if frame_type == "typing":
+                await self.handle_typing(data)
+                return
             target = data.get("target")
             content = data.get("content", "")
+            file_key = data.get("file_key")
             file_url = data.get("file_url")
             file_name = data.get("file_name")
             file_type = data.get("file_type")
 
-            sender_role = await sync_to_async(lambda: self.user.profile.role)()
-            # 채팅방에 연결된 고객 (체크인 사용자의 정보)
-            customer = await sync_to_async(lambda: self.chat_room.checkin.user)()
-            # 고객의 언어 (없으면 기본값 "KO")
-            customer_lang = await sync_to_async(lambda: getattr(customer.profile, 'language', 'KO').upper())()
+            if not hasattr(self, "chat_room"):
+                await self.send(json.dumps({"error": "채팅방에 연결되어 있지 않습니다."}))
+                return
+
+            if file_key:
+                # 직접 업로드된 파일이 이 채팅방에 발급된 키인지 확인 (HEAD 요청만 수행, 파일 바이트는 읽지 않음)
+                try:
+                    attachment = await db_sync_to_async(confirm_attachment)(
+                        self.chat_room, file_key, self.user, self.user_role
+                    )
+                except AttachmentError as e:
+                    await self.send(json.dumps({"error": str(e)}))
+                    return
+                file_url = attachment["file_url"]
+                file_type = attachment["file_type"]
+                file_name = file_name or file_key.rsplit("/", 1)[-1]
+                file_key = attachment["file_key"]
+
+            # 연결 시 캐시해 둔 채팅방 컨텍스트 사용 (메시지마다 DB 조회하지 않음)
+            sender_role = self.user_role
+            customer = self.customer
+            customer_lang = self.customer_lang
 
             # 만약 고객 언어가 한국어이면 번역 없이 그대로 사용합니다.
             if customer_lang == "KO":
@@ -103,32 +178,47 @@ class MultiplexConsumer(AsyncWebsocketConsumer):
                 if sender_role in ["ADMIN", "MANAGER"]:
                     # 매니저 또는 어드민이 보낼 경우: 고객이 선택한 언어로 번역
                     target_lang = customer_lang
-                    translated_content = await sync_to_async(translate_text)(content, target_lang)
+                    translated_content = await sync_to_async(translate_text, thread_sensitive=False)(content, target_lang)
                 else:
                     # 고객이 보낼 경우: 한국어("KO")로 번역
                     target_lang = "KO"
-                    translated_content = await sync_to_async(translate_text)(content, target_lang)
+                    translated_content = await sync_to_async(translate_text, thread_sensitive=False)(content, target_lang)
 
             if sender_role in ["ADMIN", "MANAGER"]:
-                sender_name = await sync_to_async(lambda: self.chat_room.basespace.name)()
+                sender_name = self.basespace_name
             else:
                 sender_name = self.user.username
 
-            message = await sync_to_async(Message.objects.create)(
-                room=self.chat_room,
-                sender=self.user,
-                content=content,
-                translated_content=translated_content,
-                file_url=file_url,
-                file_name=file_name,
-                file_type=file_type
-            )
+            message_fields = {
+                "content": content,
+                "translated_content": translated_content,
+                "file_url": file_url,
+                "file_key": file_key,
+                "file_name": file_name,
+                "file_type": file_type,
+            }
+            notification = {
+                "title": "새 채팅 메시지",
+                "content": translated_content,
+                "notification_type": "MESSAGE",
+            }
+            if settings.CHAT_WRITE_BEHIND:
+                # Redis에만 기록하고 바로 전송, 메시지/채팅방/알림 DB 저장은 버퍼에서 일괄 처리
+                message = await get_message_buffer().enqueue(
+                    self.chat_room, self.user,
+                    notification={**notification, "recipient_ids": [customer.id]},
+                    **message_fields
+                )
+            else:
+                # 메시지 저장과 함께 채팅방의 마지막 메시지/순번/답변 여부를 갱신
+                message = await db_sync_to_async(self.chat_room.append_message)(sender=self.user, **message_fields)
 
 
             message_time_kst = localtime(message.created_at)
 
             payload = {
-                "type": "multiplex_message",  # 아래 multiplex_message 메서드가 처리합니다.
+                "message_uuid": str(message.uuid),
+                "seq": message.seq,  # 지연 쓰기 모드에서는 저장 시점에 발급되므로 None
                 "sender": sender_name,
                 "content": content,
                 "translated_content": translated_content,
@@ -138,49 +228,239 @@ class MultiplexConsumer(AsyncWebsocketConsumer):
                 "created_at_date": message_time_kst.strftime("%d/%m/%Y"),
                 "created_at_time": message_time_kst.strftime("%I:%M %p"),
             }
-            # target 값에 따라 해당 그룹으로 메시지 전송
+            # target 값에 따라 해당 그룹으로 메시지 전송 (직렬화는 한 번, 두 그룹에 모두 가입한 소켓은 한 번만 수신)
             if target == "chat":
-                # 고객 소켓은 자신이 가입한 채팅방 그룹으로 전송
-                if hasattr(self, "chat_group_name"):
-                    await self.channel_layer.group_send(self.chat_group_name, payload)
-                # 그리고, DB에서 채팅방 정보를 조회해서 basespace 기반의 매니저 그룹으로도 전송
-                chat_room = await sync_to_async(ChatRoom.objects.select_related('basespace').get)(id=self.room_id)
-                manager_group_name = f"manager_{chat_room.basespace.id}"
-                payload_with_room = payload.copy()
-                payload_with_room["chat_room"] = self.room_id  # 어느 채팅방에서 온 메시지인지 명시
-                await self.channel_layer.group_send(manager_group_name, payload_with_room)
+                # 고객 채팅방 그룹과 채팅방이 속한 basespace의 매니저 그룹으로 전송
+                payload["chat_room"] = self.room_id  # 어느 채팅방에서 온 메시지인지 명시
+                groups = [self.chat_group_name, self.room_manager_group_name]
+                await broadcast_chat_message(groups, payload)
             elif target == "manager":
                 # 만약 관리자가 직접 메시지를 보내는 경우
                 if hasattr(self, "manager_group_name"):
                     payload["chat_room"] = self.room_id if hasattr(self, "room_id") else None
-                    await self.channel_layer.group_send(self.manager_group_name, payload)
+                    await broadcast_chat_message([self.manager_group_name], payload)
                 else:
                     await self.send(json.dumps({"error": "매니저 그룹에 연결되어 있지 않습니다."}))
             else:
                 await self.send(json.dumps({"error": "잘못된 target 값입니다."}))
 
+            # 참여자별 읽지 않은 채팅방 수를 여기서 한 번만 계산해 매니저 소켓들에 전달
+            unread_counts = await db_sync_to_async(ChatRoomParticipant.unread_room_counts_after_message)(
+                self.chat_room, self.user.id
+            )
+            if unread_counts:
+                await self.channel_layer.group_send(
+                    self.room_manager_group_name, unread_rooms_changed_event(self.chat_room, unread_counts)
+                )
+
             await send_notification_to_users(
                 [customer.id],
                 {
+                    **notification,
                     "sender": self.user,
-                    "title": "새 채팅 메시지",
-                    "content": translated_content,
-                    "notification_type": "MESSAGE",
                     "created_at": message.created_at.isoformat(),
                     "chat_room": self.chat_room
-                }
+                },
+                persist=not settings.CHAT_WRITE_BEHIND
             )
-
-            if self.chat_room.is_answered:
-                self.chat_room.is_answered = False
-                await sync_to_async(self.chat_room.save, thread_sensitive=True)()
         except Exception as e:
             await self.send(json.dumps({"error": str(e)}))
 
-    async def multiplex_message(self, event):
-        # 그룹에서 전송된 메시지를 클라이언트에 그대로 전달
+    def other_side_groups(self):
+        """이 소켓의 이벤트를 받을 그룹 (채팅방 그룹, 고객이면 매니저 목록 화면용 basespace 그룹도 포함)"""
+        groups = [self.chat_group_name]
+        if self.user_role not in ["ADMIN", "MANAGER"]:
+            groups.append(self.room_manager_group_name)
+        return groups
+
+    async def update_presence(self, online, announce=False):
+        """
+        Redis에 접속 상태를 기록합니다. (PostgreSQL 사용 안 함)
+        announce=True이면 접속/종료를 상대방에게 알리고, 하트비트는 만료 시각만 연장합니다.
+        """
+        if not settings.CHAT_PRESENCE_ENABLED:
+            return
+        args = (self.chat_room.id, self.chat_room.basespace_id, self.user.id, self.channel_name)
+        try:
+            if online:
+                await mark_online(*args)
+            else:
+                await mark_offline(*args)
+        except RedisError:
+            logger.warning("접속 상태 갱신 실패 (chat_room=%s, user=%s)", self.chat_room.id, self.user.id, exc_info=True)
+            return
+        self.user_online = online
+        if announce:
+            event = {
+                "type": "presence",
+                "event_id": uuid.uuid4().hex,
+                "chat_room": self.chat_room.id,
+                "user": self.user.username,
+                "user_id": self.user.id,
+                "role": self.user_role,
+                "online": online,
+            }
+            for group in self.other_side_groups():
+                await self.channel_layer.group_send(group, event)
+
+    async def handle_typing(self, data):
+        """입력 중 상태를 채팅방 상대방에게 전달합니다. (DB 저장 없음, 상태가 바뀌거나 일정 시간이 지난 경우만 전달)"""
+        if not hasattr(self, "chat_room"):
+            return
+        is_typing = bool(data.get("is_typing", True))
+        now = time.monotonic()
+        if is_typing == self.last_typing_state and now - self.last_typing_sent < self.TYPING_RELAY_INTERVAL:
+            return
+        self.last_typing_state = is_typing
+        self.last_typing_sent = now
+        event = {
+            "type": "typing_indicator",
+            "event_id": uuid.uuid4().hex,
+            "chat_room": self.chat_room.id,
+            "user": self.user.username,
+            "role": self.user_role,
+            "is_typing": is_typing,
+        }
+        for group in self.other_side_groups():
+            await self.channel_layer.group_send(group, event)
+
+    async def presence(self, event):
+        """ 상대방의 접속/종료를 전달하는 함수 """
+        await self.relay_event(event)
+
+    async def typing_indicator(self, event):
+        """ 상대방의 입력 중 상태를 전달하는 함수 """
+        await self.relay_event(event)
+
+    async def relay_event(self, event):
+        # 본인 이벤트는 제외하고, 두 그룹에 모두 가입한 소켓은 한 번만 수신
+        if event["user"] == self.user.username or self.is_duplicate(event["event_id"]):
+            return
+        payload = {key: value for key, value in event.items() if key != "event_id"}
+        await self.send(text_data=json.dumps(payload, ensure_ascii=False))
+
+    async def handle_read(self, data):
+        """
+        클라이언트가 마지막으로 본 메시지 순번을 받아 읽음 처리합니다.
+        DB 저장은 ReadReceiptBuffer에서 참여자별로 합쳐 주기적으로 처리하고, 읽음 표시는 바로 상대방에게 전달합니다.
+        """
+        if not hasattr(self, "chat_room"):
+            await self.send(json.dumps({"error": "채팅방에 연결되어 있지 않습니다."}, ensure_ascii=False))
+            return
+        try:
+            seq = int(data.get("seq"))
+        except (TypeError, ValueError):
+            seq = None
+        # 음수나 DB 범위를 넘는 값은 거부 (채팅방 메시지 순번을 넘는 값은 저장 시 message_seq로 제한)
+        if seq is None or seq < 0 or seq > MAX_READ_SEQ:
+            await self.send(json.dumps({"error": "잘못된 seq 값입니다."}, ensure_ascii=False))
+            return
+        # 이 소켓에서 이미 알린 순번 이하이면 무시 (스크롤 중 연속 전송되는 read 프레임 병합)
+        if seq <= self.last_read_seq:
+            return
+        self.last_read_seq = seq
+        get_read_receipt_buffer().add(self.chat_room.id, self.user.id, seq)
+
+        event = {
+            "type": "read_marker",
+            "chat_room": self.chat_room.id,
+            "user": self.user.username,
+            "role": self.user_role,
+            "seq": seq,
+        }
+        # 채팅방을 보고 있는 상대방에게 전달하고, 고객이 읽은 경우 매니저 목록 화면에도 전달
+        for group in self.other_side_groups():
+            await self.channel_layer.group_send(group, event)
+
+    async def read_marker(self, event):
+        """ 상대방의 읽음 표시를 전달하는 함수 (두 그룹에 모두 가입한 소켓은 한 번만 수신) """
+        if event["user"] == self.user.username:
+            return
+        if self.is_duplicate(f"read:{event['chat_room']}:{event['user']}:{event['seq']}"):
+            return
         await self.send(text_data=json.dumps(event, ensure_ascii=False))
 
+    async def send_missed_messages(self, since_seq):
+        """
+        since_seq 이후 메시지를 최대 한 페이지 전송합니다.
+        has_more가 true이면 클라이언트는 REST(since_seq=last_seq)로 나머지를 조회합니다.
+        """
+        try:
+            since_seq = get_since_seq({"since_seq": since_seq})
+        except NotFound as e:
+            await self.send(json.dumps({"error": str(e.detail)}, ensure_ascii=False))
+            return
+        page, messages = await db_sync_to_async(self.load_missed_messages)(since_seq)
+        await self.send(text_data=json.dumps({
+            "type": "missed_messages",
+            "chat_room": self.chat_room.id,
+            "messages": messages,
+            "last_seq": page.last_seq,
+            "has_more": page.next_cursor is not None,
+        }, ensure_ascii=False, default=str))
+
+    def load_missed_messages(self, since_seq):
+        page = paginate_messages(
+            Message.objects.filter(room=self.chat_room).select_related('sender'),
+            since_seq=since_seq,
+            page_size=MAX_PAGE_SIZE,
+        )
+        return page, MessageSerializer(page.messages, many=True).data
+
+    def get_user_role(self):
+        profile = getattr(self.user, "profile", None)
+        return profile.role if profile else None
+
+    def load_chat_context(self):
+        """
+        채팅방, basespace, 고객 및 고객 프로필을 하나의 조인 쿼리로 불러와 소켓에 보관합니다.
+        고객 언어 변경이나 체크아웃 시 chat_context_changed 이벤트로 다시 불러옵니다.
+        """
+        self.chat_room = ChatRoom.objects.select_related(
+            'basespace', 'checkin__user__profile'
+        ).get(id=self.room_id)
+        self.customer = self.chat_room.checkin.user
+        customer_profile = getattr(self.customer, "profile", None)
+        self.customer_lang = ((customer_profile.language if customer_profile else None) or "KO").upper()
+        self.basespace_name = self.chat_room.basespace.name
+        self.room_manager_group_name = f"manager_{self.chat_room.basespace_id}"
+
+    async def chat_context_changed(self, event):
+        """ 고객 언어 변경, 체크아웃 등으로 캐시된 채팅방 컨텍스트를 갱신하는 함수 """
+        if hasattr(self, "room_id"):
+            await db_sync_to_async(self.load_chat_context)()
+
+    async def unread_rooms_changed(self, event):
+        """ 새 메시지가 저장되면 매니저/관리자에게 읽지 않은 채팅방 수를 전달하는 함수 (보낸 쪽에서 계산한 값 사용) """
+        if self.user_role not in ["ADMIN", "MANAGER"]:
+            return
+        count = event.get("counts", {}).get(str(self.user.id))
+        if count is None:
+            return
+        await self.send(text_data=json.dumps({
+            "type": "unread_chat_rooms_count",
+            "unread_chat_rooms_count": count,
+        }))
+
+    def is_duplicate(self, key):
+        """최근에 이미 전달한 이벤트인지 확인하고, 처음이면 기억해 둡니다. (소켓당 최근 RECENT_MESSAGE_LIMIT개)"""
+        if key in self.recent_message_uuid_set:
+            return True
+        if len(self.recent_message_uuids) == self.recent_message_uuids.maxlen:
+            self.recent_message_uuid_set.discard(self.recent_message_uuids[0])
+        self.recent_message_uuids.append(key)
+        self.recent_message_uuid_set.add(key)
+        return False
+
+    async def multiplex_message(self, event):
+        # 채팅방 그룹과 매니저 그룹에 모두 가입한 소켓은 같은 메시지를 두 번 받으므로 한 번만 전달
+        message_uuid = event.get("message_uuid")
+        if message_uuid and self.is_duplicate(message_uuid):
+            return
+        # 그룹에서 전송된 메시지를 클라이언트에 그대로 전달 (미리 직렬화된 경우 그대로 사용)
+        text = event.get("text")
+        await self.send(text_data=text if text is not None else json.dumps(event, ensure_ascii=False))
+
     async def manager_notification(self, event):
         """ 매니저에게 알림을 전달하는 함수 """
         await self.send(text_data=json.dumps(event, ensure_ascii=False))
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import connections
+
+# 풀 크기별 전용 스레드 풀 (프로세스당 한 번 생성)
+_executors = {}
+
+
+def _use_persistent_connections():
+    """
+    전용 스레드의 DB 연결에만 CHAT_DB_CONN_MAX_AGE를 적용합니다.
+    연결 객체는 스레드마다 따로 생성되므로 설정 사본을 바꿔도 다른 스레드(HTTP 요청 등)에는 영향이 없습니다.
+    """
+    for conn in connections.all():
+        conn.settings_dict = {**conn.settings_dict, "CONN_MAX_AGE": settings.CHAT_DB_CONN_MAX_AGE}
+
+
+def get_db_executor():
+    pool_size = settings.CHAT_DB_POOL_SIZE
+    if pool_size not in _executors:
+        _executors[pool_size] = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="chat-db", initializer=_use_persistent_connections
+        )
+    return _executors[pool_size]
+
+
+def db_sync_to_async(func):
+    """
+    웹소켓 경로의 ORM 호출을 비동기로 감쌉니다.
+
+    기본 sync_to_async(thread_sensitive=True)는 프로세스의 모든 소켓 DB 작업을 한 스레드에서
+    순차 실행하므로, 크기가 제한된 전용 스레드 풀에서 실행합니다. 각 스레드는 자신의 DB 연결을
+    CHAT_DB_CONN_MAX_AGE 동안 재사용하며 database_sync_to_async가 호출 전후로 오래된 연결을 정리합니다.
+    """
+    if settings.CHAT_DB_POOL_SIZE > 0:
+        return database_sync_to_async(func, thread_sensitive=False, executor=get_db_executor())
+    return database_sync_to_async(func)
+
+
+def close_db_executor_connections():
+    """전용 스레드 풀의 모든 스레드에서 유지 중인 DB 연결을 닫습니다. (테스트 DB 삭제 전 등)"""
+    for pool_size, executor in _executors.items():
+        # 배리어로 작업이 서로 다른 스레드에 하나씩 배정되도록 보장
+        barrier = threading.Barrier(pool_size)
+
+        def close():
+            connections.close_all()
+            barrier.wait()
+
+        wait([executor.submit(close) for _ in range(pool_size)])
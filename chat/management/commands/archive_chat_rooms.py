@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from chat.archive import archive_chat_room
+from chat.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = "체크아웃 후 일정 기간이 지난 비활성 채팅방의 메시지를 오브젝트 스토리지로 보관하고 DB에서 삭제합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="체크아웃 후 보관까지의 기간 (일)")
+        parser.add_argument("--limit", type=int, default=None, help="한 번에 처리할 최대 채팅방 수")
+        parser.add_argument("--dry-run", action="store_true", help="대상 채팅방 수만 출력합니다.")
+
+    def handle(self, *args, **options):
+        rooms = ChatRoom.objects.filter(
+            is_active=False,
+            archived_at__isnull=True,
+            checkin__check_out_date__lt=now().date() - timedelta(days=options["days"]),
+        ).order_by('id')
+        if options["limit"]:
+            rooms = rooms[:options["limit"]]
+
+        if options["dry_run"]:
+            self.stdout.write(f"보관 대상 채팅방 {rooms.count()}개")
+            return
+
+        archived_rooms = 0
+        archived_messages = 0
+        for chat_room in list(rooms):
+            archived_messages += archive_chat_room(chat_room)
+            archived_rooms += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"채팅방 {archived_rooms}개, 메시지 {archived_messages}건을 보관했습니다."
+        ))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from chat.models import ChatRoom, ChatRoomParticipant, Message
+
+
+class Command(BaseCommand):
+    help = "기존 채팅방의 마지막 메시지, 메시지 순번, 메시지별 채팅방 내 순번, 참여자별 마지막으로 읽은 순번을 채웁니다."
+
+    def handle(self, *args, **options):
+        rooms = numbered = skipped = 0
+        room_ids = list(
+            Message.objects.filter(seq__isnull=True).order_by('room_id').values_list('room_id', flat=True).distinct()
+        )
+        # 채팅방마다 별도 트랜잭션으로 처리 (잠금은 처리 중인 채팅방 하나에만 걸림)
+        for room_id in room_ids:
+            count = self.backfill_room(room_id)
+            if count is None:
+                skipped += 1
+                continue
+            rooms += 1
+            numbered += count
+        self.stdout.write(self.style.SUCCESS(f"채팅방 {rooms}개의 메시지 {numbered}건에 순번을 매겼습니다."))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"이미 발급된 순번 아래에 자리가 없어 채팅방 {skipped}개의 이전 메시지는 순번 없이 두었습니다. "
+                "(발급된 순번보다 이전 메시지이므로 since_seq 재전송 대상이 아니며, 내역 조회에는 영향이 없습니다)"
+            ))
+
+    @transaction.atomic
+    def backfill_room(self, room_id):
+        """
+        순번이 없는(순번 도입 이전) 메시지에만 (created_at, id) 순서로 순번을 매깁니다.
+        이미 클라이언트에 발급된 순번(since_seq, last_read_seq 기준)은 바꾸지 않으므로,
+        이전 메시지는 발급된 가장 작은 순번 아래에 자리가 있을 때만 그 아래 순번을 받습니다.
+        순번이 발급된 적 없는 채팅방은 1부터 매기고 채팅방/참여자 카운터도 함께 채웁니다.
+        순번을 매긴 메시지 수를 반환하고, 자리가 없어 건너뛴 경우 None을 반환합니다.
+        """
+        # append_message와 같은 잠금을 사용해 처리 중에 새 메시지 순번이 발급되지 않도록 함
+        room = ChatRoom.objects.select_for_update().get(pk=room_id)
+        legacy = list(Message.objects.filter(room=room, seq__isnull=True).order_by('created_at', 'id').only('id'))
+        if not legacy:
+            return 0
+        if room.message_seq == 0:
+            start = 1
+        else:
+            first_seq = Message.objects.filter(room=room, seq__isnull=False).aggregate(first=Min('seq'))['first']
+            first_seq = first_seq or room.message_seq + 1
+            if first_seq <= len(legacy):
+                return None
+            start = first_seq - len(legacy)
+
+        for offset, message in enumerate(legacy):
+            message.seq = start + offset
+        Message.objects.bulk_update(legacy, ['seq'], batch_size=1000)
+
+        if room.message_seq == 0:
+            # 읽은 시각 이전 메시지 수 = 마지막으로 읽은 순번 (순번을 1부터 매긴 경우에만 성립)
+            ChatRoomParticipant.objects.filter(chatroom=room, last_read_time__isnull=False).update(
+                last_read_seq=Coalesce(Subquery(
+                    Message.objects.filter(room=room, created_at__lte=OuterRef('last_read_time'))
+                    .order_by().values('room').annotate(c=Count('id')).values('c')
+                ), 0)
+            )
+            ChatRoom.objects.filter(pk=room.pk).update(last_message=legacy[-1], message_seq=legacy[-1].seq)
+        return len(legacy)
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import math
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import UserProfile
+from bookings.models import CheckIn, Reservation
+from chat.db import close_db_executor_connections
+from chat.middleware import TokenAuthMiddleware
+from chat.models import ChatRoom, Message
+from chat.routing import websocket_urlpatterns as chat_urlpatterns
+from chat.write_behind import get_message_buffer
+from notifications.routing import websocket_urlpatterns as notification_urlpatterns
+from spaces.models import BaseSpace, HotelRoom, HotelRoomType
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class QueryCounter:
+    """
+    모든 DB 연결(전용 스레드 풀의 연결 포함)에서 실행된 쿼리 수를 셉니다.
+    새로 생성되는 연결에는 connection_created 시그널로 execute_wrapper를 등록합니다.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.enabled = False
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.enabled:
+            with self.lock:
+                self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+    help = (
+        "테스트 DB에서 K개 호텔의 고객 N명과 매니저 M명을 웹소켓(채팅 + 알림)으로 접속시켜 메시지를 전송하고, "
+        "전달 지연(p50/p95/p99), 메시지당 DB 쿼리 수, 연결당 메모리를 측정합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--guests", type=int, default=500, help="고객 수 (고객마다 채팅/알림 소켓 2개)")
+        parser.add_argument("--managers", type=int, default=10, help="매니저 수 (호텔별 매니저 소켓)")
+        parser.add_argument("--hotels", type=int, default=5, help="호텔(basespace) 수")
+        parser.add_argument("--messages", type=int, default=10, help="고객당 전송 메시지 수")
+        parser.add_argument(
+            "--rate", type=float, default=0,
+            help="고객당 초당 전송 메시지 수 (0이면 자신의 메시지가 돌아올 때마다 바로 다음 메시지 전송)"
+        )
+        parser.add_argument(
+            "--channel-layer", choices=["memory", "redis"], default="memory",
+            help="memory: InMemoryChannelLayer, redis: 설정의 CHANNEL_LAYERS 사용 (로컬 Redis 필요)"
+        )
+        parser.add_argument(
+            "--pool-size", type=int, default=None,
+            help="CHAT_DB_POOL_SIZE 값 (0이면 thread_sensitive 단일 스레드, 기본값은 설정값)"
+        )
+        parser.add_argument(
+            "--write-behind", action="store_true",
+            help="지연 쓰기(CHAT_WRITE_BEHIND) 모드로 측정합니다. (Redis 필요)"
+        )
+        parser.add_argument("--keepdb", action="store_true", help="테스트 DB를 보존합니다.")
+
+    def handle(self, *args, **options):
+        overrides = {"CHAT_WRITE_BEHIND": options["write_behind"]}
+        if options["channel_layer"] == "memory":
+            overrides["CHANNEL_LAYERS"] = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+            # Redis 없이 실행할 수 있도록 접속 상태 기록도 끔
+            overrides["CHAT_PRESENCE_ENABLED"] = False
+        if options["pool_size"] is not None:
+            overrides["CHAT_DB_POOL_SIZE"] = options["pool_size"]
+
+        counter = QueryCounter()
+        connection_created.connect(counter.install)
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options["keepdb"])
+        try:
+            for connection in connections.all():
+                counter.install(connection)
+            with override_settings(**overrides):
+                fixtures = self.create_fixtures(options["guests"], options["managers"], options["hotels"])
+                result = asyncio.run(self.run_benchmark(fixtures, options, counter))
+                result["saved"] = Message.objects.count()
+        finally:
+            connection_created.disconnect(counter.install)
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+
+        self.report(options, result)
+
+    def create_fixtures(self, guest_count, manager_count, hotel_count):
+        """
+        호텔별 고객/체크인/채팅방과 매니저를 생성합니다.
+        고객은 [(토큰, 채팅방 ID, 호텔 번호)], 매니저는 [(토큰, basespace ID, 호텔 번호)] 목록으로 반환합니다.
+        """
+        hotels = []
+        for h in range(hotel_count):
+            basespace = BaseSpace.objects.create(
+                name=f"Benchmark Hotel {h}", location=Point(0, 0), address="-", phone="-", introduction="-"
+            )
+            hotels.append((basespace, HotelRoomType.objects.create(basespace=basespace, name="Standard")))
+
+        # 비밀번호 해싱 비용을 피하기 위해 사용 불가 비밀번호로 일괄 생성
+        users = User.objects.bulk_create([
+            User(username=f"bench-guest-{i}", email=f"bench-guest-{i}@example.com", password="!")
+            for i in range(guest_count)
+        ] + [
+            User(username=f"bench-manager-{i}", email=f"bench-manager-{i}@example.com", password="!")
+            for i in range(manager_count)
+        ])
+        guests, managers = users[:guest_count], users[guest_count:]
+        # 고객 언어를 KO로 두어 번역 API 호출 없이 DB/채널 경로만 측정
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=user, role="GENERAL", language="KO") for user in guests]
+            + [UserProfile(user=user, role="MANAGER", language="KO") for user in managers]
+        )
+        for i, manager in enumerate(managers):
+            hotels[i % hotel_count][0].managers.add(manager)
+
+        guest_hotels = [i % hotel_count for i in range(guest_count)]
+        rooms = HotelRoom.objects.bulk_create([
+            HotelRoom(room_type=hotels[h][1], room_number=str(i)) for i, h in enumerate(guest_hotels)
+        ])
+        reservations = Reservation.objects.bulk_create([
+            Reservation(user=user, space=hotels[h][1], start_date=date.today(),
+                        end_date=date.today() + timedelta(days=1), people=1)
+            for user, h in zip(guests, guest_hotels)
+        ])
+        checkins = CheckIn.objects.bulk_create([
+            CheckIn(user=user, hotel_room=room, reservation=reservation, check_in_date=date.today(),
+                    check_out_date=date.today() + timedelta(days=1), temp_code=f"{i:06d}")
+            for i, (user, room, reservation) in enumerate(zip(guests, rooms, reservations))
+        ])
+        chat_rooms = ChatRoom.objects.bulk_create([
+            ChatRoom(basespace=hotels[h][0], checkin=checkin) for checkin, h in zip(checkins, guest_hotels)
+        ])
+        return {
+            "guests": [
+                (str(AccessToken.for_user(user)), chat_room.id, h)
+                for user, chat_room, h in zip(guests, chat_rooms, guest_hotels)
+            ],
+            "managers": [
+                (str(AccessToken.for_user(user)), hotels[i % hotel_count][0].id, i % hotel_count)
+                for i, user in enumerate(managers)
+            ],
+        }
+
+    async def run_benchmark(self, fixtures, options, counter):
+        application = TokenAuthMiddleware(URLRouter(chat_urlpatterns + notification_urlpatterns))
+        messages_per_guest = options["messages"]
+        sent_at = {}
+        latencies = {"echo": [], "manager": [], "notification": []}
+
+        # 연결 단계의 메모리 증가량으로 연결당 메모리를 계산 (측정 오버헤드가 크므로 연결 단계에서만 추적)
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        guests = [
+            (
+                WebsocketCommunicator(application, f"/ws/multiplex/?token={token}&room_id={room_id}"),
+                WebsocketCommunicator(application, f"/ws/notifications/?token={token}"),
+                h,
+            )
+            for token, room_id, h in fixtures["guests"]
+        ]
+        managers = [
+            (WebsocketCommunicator(application, f"/ws/multiplex/?token={token}&basespace_id={basespace_id}"), h)
+            for token, basespace_id, h in fixtures["managers"]
+        ]
+        chat_sockets = [chat for chat, _, _ in guests] + [manager for manager, _ in managers]
+        notification_sockets = [notification for _, notification, _ in guests]
+        for connected, _ in await asyncio.gather(
+            *(c.connect(timeout=60) for c in chat_sockets + notification_sockets)
+        ):
+            if not connected:
+                raise RuntimeError("웹소켓 연결에 실패했습니다.")
+        # 멀티플렉스 소켓의 연결 성공 메시지 소비
+        await asyncio.gather(*(c.receive_from(timeout=60) for c in chat_sockets))
+        connection_count = len(chat_sockets) + len(notification_sockets)
+        memory_per_connection = (tracemalloc.get_traced_memory()[0] - memory_before) / connection_count
+        tracemalloc.stop()
+
+        hotel_guest_counts = {}
+        for _, _, h in guests:
+            hotel_guest_counts[h] = hotel_guest_counts.get(h, 0) + 1
+
+        async def receive(communicator, kind, expected, match, on_message=None):
+            """expected개의 채팅 메시지(또는 알림)를 받을 때까지 수신하며 전달 지연을 기록"""
+            received = 0
+            while received < expected:
+                data = json.loads(await communicator.receive_from(timeout=120))
+                key = match(data, received)
+                if key not in sent_at:
+                    continue  # 읽지 않은 채팅방 수, 접속 상태 등 다른 이벤트
+                latencies[kind].append(time.perf_counter() - sent_at[key])
+                received += 1
+                if on_message:
+                    on_message()
+
+        def match_content(data, received):
+            return data.get("content")
+
+        async def guest(index, chat, notification):
+            echoed = asyncio.Event()
+            keys = [f"bench {index} {i}" for i in range(messages_per_guest)]
+
+            def on_echo():
+                echoed.set()
+
+            def match_notification(data, received):
+                # 알림 본문은 번역문(KO 고객은 None)이므로 고객 본인 메시지의 전송 순서로 대응
+                return keys[received]
+
+            receivers = asyncio.gather(
+                receive(chat, "echo", messages_per_guest, match_content, on_echo),
+                receive(notification, "notification", messages_per_guest, match_notification),
+            )
+            for key in keys:
+                echoed.clear()
+                sent_at[key] = time.perf_counter()
+                await chat.send_to(text_data=json.dumps({"target": "chat", "content": key}))
+                if options["rate"]:
+                    await asyncio.sleep(1 / options["rate"])
+                else:
+                    # 자신의 메시지가 돌아올 때까지 대기 (closed loop)
+                    await echoed.wait()
+            await receivers
+
+        counter.count = 0
+        counter.enabled = True
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(guest(i, chat, notification) for i, (chat, notification, _) in enumerate(guests)),
+            *(receive(manager, "manager", hotel_guest_counts.get(h, 0) * messages_per_guest, match_content)
+              for manager, h in managers),
+        )
+        elapsed = time.perf_counter() - started
+        if settings.CHAT_WRITE_BEHIND:
+            await get_message_buffer().flush()
+        durable_elapsed = time.perf_counter() - started
+        counter.enabled = False
+
+        await asyncio.gather(*(c.disconnect() for c in chat_sockets + notification_sockets))
+        # 테스트 DB를 삭제할 수 있도록 작업 스레드들의 DB 연결을 정리
+        await database_sync_to_async(connections.close_all)()
+        close_db_executor_connections()
+        return {
+            "elapsed": elapsed,
+            "durable_elapsed": durable_elapsed,
+            "queries": counter.count,
+            "connections": connection_count,
+            "memory_per_connection": memory_per_connection,
+            "latencies": {kind: sorted(values) for kind, values in latencies.items()},
+        }
+
+    def report(self, options, result):
+        total = options["guests"] * options["messages"]
+        pool_size = options["pool_size"] if options["pool_size"] is not None else settings.CHAT_DB_POOL_SIZE
+        self.stdout.write(self.style.SUCCESS(
+            f"guests={options['guests']} managers={options['managers']} hotels={options['hotels']} "
+            f"messages={total} rate={options['rate'] or 'closed-loop'} channel_layer={options['channel_layer']} "
+            f"pool_size={pool_size} write_behind={options['write_behind']}"
+        ))
+        self.stdout.write(
+            f"elapsed={result['elapsed']:.2f}s throughput={total / result['elapsed']:.1f} msg/s "
+            f"durable_elapsed={result['durable_elapsed']:.2f}s saved={result['saved']}"
+        )
+        self.stdout.write(
+            f"queries={result['queries']} queries_per_message={result['queries'] / total:.2f} "
+            f"connections={result['connections']} memory_per_connection={result['memory_per_connection'] / 1024:.1f} KiB"
+        )
+        for kind, values in result["latencies"].items():
+            self.stdout.write(
+                f"latency[{kind}] n={len(values)} "
+                + " ".join(f"p{p}={percentile(values, p) * 1000:.1f}ms" for p in (50, 95, 99))
+            )
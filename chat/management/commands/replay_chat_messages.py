@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import DataError, IntegrityError
+
+from chat.write_behind import DEAD_LETTER_KEY, PENDING_KEY_PREFIX, persist_buffered_messages
+from hotel_admin.redis_client import get_redis
+
+
+class Command(BaseCommand):
+    help = "지연 쓰기(write-behind) 중 DB에 저장되지 못하고 Redis에 남은 채팅 메시지를 다시 저장합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="한 번에 저장할 메시지 수")
+
+    def handle(self, *args, **options):
+        client = get_redis()
+        total = 0
+        for key in client.scan_iter(match=f"{PENDING_KEY_PREFIX}*"):
+            # 대기열에 들어간 순서대로 저장 (이미 저장된 uuid는 건너뛰고, created_at은 원래 전송 시각 queued_at으로 저장)
+            rows = sorted(
+                (json.loads(value) for value in client.hvals(key)),
+                key=lambda row: row["queued_at"],
+            )
+            for start in range(0, len(rows), options["batch_size"]):
+                batch = rows[start:start + options["batch_size"]]
+                try:
+                    total += persist_buffered_messages(batch)
+                except (IntegrityError, DataError):
+                    # 저장할 수 없는 메시지가 섞여 있으면 한 건씩 저장하고 실패한 메시지는 데드레터로 이동
+                    for row in batch:
+                        try:
+                            total += persist_buffered_messages([row])
+                        except (IntegrityError, DataError) as e:
+                            client.hset(DEAD_LETTER_KEY, row["uuid"], json.dumps({**row, "error": str(e)}))
+                            self.stderr.write(f"저장 실패 (uuid={row['uuid']}): {e}")
+                client.hdel(key, *[row["uuid"] for row in batch])
+        self.stdout.write(self.style.SUCCESS(f"메시지 {total}건을 다시 저장했습니다."))
@@ -3,9 +3,12 @@ from channels.middleware import BaseMiddleware
 from rest_framework_simplejwt.tokens import AccessToken
 import logging
 from django.contrib.auth import get_user_model
-from asgiref.sync import sync_to_async
 from urllib.parse import parse_qs
 
+from accounts.principal import get_principal
+from accounts.tokens import principal_token_version
+from .db import db_sync_to_async
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
@@ -31,7 +34,12 @@ class TokenAuthMiddleware(BaseMiddleware):
                 user_id = access_token.get("user_id")
                 if not user_id:
                     raise Exception("Token payload에 user_id가 없습니다.")
-                user = await sync_to_async(User.objects.get)(id=user_id)
+                # 캐시된 인증 주체 사용 (캐시 적중 시 DB 조회 없음)
+                token_version = access_token.get("ver", 0)
+                user = await db_sync_to_async(get_principal)(user_id, token_version)
+                if token_version != principal_token_version(user):
+                    raise Exception("권한 변경 이전에 발급된 토큰입니다.")
+                scope["token_claims"] = access_token.payload
                 scope["user"] = user
                 logger.info(f"User authenticated: {user}")
             except Exception as e:
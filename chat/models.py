@@ -1,4 +1,10 @@
-from django.db import models
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.utils import timezone
 from django.contrib.auth.models import User
 from spaces.models import BaseSpace
 from bookings.models import CheckIn
@@ -10,27 +16,125 @@ class ChatRoom(models.Model):
     is_active = models.BooleanField(default=True, verbose_name="채팅방 활성화 여부")  # 체크아웃 시 False
     is_answered = models.BooleanField(default=True, verbose_name="답변 완료 여부")
     created_at = models.DateTimeField(auto_now_add=True)
+    # 매니저 채팅 목록용 비정규화 필드 (메시지 저장 시 append_message에서 함께 갱신)
+    last_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="마지막 메시지"
+    )
+    message_seq = models.PositiveBigIntegerField(default=0, verbose_name="메시지 순번")
+    # 보관 처리된 채팅방의 메시지 파일(gzip JSONL) 위치. 보관 후 Message 행은 삭제됩니다.
+    archive_key = models.CharField(max_length=255, null=True, blank=True, verbose_name="보관 파일 키")
+    archived_at = models.DateTimeField(null=True, blank=True, verbose_name="보관 일시")
 
     def __str__(self):
         return f"Chat Room - {self.checkin.user.username} ({self.basespace.name})"
 
+    def append_message(self, **fields):
+        """
+        메시지를 저장하고 마지막 메시지, 메시지 순번, 답변 여부를 한 번에 갱신합니다.
+        채팅방 행을 잠가 동시에 들어온 메시지끼리 순번과 마지막 메시지가 어긋나지 않도록 합니다.
+        """
+        fields.setdefault('uuid', uuid.uuid4())
+        with transaction.atomic():
+            message_seq = ChatRoom.objects.select_for_update().values_list('message_seq', flat=True).get(pk=self.pk) + 1
+            message = Message.objects.create(room=self, seq=message_seq, **fields)
+            ChatRoom.objects.filter(pk=self.pk).update(
+                last_message=message, message_seq=message_seq, is_answered=False
+            )
+            # 본인이 보낸 메시지는 읽은 것으로 처리
+            ChatRoomParticipant.objects.filter(chatroom=self, user=fields.get('sender')).update(
+                last_read_seq=message_seq, last_read_time=timezone.now()
+            )
+        self.last_message = message
+        self.message_seq = message_seq
+        self.is_answered = False
+        return message
+
+    class Meta:
+        indexes = [
+            # 매니저 채팅 목록 (담당 basespace의 활성 채팅방) 조회용
+            models.Index(fields=['basespace', 'is_active'], name='chat_room_basespace_active_idx'),
+        ]
+
 class ChatRoomParticipant(models.Model):
     chatroom = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='participants')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chatroom_participations')
     last_read_time = models.DateTimeField(null=True, blank=True)
+    # 마지막으로 읽은 메시지 순번 (ChatRoom.message_seq와 비교해 읽지 않은 메시지 수를 계산)
+    last_read_seq = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return f"{self.chatroom} - {self.user.username}"
 
+    def mark_as_read(self, message_seq):
+        """지정한 순번까지 읽음 처리"""
+        self.last_read_seq = message_seq
+        self.last_read_time = timezone.now()
+        self.save(update_fields=['last_read_seq', 'last_read_time'])
+
+    @staticmethod
+    def unread_room_count(user):
+        """읽지 않은 메시지가 있는 활성 채팅방 수 (Message 테이블을 조회하지 않음)"""
+        return ChatRoomParticipant.objects.filter(
+            user=user, chatroom__is_active=True, chatroom__message_seq__gt=F('last_read_seq')
+        ).count()
+
+    @staticmethod
+    def unread_room_counts_after_message(chat_room, sender_id):
+        """
+        새 메시지가 추가된 채팅방의 다른 참여자별 읽지 않은 채팅방 수 {user_id: count}
+        참여자 목록 조회 1회 + GROUP BY 쿼리 1회로 계산해 매니저 소켓마다 COUNT 쿼리를 실행하지 않도록 합니다.
+        새 메시지가 아직 저장 전(지연 쓰기)이어도 이 채팅방은 읽지 않은 것으로 계산합니다.
+        """
+        user_ids = list(ChatRoomParticipant.objects.filter(chatroom=chat_room).exclude(
+            user_id=sender_id
+        ).values_list('user_id', flat=True))
+        if not user_ids:
+            return {}
+        other_rooms = dict(ChatRoomParticipant.objects.filter(
+            user_id__in=user_ids, chatroom__is_active=True, chatroom__message_seq__gt=F('last_read_seq')
+        ).exclude(chatroom=chat_room).values('user_id').annotate(count=Count('id')).values_list('user_id', 'count'))
+        this_room = 1 if chat_room.is_active else 0
+        return {user_id: other_rooms.get(user_id, 0) + this_room for user_id in user_ids}
+
 class Message(models.Model):
+    # 지연 쓰기 재처리 시 중복 저장을 막기 위한 메시지 고유 ID (기존 메시지는 NULL)
+    uuid = models.UUIDField(unique=True, null=True, blank=True, editable=False)
     room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name="messages")
+    # 채팅방 내 메시지 순번 (ChatRoom.message_seq에서 발급, 재접속 시 since_seq 이후 메시지만 조회)
+    seq = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="채팅방 내 순번")
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField(blank=True, null=True)
     translated_content = models.TextField(blank=True, null=True)
     file_url = models.URLField(blank=True, null=True)
+    # 첨부파일의 스토리지 키 (해시 기반 파일의 참조 수 관리 및 중복 파일 재사용 범위 확인용)
+    file_key = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     file_name = models.CharField(max_length=255, blank=True, null=True)
     file_type = models.CharField(max_length=50, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # 지연 쓰기/재처리 시 클라이언트에 전송된 시각을 그대로 저장할 수 있도록 auto_now_add 대신 기본값 사용
+    created_at = models.DateTimeField(default=timezone.now)
+    # 검색용 tsvector (원문 + 번역문). 저장/수정 시 DB에서 자동 계산
+    # 한국어는 형태소 분석 없이 공백 단위로 토큰화되므로 'simple' 설정을 사용하고, 부분 일치는 트라이그램 인덱스로 보완
+    search_vector = models.GeneratedField(
+        expression=SearchVector('content', 'translated_content', config='simple'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # 채팅 내역 커서 페이지네이션 (room, created_at, id) 순서 조회용
+            models.Index(fields=['room', 'created_at', 'id'], name='chat_message_room_cursor_idx'),
+            # 메시지 검색용 (전문 검색 + 트라이그램 부분 일치)
+            GinIndex(fields=['search_vector'], name='chat_message_search_idx'),
+            GinIndex(fields=['content'], opclasses=['gin_trgm_ops'], name='chat_message_content_trgm_idx'),
+            GinIndex(
+                fields=['translated_content'], opclasses=['gin_trgm_ops'], name='chat_message_translated_trgm_idx'
+            ),
+        ]
+        constraints = [
+            # (room, seq) 인덱스를 겸함 (since_seq 조회용)
+            models.UniqueConstraint(fields=['room', 'seq'], name='chat_message_room_seq_unique'),
+        ]
 
     def __str__(self):
         return f"[{self.room.basespace.name}] {self.sender.username}: {self.content}"
@@ -0,0 +1,121 @@
+import base64
+import binascii
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+MessagePage = namedtuple("MessagePage", ["messages", "previous_cursor", "next_cursor", "last_seq"])
+
+
+def encode_cursor(message):
+    """메시지의 (created_at, id)를 불투명한 커서 문자열로 변환"""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise NotFound("유효하지 않은 커서입니다.")
+
+
+def get_since_seq(params):
+    """재접속 클라이언트가 마지막으로 받은 메시지 순번 (없으면 None)"""
+    since_seq = params.get("since_seq")
+    if since_seq in (None, ""):
+        return None
+    try:
+        return max(0, int(since_seq))
+    except (TypeError, ValueError):
+        raise NotFound("유효하지 않은 since_seq입니다.")
+
+
+def get_page_size(params):
+    try:
+        page_size = int(params.get("page_size", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def paginate_messages(queryset, before=None, after=None, page_size=DEFAULT_PAGE_SIZE, since_seq=None):
+    """
+    (room, created_at, id) 인덱스를 따라 메시지를 한 페이지만 조회합니다.
+    - since_seq: 해당 순번 이후 놓친 메시지 ((room, seq) 인덱스 사용, 다음 페이지는 last_seq로 다시 요청)
+    - after: 커서 이후(더 최신) 메시지
+    - before: 커서 이전(더 오래된) 메시지
+    - 모두 없으면 가장 최근 메시지
+    반환되는 메시지는 항상 오래된 순으로 정렬됩니다.
+    """
+    if since_seq is not None:
+        rows = list(queryset.filter(seq__gt=since_seq).order_by("seq")[:page_size + 1])
+        has_newer = len(rows) > page_size
+        messages = rows[:page_size]
+        has_older = since_seq > 0
+    elif after:
+        created_at, pk = decode_cursor(after)
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by("created_at", "id")[:page_size + 1]
+        )
+        has_newer = len(rows) > page_size
+        messages = rows[:page_size]
+        has_older = True
+    else:
+        if before:
+            created_at, pk = decode_cursor(before)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        rows = list(queryset.order_by("-created_at", "-id")[:page_size + 1])
+        has_older = len(rows) > page_size
+        messages = rows[:page_size][::-1]
+        has_newer = bool(before)
+
+    return MessagePage(
+        messages=messages,
+        previous_cursor=encode_cursor(messages[0]) if messages and has_older else None,
+        next_cursor=encode_cursor(messages[-1]) if messages and has_newer else None,
+        last_seq=messages[-1].seq if messages else since_seq,
+    )
+
+
+class MessageCursorPagination(BasePagination):
+    """before/after 커서(또는 since_seq)와 page_size 쿼리 파라미터로 메시지 목록을 페이지 단위로 반환"""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.page = paginate_messages(
+            queryset,
+            before=params.get("before"),
+            after=params.get("after"),
+            page_size=get_page_size(params),
+            since_seq=get_since_seq(params),
+        )
+        return self.page.messages
+
+    def get_paginated_response(self, data):
+        return Response({
+            "previous_cursor": self.page.previous_cursor,
+            "next_cursor": self.page.next_cursor,
+            "last_seq": self.page.last_seq,
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "previous_cursor": {"type": "string", "nullable": True},
+                "next_cursor": {"type": "string", "nullable": True},
+                "last_seq": {"type": "integer", "nullable": True},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+
+from hotel_admin.redis_client import get_async_redis, get_redis
+
+# 접속 상태는 정렬 집합(zset)에 "만료 시각"을 점수로 저장합니다.
+# - presence:room:{room_id}       멤버 "{user_id}:{channel_name}"
+# - presence:basespace:{id}       멤버 "{room_id}:{user_id}:{channel_name}"
+# 소켓마다 멤버가 따로 있으므로 같은 사용자가 여러 기기로 접속해도 한쪽 종료 시 오프라인으로 바뀌지 않습니다.
+# 하트비트가 끊긴 소켓(비정상 종료)은 만료 시각이 지나 자동으로 제외됩니다.
+
+
+def room_key(room_id):
+    return f"presence:room:{room_id}"
+
+
+def basespace_key(basespace_id):
+    return f"presence:basespace:{basespace_id}"
+
+
+async def mark_online(room_id, basespace_id, user_id, channel_name):
+    """접속/하트비트 시 호출 (파이프라인으로 Redis 왕복 1회)"""
+    now = time.time()
+    expires_at = now + settings.CHAT_PRESENCE_TTL
+    async with get_async_redis().pipeline(transaction=False) as pipe:
+        for key, member in (
+            (room_key(room_id), f"{user_id}:{channel_name}"),
+            (basespace_key(basespace_id), f"{room_id}:{user_id}:{channel_name}"),
+        ):
+            pipe.zadd(key, {member: expires_at})
+            pipe.zremrangebyscore(key, "-inf", now)  # 만료된 소켓 정리
+            pipe.expire(key, settings.CHAT_PRESENCE_TTL)
+        await pipe.execute()
+
+
+async def mark_offline(room_id, basespace_id, user_id, channel_name):
+    async with get_async_redis().pipeline(transaction=False) as pipe:
+        pipe.zrem(room_key(room_id), f"{user_id}:{channel_name}")
+        pipe.zrem(basespace_key(basespace_id), f"{room_id}:{user_id}:{channel_name}")
+        await pipe.execute()
+
+
+def online_users_by_room(room_ids):
+    """채팅방별 접속 중인 사용자 ID 목록 {room_id: {user_id, ...}} (채팅방 수와 무관하게 Redis 왕복 1회)"""
+    now = time.time()
+    pipe = get_redis().pipeline(transaction=False)
+    for room_id in room_ids:
+        pipe.zrangebyscore(room_key(room_id), now, "+inf")
+    return {
+        room_id: {int(member.split(b":", 1)[0]) for member in members}
+        for room_id, members in zip(room_ids, pipe.execute())
+    }
+
+
+def online_users_by_basespace(basespace_id):
+    """basespace 전체에서 채팅방별 접속 중인 사용자 ID 목록 {room_id: {user_id, ...}} (Redis 조회 1회)"""
+    online = {}
+    for member in get_redis().zrangebyscore(basespace_key(basespace_id), time.time(), "+inf"):
+        room_id, user_id, _ = member.split(b":", 2)
+        online.setdefault(int(room_id), set()).add(int(user_id))
+    return online
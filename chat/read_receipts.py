@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import weakref
+
+from django.conf import settings
+from django.db import DataError
+from django.db.models import Case, F, OuterRef, Q, Subquery, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .db import db_sync_to_async
+from .models import ChatRoom, ChatRoomParticipant
+
+logger = logging.getLogger(__name__)
+
+# 클라이언트가 보낼 수 있는 최대 순번 (PositiveBigIntegerField 범위)
+MAX_READ_SEQ = 2 ** 63 - 1
+
+
+def persist_read_receipts(read_seqs):
+    """
+    {(chatroom_id, user_id): seq} 형태로 모아둔 읽음 순번을 한 번의 UPDATE로 저장합니다.
+    이미 더 큰 순번이 저장되어 있으면 줄어들지 않고, 채팅방의 메시지 순번(message_seq)보다 커지지 않습니다.
+    """
+    if not read_seqs:
+        return 0
+    # UPDATE에서는 조인 필드를 참조할 수 없으므로 채팅방 메시지 순번은 서브쿼리로 조회
+    room_seq = Subquery(ChatRoom.objects.filter(pk=OuterRef('chatroom_id')).values('message_seq')[:1])
+    matches = Q()
+    whens = []
+    for (chatroom_id, user_id), seq in read_seqs.items():
+        condition = Q(chatroom_id=chatroom_id, user_id=user_id)
+        matches |= condition
+        whens.append(When(condition, then=Least(Greatest(F('last_read_seq'), seq), room_seq)))
+    return ChatRoomParticipant.objects.filter(matches).update(
+        last_read_seq=Case(*whens, default=F('last_read_seq')),
+        last_read_time=timezone.now(),
+    )
+
+
+class ReadReceiptBuffer:
+    """
+    웹소켓 read 프레임을 참여자별로 모아 CHAT_READ_RECEIPT_FLUSH_SECONDS마다 한 번에 저장하는 버퍼
+    (프로세스/이벤트 루프당 하나). 같은 참여자의 여러 read 프레임은 가장 큰 순번 하나로 합쳐집니다.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.flush_handle = None
+
+    def add(self, chatroom_id, user_id, seq):
+        key = (chatroom_id, user_id)
+        if seq <= self.pending.get(key, 0):
+            return
+        self.pending[key] = seq
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(
+                settings.CHAT_READ_RECEIPT_FLUSH_SECONDS, self.schedule_flush
+            )
+
+    def schedule_flush(self):
+        self.flush_handle = None
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        read_seqs, self.pending = self.pending, {}
+        if not read_seqs:
+            return
+        try:
+            await db_sync_to_async(persist_read_receipts)(read_seqs)
+        except DataError:
+            # 잘못된 값은 다시 시도해도 실패하므로 재시도하지 않음 (다음 주기의 저장까지 막지 않도록)
+            logger.exception("읽음 순번 저장 실패 (%d건), 잘못된 값이 있어 버립니다.", len(read_seqs))
+        except Exception:
+            logger.exception("읽음 순번 저장 실패 (%d건), 다음 주기에 재시도합니다.", len(read_seqs))
+            for (chatroom_id, user_id), seq in read_seqs.items():
+                self.add(chatroom_id, user_id, seq)
+
+
+_buffers = weakref.WeakKeyDictionary()
+
+
+def get_read_receipt_buffer():
+    """현재 이벤트 루프의 읽음 처리 버퍼를 반환"""
+    loop = asyncio.get_running_loop()
+    if loop not in _buffers:
+        _buffers[loop] = ReadReceiptBuffer()
+    return _buffers[loop]
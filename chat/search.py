@@ -0,0 +1,71 @@
+import base64
+import binascii
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import DecimalField, F, FloatField, Q, TextField, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.db.models.lookups import IContains
+from rest_framework.exceptions import NotFound
+
+from .pagination import DEFAULT_PAGE_SIZE
+
+
+@TextField.register_lookup
+class ILikeContains(IContains):
+    """
+    대소문자 구분 없는 부분 일치를 원본 컬럼에 ILIKE로 적용하는 lookup (PostgreSQL, 그 외 DB는 icontains와 동일)
+    icontains는 UPPER(content::text) LIKE UPPER(...)로 변환되어 원본 컬럼의 트라이그램 GIN 인덱스를 쓰지 못하므로,
+    content ILIKE '%...%' 형태로 인덱스(gin_trgm_ops)를 사용하도록 합니다.
+    """
+    lookup_name = 'ilike_contains'
+
+    def as_sql(self, compiler, connection):
+        # PostgreSQL 이외의 DB에서는 icontains와 같은 SQL로 처리
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", [*lhs_params, *rhs_params]
+
+
+def encode_search_cursor(message):
+    """검색 결과의 (rank, id)를 불투명한 커서 문자열로 변환 (rank는 소수점 6자리로 고정된 numeric)"""
+    raw = f"{message.rank}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        rank, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return Decimal(rank), int(pk)
+    except (ValueError, InvalidOperation, binascii.Error, UnicodeDecodeError):
+        raise NotFound("유효하지 않은 커서입니다.")
+
+
+def search_messages(queryset, text, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    메시지 원문/번역문을 검색하여 관련도(rank) 순으로 한 페이지를 반환합니다.
+    - 전문 검색: search_vector GIN 인덱스 (공백 단위 단어 일치)
+    - 부분 일치: content/translated_content 트라이그램 GIN 인덱스 (조사가 붙는 한국어, 방 번호 등)
+    rank = 전문 검색 점수 + 트라이그램 유사도이며, (rank, id) 키셋으로 다음 페이지를 조회합니다.
+    rank는 numeric(소수점 6자리)으로 변환해 커서에 담은 값과 정확히 비교되도록 합니다. (float 정밀도 손실로 인한 누락/중복 방지)
+    (rows, next_cursor) 튜플을 반환합니다.
+    """
+    query = SearchQuery(text, config='simple', search_type='websearch')
+    score = Coalesce(SearchRank(F('search_vector'), query), Value(0.0), output_field=FloatField()) + Coalesce(
+        Greatest(TrigramSimilarity('content', text), TrigramSimilarity('translated_content', text)),
+        Value(0.0), output_field=FloatField()
+    )
+    queryset = queryset.filter(
+        Q(search_vector=query) | Q(content__ilike_contains=text) | Q(translated_content__ilike_contains=text)
+    ).annotate(
+        rank=Cast(score, DecimalField(max_digits=12, decimal_places=6))
+    )
+    if cursor:
+        rank, pk = decode_search_cursor(cursor)
+        queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+    rows = list(queryset.order_by('-rank', '-id')[:page_size + 1])
+    next_cursor = encode_search_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
@@ -3,37 +3,51 @@ from rest_framework import serializers
 from .models import ChatRoom, Message, ChatRoomParticipant
 from django.utils import timezone
 
+from .pagination import paginate_messages, get_page_size, get_since_seq
 from .utils import translate_text
 
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = serializers.StringRelatedField(read_only=True)
     room = serializers.PrimaryKeyRelatedField(write_only=True, queryset=ChatRoom.objects.all())
-    # 클라이언트 입력용 파일 필드 (write_only)
-    file = serializers.FileField(write_only=True, required=False)
+    # upload_url로 발급받아 직접 업로드를 마친 파일 키 (write_only)
+    file_key = serializers.CharField(write_only=True, required=False)
     # 저장 후 자동으로 채워지는 필드들은 read_only
     file_url = serializers.CharField(read_only=True)
     file_name = serializers.CharField(read_only=True)
     file_type = serializers.CharField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     translated_content = serializers.CharField(read_only=True)
+    seq = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Message
         fields = [
-            'id', 'room', 'sender', 'content', 'translated_content', 'file',
+            'id', 'seq', 'room', 'sender', 'content', 'translated_content', 'file_key',
             'file_url', 'file_name', 'file_type', 'created_at'
         ]
 
     def create(self, validated_data):
-        validated_data.pop('file', None)
-        message = super().create(validated_data)
+        # 클라이언트가 보낸 file_key 대신 뷰에서 확인한 키(attachment_key)를 저장
+        validated_data.pop('file_key', None)
+        validated_data['file_key'] = validated_data.pop('attachment_key', None)
+        room = validated_data.pop('room')
+        message = room.append_message(**validated_data)
         if message.content:
             target_lang = 'KO' if message.sender.profile.language != 'KO' else message.sender.profile.language
             message.translated_content = translate_text(message.content, target_lang)
             message.save()
         return message
 
+class MessageSearchResultSerializer(MessageSerializer):
+    chat_room = serializers.IntegerField(source='room_id', read_only=True)
+    room_number = serializers.CharField(source='room.checkin.hotel_room.room_number', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['chat_room', 'room_number', 'rank']
+
+
 class ChatRoomSerializer(serializers.ModelSerializer):
     # 채팅방에 연결된 메시지 목록
     messages = MessageSerializer(many=True, read_only=True)
@@ -62,18 +76,15 @@ class ChatRoomListSerializer(serializers.ModelSerializer):
                   'last_message', 'translated_last_message', 'last_message_time', 'unread_count', 'is_answered']
 
     def get_last_message(self, obj):
-        last_message = Message.objects.filter(room=obj).order_by('-created_at').first()
-        return last_message.content if last_message else None
+        return obj.last_message.content if obj.last_message else None
 
     def get_translated_last_message(self, obj):
-        last_message = Message.objects.filter(room=obj).order_by('-created_at').first()
-        return last_message.translated_content if last_message else None
+        return obj.last_message.translated_content if obj.last_message else None
 
     def get_last_message_time(self, obj):
-        last_message = Message.objects.filter(room=obj).order_by('-created_at').first()
-        if last_message:
+        if obj.last_message:
             now_time = timezone.localtime(timezone.now())
-            last_time = timezone.localtime(last_message.created_at)
+            last_time = timezone.localtime(obj.last_message.created_at)
             if last_time.date() == now_time.date():
                 return last_time.strftime('%I:%M %p')
             else:
@@ -81,83 +92,91 @@ class ChatRoomListSerializer(serializers.ModelSerializer):
         return None
 
     def get_unread_count(self, obj):
-        request = self.context.get('request')
-        if not request:
-            return 0
-        user = request.user
-        try:
-            participant = obj.participants.get(user=user)
-        except ChatRoomParticipant.DoesNotExist:
-            # 참여 기록이 없으면 읽지 않은 메시지가 없다고 간주
-            return Message.objects.filter(room=obj).count()
-
-        # 만약 last_read_time이 기록되어 있다면, 그 시간 이후의 메시지 개수를 반환
-        if participant.last_read_time:
-            count = Message.objects.filter(room=obj, created_at__gt=participant.last_read_time).count()
-        else:
-            # 기록이 없으면 모든 메시지를 미확인으로 간주
-            count = Message.objects.filter(room=obj).count()
-        return count
-
-
-class ManagerChatRoomSerializer(serializers.ModelSerializer):
+        # 목록 뷰에서 참여자별 마지막으로 읽은 순번을 한 번에 조회해 context로 전달
+        # (참여 기록이 없으면 아직 채팅방을 열어 보지 않은 것이므로 전체 메시지를 읽지 않은 것으로 계산)
+        return obj.message_seq - self.context.get('last_read_seqs', {}).get(obj.id, 0)
+
+
+class PagedMessagesMixin:
+    """
+    채팅방 메시지를 before/after 커서로 한 페이지만 조회하고, 해당 페이지에 대해서만 날짜별로 묶어 반환합니다.
+    """
+
+    def get_message_page(self, obj):
+        if not hasattr(self, '_message_page'):
+            request = self.context.get('request')
+            params = request.query_params if request else {}
+            self._message_page = paginate_messages(
+                Message.objects.filter(room=obj).select_related('sender__profile'),
+                before=params.get('before'),
+                after=params.get('after'),
+                page_size=get_page_size(params),
+                since_seq=get_since_seq(params),
+            )
+        return self._message_page
+
+    def get_messages(self, obj):
+        page = self.get_message_page(obj)
+        serialized = MessageSerializer(page.messages, many=True).data
+        grouped_messages = {}
+        for message, message_data in zip(page.messages, serialized):
+            date = message.created_at.date()
+            grouped_messages.setdefault(date, []).append(self.format_message(message, message_data, obj))
+        return [{'date': date, 'messages': msgs} for date, msgs in grouped_messages.items()]
+
+    def get_previous_cursor(self, obj):
+        return self.get_message_page(obj).previous_cursor
+
+    def get_next_cursor(self, obj):
+        return self.get_message_page(obj).next_cursor
+
+    def get_last_seq(self, obj):
+        return self.get_message_page(obj).last_seq
+
+
+class ManagerChatRoomSerializer(PagedMessagesMixin, serializers.ModelSerializer):
     room_number = serializers.CharField(source='checkin.hotel_room.room_number')
     room_type = serializers.CharField(source='checkin.hotel_room.room_type.name')
     guest_nationality = serializers.CharField(source='checkin.user.profile.nationality')
     guest_profile_image = serializers.ImageField(source='checkin.user.profile.profile_picture', required=False)
     hotel_profile_image = serializers.ImageField(source='checkin.hotel_room.room_type.basespace.photos.first.image', required=False)
     messages = serializers.SerializerMethodField()
+    previous_cursor = serializers.SerializerMethodField()
+    next_cursor = serializers.SerializerMethodField()
+    last_seq = serializers.SerializerMethodField()
     is_answered = serializers.BooleanField()
 
     class Meta:
         model = ChatRoom
-        fields = ['id', 'room_number', 'room_type', 'guest_nationality', 'guest_profile_image', 'hotel_profile_image', 'is_answered', 'messages']
-
-    def get_messages(self, obj):
-        messages = Message.objects.filter(room=obj).order_by('created_at')
-        grouped_messages = {}
-        for message in messages:
-            date = message.created_at.date()
-            if date not in grouped_messages:
-                grouped_messages[date] = []
-            grouped_messages[date].append(self.format_message(message, obj))
-        return [{'date': date, 'messages': msgs} for date, msgs in grouped_messages.items()]
+        fields = ['id', 'room_number', 'room_type', 'guest_nationality', 'guest_profile_image', 'hotel_profile_image', 'is_answered', 'messages',
+                  'previous_cursor', 'next_cursor', 'last_seq', 'archived_at']
 
-    def format_message(self, message, chat_room):
+    def format_message(self, message, message_data, chat_room):
         korea_tz = pytz.timezone('Asia/Seoul')
         local_time = message.created_at.astimezone(korea_tz)
         formatted_time = local_time.strftime('%I:%M %p')
-        message_data = MessageSerializer(message).data
         message_data['created_at'] = formatted_time
         if message.sender.profile.role in ['ADMIN', 'MANAGER']:
             message_data['sender'] = chat_room.checkin.hotel_room.room_type.basespace.name
         return message_data
 
 
-class CustomerChatRoomSerializer(serializers.ModelSerializer):
+class CustomerChatRoomSerializer(PagedMessagesMixin, serializers.ModelSerializer):
     hotel_profile_image = serializers.ImageField(source='checkin.hotel_room.room_type.basespace.photos.first.image', required=False)
     messages = serializers.SerializerMethodField()
+    previous_cursor = serializers.SerializerMethodField()
+    next_cursor = serializers.SerializerMethodField()
+    last_seq = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatRoom
-        fields = ['id', 'hotel_profile_image', 'messages']
-
-    def get_messages(self, obj):
-        messages = Message.objects.filter(room=obj).order_by('created_at')
-        grouped_messages = {}
-        for message in messages:
-            date = message.created_at.date()
-            if date not in grouped_messages:
-                grouped_messages[date] = []
-            grouped_messages[date].append(self.format_message(message, obj))
-        return [{'date': date, 'messages': msgs} for date, msgs in grouped_messages.items()]
+        fields = ['id', 'hotel_profile_image', 'messages', 'previous_cursor', 'next_cursor', 'last_seq', 'archived_at']
 
-    def format_message(self, message, chat_room):
+    def format_message(self, message, message_data, chat_room):
         request = self.context.get('request')
         korea_tz = pytz.timezone('Asia/Seoul')
         local_time = message.created_at.astimezone(korea_tz)
         formatted_time = local_time.strftime('%I:%M %p')
-        message_data = MessageSerializer(message).data
         message_data['created_at'] = formatted_time
         if request:
             if message.sender == request.user:
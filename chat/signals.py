@@ -0,0 +1,34 @@
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models.signals import pre_migrate, post_delete
+
+from uploads.storage import is_blob_key
+from .archive import delete_archive
+from .models import ChatRoom, Message
+from .storage import release_attachment
+
+
+def create_trigram_extension(sender, using, **kwargs):
+    """메시지 트라이그램 인덱스(gin_trgm_ops)에 필요한 pg_trgm 확장을 마이그레이션 전에 생성"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def release_message_attachment(sender, instance, **kwargs):
+    """메시지가 삭제되면 커밋 이후 해시 기반 첨부파일의 참조 수를 감소"""
+    if is_blob_key(instance.file_key):
+        transaction.on_commit(lambda key=instance.file_key: release_attachment(key))
+
+
+def release_archived_chat_room(sender, instance, **kwargs):
+    """보관된 채팅방이 삭제되면 커밋 이후 보관 파일이 넘겨받은 첨부파일 참조와 보관 파일을 정리"""
+    if instance.archive_key:
+        transaction.on_commit(lambda: delete_archive(instance))
+
+
+pre_migrate.connect(create_trigram_extension, sender=apps.get_app_config('chat'))
+post_delete.connect(release_message_attachment, sender=Message, dispatch_uid="chat_release_message_attachment")
+post_delete.connect(release_archived_chat_room, sender=ChatRoom, dispatch_uid="chat_release_archived_chat_room")
@@ -0,0 +1,161 @@
+import base64
+import os
+import uuid
+
+import boto3
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db import transaction
+
+from uploads.models import StoredBlob
+from .models import ChatRoom, Message
+from uploads.storage import blob_key, is_blob_key, sha256_from_key
+
+# MinIO (S3) 클라이언트 설정
+s3_client = boto3.client(
+    's3',
+    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+)
+
+ATTACHMENT_UPLOAD_EXPIRES = 600  # 업로드 URL 유효 시간 (초)
+MAX_ATTACHMENT_SIZE = 50 * 1024 * 1024  # 첨부파일 최대 크기 (50MB)
+
+
+class AttachmentError(Exception):
+    pass
+
+
+def is_sha256(value):
+    return isinstance(value, str) and len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+def attachment_prefix(room_id):
+    return f"chat/{room_id}/"
+
+
+def build_attachment_key(room_id, file_name):
+    """
+    파일명이 겹쳐도 덮어쓰지 않도록 서버에서 채팅방별 고유 키를 생성
+    해시 기반 키(cas/)는 공유 파일이므로 클라이언트에 업로드 URL을 발급하지 않고, 업로드 확인 후 서버에서 복사합니다.
+    """
+    extension = os.path.splitext(file_name or "")[1].lower()
+    return f"{attachment_prefix(room_id)}{uuid.uuid4().hex}{extension}"
+
+
+def attachment_url(key):
+    return f"{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+
+
+def create_presigned_upload(key, content_type, sha256=None):
+    """
+    클라이언트가 MinIO/S3로 직접 업로드할 수 있는 presigned POST 정보를 생성
+    sha256을 지정하면 스토리지가 업로드된 내용의 체크섬을 검증하고 저장하므로(x-amz-checksum-sha256),
+    앱 서버가 파일을 다시 읽어 해시를 계산할 필요가 없습니다.
+    """
+    fields = {"Content-Type": content_type}
+    conditions = [
+        {"Content-Type": content_type},
+        ["content-length-range", 1, MAX_ATTACHMENT_SIZE],
+    ]
+    if sha256:
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        fields.update({"x-amz-checksum-algorithm": "SHA256", "x-amz-checksum-sha256": checksum})
+        conditions += [{"x-amz-checksum-algorithm": "SHA256"}, {"x-amz-checksum-sha256": checksum}]
+    return s3_client.generate_presigned_post(
+        settings.AWS_STORAGE_BUCKET_NAME,
+        key,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=ATTACHMENT_UPLOAD_EXPIRES,
+    )
+
+
+def attachment_scope(chat_room, user, role):
+    """
+    중복 파일을 재사용할 수 있는 채팅방 범위 (요청한 사용자가 이미 볼 수 있는 채팅방)
+    - 관리자/매니저: 해당 채팅방과 같은 basespace의 채팅방 (채팅방 접근 권한은 호출한 쪽에서 확인)
+    - 고객: 본인 체크인의 채팅방
+    """
+    if role in ["ADMIN", "MANAGER"]:
+        return ChatRoom.objects.filter(basespace_id=chat_room.basespace_id)
+    return ChatRoom.objects.filter(checkin__user=user)
+
+
+def find_attachment_blob(sha256, rooms, lock=False):
+    """
+    rooms의 메시지에서 이미 사용한 같은 내용의 파일이 있으면 반환 (업로드 생략용)
+    다른 채팅방의 파일 키가 노출되거나 해시만으로 첨부되지 않도록 범위 밖의 파일은 반환하지 않습니다.
+    lock=True이면 트랜잭션이 끝날 때까지 인덱스 행을 잠가 그 사이에 파일이 삭제(release_attachment)되지 않도록 합니다.
+    """
+    blobs = StoredBlob.objects.select_for_update() if lock else StoredBlob.objects
+    blob = blobs.filter(sha256=sha256).first()
+    if blob is None or not Message.objects.filter(room__in=rooms, file_key=blob.key).exists():
+        return None
+    return blob
+
+
+def promote_attachment(key, head):
+    """
+    스토리지가 검증한 체크섬(ChecksumSHA256)이 있는 업로드 파일을 해시 기반 키로 옮기고 참조 수를 증가시킵니다.
+    같은 내용이 이미 있으면 업로드 파일만 삭제하고, 없으면 스토리지 내부 복사(copy_object)로 옮기므로
+    파일 바이트는 앱 서버를 거치지 않습니다. 체크섬이 없으면 None을 반환합니다.
+    """
+    checksum = head.get("ChecksumSHA256")
+    if not checksum or "-" in checksum:  # 멀티파트 업로드의 체크섬은 파일 전체의 해시가 아님
+        return None
+    sha256 = base64.b64decode(checksum).hex()
+    # 참조 수 증가와 복사를 인덱스 행을 잠근 채 처리해, 조회한 키의 파일이 그 사이에 삭제되지 않도록 함
+    with transaction.atomic():
+        blob, created = StoredBlob.add_reference(
+            sha256, blob_key(sha256, key), head["ContentLength"], head.get("ContentType")
+        )
+        if created:
+            s3_client.copy_object(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=blob.key,
+                CopySource={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": key},
+            )
+    s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+    return blob
+
+
+def confirm_attachment(chat_room, key, user, role):
+    """
+    클라이언트가 업로드를 마쳤다고 보낸 키를 확인하고 {"file_key", "file_url", "file_type"}를 반환합니다.
+    - 채팅방 키: 해당 채팅방에 발급된 키이고 실제로 업로드되었는지 HEAD 요청으로 확인합니다.
+      스토리지가 검증한 SHA-256 체크섬이 있으면 해시 기반 키로 옮겨 중복 저장을 막습니다.
+    - 해시 기반 키: upload-url에서 중복으로 반환된 키이므로 사용자가 볼 수 있는 범위의 파일인지 확인합니다.
+    해시 기반 파일은 메시지마다 참조 수를 1 증가시키고, 메시지가 삭제되면 release_attachment로 감소시킵니다.
+    """
+    if is_blob_key(key):
+        with transaction.atomic():
+            blob = find_attachment_blob(sha256_from_key(key), attachment_scope(chat_room, user, role), lock=True)
+            if blob is None or blob.key != key:
+                raise AttachmentError("해당 채팅방에서 사용할 수 없는 파일 키입니다.")
+            StoredBlob.add_reference(blob.sha256, blob.key, blob.size, blob.content_type)
+        return {"file_key": blob.key, "file_url": attachment_url(blob.key), "file_type": blob.content_type or None}
+
+    if not key or not key.startswith(attachment_prefix(chat_room.id)):
+        raise AttachmentError("해당 채팅방에 발급된 파일 키가 아닙니다.")
+    try:
+        head = s3_client.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, ChecksumMode="ENABLED")
+    except ClientError:
+        raise AttachmentError("업로드된 파일을 찾을 수 없습니다.")
+    blob = promote_attachment(key, head)
+    if blob is not None:
+        return {"file_key": blob.key, "file_url": attachment_url(blob.key), "file_type": blob.content_type or None}
+    return {"file_key": key, "file_url": attachment_url(key), "file_type": head.get("ContentType")}
+
+
+def release_attachment(key):
+    """
+    메시지가 삭제되면 해시 기반 파일의 참조 수를 감소시키고, 마지막 참조였으면 파일을 삭제합니다.
+    파일 삭제도 인덱스 행의 잠금 안에서 처리해, 같은 내용을 다시 올리는 promote_attachment와 겹치지 않도록 합니다.
+    """
+    if not is_blob_key(key):
+        return
+    with transaction.atomic():
+        if StoredBlob.release(key):
+            s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
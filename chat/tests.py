@@ -1,3 +1,577 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import uuid
+from io import BytesIO, StringIO
+from unittest import mock
+from datetime import date, time, timedelta
+from asgiref.sync import async_to_sync
+from botocore.response import StreamingBody
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import UserProfile
+from spaces.models import BaseSpace, HotelRoomType, HotelRoom
+from bookings.models import CheckIn, Reservation
+from chat.archive import archive_chat_room, iter_archived_messages
+from chat.consumers import MultiplexConsumer
+from chat.models import ChatRoom, ChatRoomParticipant, Message
+from chat.read_receipts import persist_read_receipts
+from chat.storage import promote_attachment, release_attachment
+from chat.views import ChatRoomViewSet
+from chat.write_behind import clean_message_fields, persist_buffered_messages
+from notifications.models import Notification
+from uploads.models import StoredBlob
 
-# Create your tests here.
+
+class ChatTestBase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # 관리자 사용자 생성
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@test.com", password="AdminPass123"
+        )
+        UserProfile.objects.create(user=self.admin_user, role="ADMIN")
+        # 체크인한 고객 생성
+        self.guest = User.objects.create_user(
+            username="guest", email="guest@test.com", password="GuestPass123"
+        )
+        UserProfile.objects.create(user=self.guest, role="GENERAL", language="KO")
+        self.basespace = BaseSpace.objects.create(
+            name="Test Hotel", location=Point(0, 0),
+            address="Test Address", phone="01011112222", introduction="Test Intro", is_featured=False
+        )
+        self.room_type = HotelRoomType.objects.create(basespace=self.basespace, name="Standard", nickname="Std")
+        self.hotel_room = HotelRoom.objects.create(room_number="101", room_type=self.room_type, status="빈 방")
+        self.reservation = Reservation.objects.create(
+            user=self.guest,
+            space=self.room_type,
+            start_date=date.today(),
+            start_time=time(14, 0),
+            end_date=date.today() + timedelta(days=1),
+            end_time=time(11, 0),
+            people=1,
+        )
+        self.check_in = CheckIn.objects.create(
+            user=self.guest,
+            hotel_room=self.hotel_room,
+            reservation=self.reservation,
+            check_in_date=date.today(),
+            check_out_date=date.today() + timedelta(days=1),
+            temp_code="123456",
+        )
+        self.chat_room = ChatRoom.objects.create(basespace=self.basespace, checkin=self.check_in)
+        ChatRoomParticipant.objects.create(chatroom=self.chat_room, user=self.admin_user)
+        ChatRoomParticipant.objects.create(chatroom=self.chat_room, user=self.guest)
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+
+class MessagePaginationTests(ChatTestBase):
+    def setUp(self):
+        super().setUp()
+        self.messages = [
+            Message.objects.create(room=self.chat_room, sender=self.guest, content=f"message {i}")
+            for i in range(5)
+        ]
+        self.authenticate(self.guest)
+        self.url = reverse("message-list")
+
+    def test_latest_page(self):
+        response = self.client.get(self.url, {"room_id": self.chat_room.id, "page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["id"] for m in response.data["results"]], [m.id for m in self.messages[3:]])
+        self.assertIsNotNone(response.data["previous_cursor"])
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_before_and_after_cursors(self):
+        first = self.client.get(self.url, {"room_id": self.chat_room.id, "page_size": 2})
+        older = self.client.get(
+            self.url, {"room_id": self.chat_room.id, "page_size": 2, "before": first.data["previous_cursor"]}
+        )
+        self.assertEqual([m["id"] for m in older.data["results"]], [m.id for m in self.messages[1:3]])
+
+        newer = self.client.get(
+            self.url, {"room_id": self.chat_room.id, "page_size": 2, "after": older.data["next_cursor"]}
+        )
+        self.assertEqual([m["id"] for m in newer.data["results"]], [m.id for m in self.messages[3:]])
+        self.assertIsNone(newer.data["next_cursor"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"room_id": self.chat_room.id, "before": "invalid"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_retrieve_returns_single_page(self):
+        url = reverse("chatroom-detail", args=[self.chat_room.id])
+        response = self.client.get(url, {"page_size": 3})
+        self.assertEqual(response.status_code, 200)
+        returned = [m["id"] for group in response.data["messages"] for m in group["messages"]]
+        self.assertEqual(returned, [m.id for m in self.messages[2:]])
+        self.assertIsNotNone(response.data["previous_cursor"])
+
+
+class MessageSinceSeqTests(ChatTestBase):
+    def setUp(self):
+        super().setUp()
+        self.messages = [self.chat_room.append_message(sender=self.guest, content=f"message {i}") for i in range(5)]
+        self.authenticate(self.guest)
+
+    def test_messages_get_room_sequence(self):
+        self.assertEqual([m.seq for m in self.messages], [1, 2, 3, 4, 5])
+
+    def test_list_since_seq_returns_only_gap(self):
+        response = self.client.get(reverse("message-list"), {"room_id": self.chat_room.id, "since_seq": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["seq"] for m in response.data["results"]], [4, 5])
+        self.assertEqual(response.data["last_seq"], 5)
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_since_seq_pages_by_last_seq(self):
+        url = reverse("message-list")
+        first = self.client.get(url, {"room_id": self.chat_room.id, "since_seq": 0, "page_size": 3})
+        self.assertEqual([m["seq"] for m in first.data["results"]], [1, 2, 3])
+        self.assertIsNotNone(first.data["next_cursor"])
+        rest = self.client.get(url, {"room_id": self.chat_room.id, "since_seq": first.data["last_seq"], "page_size": 3})
+        self.assertEqual([m["seq"] for m in rest.data["results"]], [4, 5])
+
+    def test_retrieve_since_seq(self):
+        response = self.client.get(reverse("chatroom-detail", args=[self.chat_room.id]), {"since_seq": 4})
+        returned = [m["seq"] for group in response.data["messages"] for m in group["messages"]]
+        self.assertEqual(returned, [5])
+        self.assertEqual(response.data["last_seq"], 5)
+
+    def test_backfill_keeps_issued_sequences(self):
+        # 순번 도입 이전 메시지 (순번 없음)
+        legacy = Message.objects.create(room=self.chat_room, sender=self.guest, content="legacy")
+        call_command("backfill_chat_counters", stdout=StringIO())
+        self.assertEqual(
+            list(Message.objects.filter(seq__isnull=False).order_by('seq').values_list('seq', flat=True)), [1, 2, 3, 4, 5]
+        )
+        legacy.refresh_from_db()
+        self.assertIsNone(legacy.seq)
+
+    def test_backfill_numbers_legacy_room(self):
+        Message.objects.filter(room=self.chat_room).update(seq=None)
+        ChatRoom.objects.filter(pk=self.chat_room.pk).update(message_seq=0, last_message=None)
+        call_command("backfill_chat_counters", stdout=StringIO())
+        self.chat_room.refresh_from_db()
+        self.assertEqual(self.chat_room.message_seq, 5)
+        self.assertEqual(self.chat_room.last_message_id, self.messages[-1].id)
+        self.assertEqual(
+            list(Message.objects.order_by('created_at', 'id').values_list('seq', flat=True)), [1, 2, 3, 4, 5]
+        )
+
+
+class ChatRoomListTests(ChatTestBase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.admin_user)
+        self.url = reverse("chatroom-list")
+
+    def test_append_message_updates_room(self):
+        first = self.chat_room.append_message(sender=self.guest, content="first")
+        second = self.chat_room.append_message(sender=self.guest, content="second")
+        self.chat_room.refresh_from_db()
+        self.assertEqual(self.chat_room.last_message, second)
+        self.assertEqual(self.chat_room.message_seq, 2)
+        self.assertFalse(self.chat_room.is_answered)
+        self.assertNotEqual(first.id, second.id)
+
+    def test_mark_as_answered_keeps_concurrent_message(self):
+        # 채팅방을 읽은 뒤 저장 전에 다른 요청이 메시지를 추가한 경우
+        stale_room = ChatRoom.objects.get(pk=self.chat_room.pk)
+        message = self.chat_room.append_message(sender=self.guest, content="late checkout please")
+        with mock.patch.object(ChatRoomViewSet, "get_object", return_value=stale_room):
+            response = self.client.post(reverse("chatroom-mark-as-answered", args=[self.chat_room.id]))
+        self.assertEqual(response.status_code, 200)
+        self.chat_room.refresh_from_db()
+        self.assertTrue(self.chat_room.is_answered)
+        self.assertEqual(self.chat_room.message_seq, 1)
+        self.assertEqual(self.chat_room.last_message, message)
+
+    def test_list_uses_last_message_and_unread_count(self):
+        self.chat_room.append_message(sender=self.guest, content="hello")
+        self.chat_room.append_message(sender=self.guest, content="late checkout please")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        room = response.data[0]
+        self.assertEqual(room["last_message"], "late checkout please")
+        self.assertEqual(room["unread_count"], 2)
+        self.assertEqual(room["guest_name"], "guest")
+
+    def test_manager_sees_only_managed_basespaces(self):
+        manager = User.objects.create_user(username="manager", email="manager@test.com", password="ManagerPass123")
+        UserProfile.objects.create(user=manager, role="MANAGER")
+        other = BaseSpace.objects.create(
+            name="Other Hotel", location=Point(0, 0),
+            address="Other Address", phone="01033334444", introduction="Other Intro", is_featured=False
+        )
+        other.managers.add(manager)
+        self.authenticate(manager)
+        self.assertEqual(self.client.get(self.url).data, [])
+
+        self.basespace.managers.add(manager)
+        response = self.client.get(self.url, {"group_by": "basespace"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["basespace_id"], self.basespace.id)
+        self.assertEqual([room["id"] for room in response.data[0]["chat_rooms"]], [self.chat_room.id])
+
+
+class WriteBehindPersistTests(ChatTestBase):
+    def make_row(self, content):
+        return {
+            "uuid": str(uuid.uuid4()),
+            "room_id": self.chat_room.id,
+            "sender_id": self.guest.id,
+            "content": content,
+            "translated_content": None,
+            "file_url": None,
+            "file_name": None,
+            "file_type": None,
+            "queued_at": "2025-01-01T00:00:00+00:00",
+            "notification": {
+                "title": "새 채팅 메시지", "content": None, "notification_type": "MESSAGE",
+                "recipient_ids": [self.guest.id],
+            },
+        }
+
+    def test_bulk_persist_updates_room_and_is_idempotent(self):
+        rows = [self.make_row("first"), self.make_row("second")]
+        self.assertEqual(persist_buffered_messages(rows), 2)
+        # 프로세스 재시작 후 같은 행을 다시 처리해도 중복 저장되지 않음
+        self.assertEqual(persist_buffered_messages(rows), 0)
+
+        self.chat_room.refresh_from_db()
+        self.assertEqual(self.chat_room.message_seq, 2)
+        self.assertEqual(self.chat_room.last_message.content, "second")
+        self.assertFalse(self.chat_room.is_answered)
+        self.assertEqual(Message.objects.filter(room=self.chat_room).count(), 2)
+        self.assertEqual(Notification.objects.filter(chat_room=self.chat_room).count(), 2)
+        participant = ChatRoomParticipant.objects.get(chatroom=self.chat_room, user=self.guest)
+        self.assertEqual(participant.last_read_seq, 2)
+
+    def test_persist_keeps_original_send_time(self):
+        row = self.make_row("late replay")
+        persist_buffered_messages([row])
+        message = Message.objects.get(uuid=row["uuid"])
+        self.assertEqual(message.created_at.isoformat(), row["queued_at"])
+
+    def test_clean_message_fields(self):
+        fields = clean_message_fields({"content": "hi", "file_name": "a" * 300, "file_type": "image/jpeg"})
+        self.assertEqual(len(fields["file_name"]), 255)
+        with self.assertRaises(ValueError):
+            clean_message_fields({"file_url": "https://example.com/" + "a" * 300})
+
+
+class UnreadChatRoomsCountTests(ChatTestBase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.admin_user)
+        self.url = reverse("unread-chat-rooms-count")
+
+    def test_unread_count_follows_read_sequence(self):
+        self.chat_room.append_message(sender=self.guest, content="hello")
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unread_chat_rooms_count"], 1)
+
+        self.client.get(reverse("chatroom-detail", args=[self.chat_room.id]))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unread_chat_rooms_count"], 0)
+
+    def test_batched_read_receipts_only_move_forward(self):
+        for i in range(3):
+            self.chat_room.append_message(sender=self.guest, content=f"hello {i}")
+        persist_read_receipts({(self.chat_room.id, self.admin_user.id): 3, (self.chat_room.id, self.guest.id): 1})
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unread_chat_rooms_count"], 0)
+
+        # 늦게 도착한 이전 순번으로는 되돌아가지 않음
+        persist_read_receipts({(self.chat_room.id, self.admin_user.id): 1})
+        participant = ChatRoomParticipant.objects.get(chatroom=self.chat_room, user=self.admin_user)
+        self.assertEqual(participant.last_read_seq, 3)
+        self.assertIsNotNone(participant.last_read_time)
+        self.assertEqual(ChatRoomParticipant.objects.get(chatroom=self.chat_room, user=self.guest).last_read_seq, 3)
+
+    def test_read_receipt_is_capped_at_room_sequence(self):
+        self.chat_room.append_message(sender=self.guest, content="hello")
+        persist_read_receipts({(self.chat_room.id, self.admin_user.id): 10 ** 12})
+        participant = ChatRoomParticipant.objects.get(chatroom=self.chat_room, user=self.admin_user)
+        self.assertEqual(participant.last_read_seq, 1)
+        # 이후 메시지는 읽지 않은 것으로 계산됨
+        self.chat_room.append_message(sender=self.guest, content="new")
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unread_chat_rooms_count"], 1)
+
+    def test_own_message_is_read(self):
+        self.chat_room.append_message(sender=self.admin_user, content="안녕하세요")
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unread_chat_rooms_count"], 0)
+
+    def test_inactive_room_is_not_counted(self):
+        self.chat_room.append_message(sender=self.guest, content="hello")
+        ChatRoom.objects.filter(pk=self.chat_room.pk).update(is_active=False)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unread_chat_rooms_count"], 0)
+
+    def test_counts_after_message_match_per_user_count(self):
+        self.chat_room.append_message(sender=self.guest, content="hello")
+        counts = ChatRoomParticipant.unread_room_counts_after_message(self.chat_room, self.guest.id)
+        self.assertEqual(counts, {self.admin_user.id: ChatRoomParticipant.unread_room_count(self.admin_user)})
+        self.assertEqual(counts[self.admin_user.id], 1)
+
+
+class AttachmentUploadTests(ChatTestBase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.guest)
+
+    def test_upload_url_issues_room_scoped_key(self):
+        response = self.client.post(
+            reverse("message-upload-url"),
+            {"room": self.chat_room.id, "file_name": "photo.JPG", "content_type": "image/jpeg"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["file_key"].startswith(f"chat/{self.chat_room.id}/"))
+        self.assertTrue(response.data["file_key"].endswith(".jpg"))
+        self.assertIn("url", response.data["upload"])
+        self.assertIn("fields", response.data["upload"])
+
+    def test_upload_url_requires_file_info(self):
+        response = self.client.post(reverse("message-upload-url"), {"room": self.chat_room.id}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def create_other_room(self):
+        other_guest = User.objects.create_user(username="other", email="other@test.com", password="OtherPass123")
+        UserProfile.objects.create(user=other_guest, role="GENERAL", language="KO")
+        check_in = CheckIn.objects.create(
+            user=other_guest,
+            hotel_room=self.hotel_room,
+            reservation=self.reservation,
+            check_in_date=date.today(),
+            check_out_date=date.today() + timedelta(days=1),
+            temp_code="654321",
+        )
+        return ChatRoom.objects.create(basespace=self.basespace, checkin=check_in), other_guest
+
+    def request_upload(self, sha256):
+        return self.client.post(
+            reverse("message-upload-url"),
+            {"room": self.chat_room.id, "file_name": "menu.pdf", "content_type": "application/pdf", "sha256": sha256},
+            format="json",
+        )
+
+    def test_upload_url_skips_upload_for_stored_blob(self):
+        sha256 = "a" * 64
+        key = f"cas/aa/{sha256}.pdf"
+        StoredBlob.objects.create(sha256=sha256, key=key, size=10, ref_count=1)
+        self.chat_room.append_message(sender=self.guest, content="", file_key=key)
+        response = self.request_upload(sha256)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["file_key"], key)
+        self.assertIsNone(response.data["upload"])
+
+    def test_upload_url_does_not_reveal_other_room_blob(self):
+        sha256 = "b" * 64
+        key = f"cas/bb/{sha256}.pdf"
+        StoredBlob.objects.create(sha256=sha256, key=key, size=10, ref_count=1)
+        other_room, other_guest = self.create_other_room()
+        other_room.append_message(sender=other_guest, content="", file_key=key)
+
+        response = self.request_upload(sha256)
+        self.assertEqual(response.status_code, 200)
+        # 해시 키가 아닌 채팅방 키로 업로드하고, 스토리지가 체크섬을 검증하도록 요청
+        self.assertTrue(response.data["file_key"].startswith(f"chat/{self.chat_room.id}/"))
+        self.assertIn("x-amz-checksum-sha256", response.data["upload"]["fields"])
+
+        response = self.client.post(
+            reverse("message-list"), {"room": self.chat_room.id, "content": "", "file_key": key}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(StoredBlob.objects.get(sha256=sha256).ref_count, 1)
+
+    def test_deleting_message_releases_blob_reference(self):
+        sha256 = "c" * 64
+        key = f"cas/cc/{sha256}.pdf"
+        StoredBlob.objects.create(sha256=sha256, key=key, size=10, ref_count=2)
+        message = self.chat_room.append_message(sender=self.guest, content="", file_key=key)
+        with self.captureOnCommitCallbacks(execute=True):
+            message.delete()
+        self.assertEqual(StoredBlob.objects.get(sha256=sha256).ref_count, 1)
+
+    def test_promote_attachment_reuses_locked_blob(self):
+        sha256 = "d" * 64
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        head = {"ChecksumSHA256": checksum, "ContentLength": 10, "ContentType": "application/pdf"}
+        staging_key = f"chat/{self.chat_room.id}/upload.pdf"
+        with mock.patch("chat.storage.s3_client") as s3:
+            blob = promote_attachment(staging_key, head)
+            self.assertEqual(blob.key, f"cas/dd/{sha256}.pdf")
+            self.assertEqual(s3.copy_object.call_count, 1)
+            # 같은 내용은 복사하지 않고 참조 수만 증가
+            promote_attachment(staging_key, head)
+            self.assertEqual(s3.copy_object.call_count, 1)
+            self.assertEqual(StoredBlob.objects.get(sha256=sha256).ref_count, 2)
+
+            release_attachment(blob.key)
+            release_attachment(blob.key)
+            self.assertFalse(StoredBlob.objects.filter(sha256=sha256).exists())
+            s3.delete_object.assert_called_with(Bucket=mock.ANY, Key=blob.key)
+
+    def test_message_rejects_foreign_file_key(self):
+        response = self.client.post(
+            reverse("message-list"),
+            {"room": self.chat_room.id, "content": "", "file_key": "chat/999999/other.jpg"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Message.objects.filter(room=self.chat_room).exists())
+
+
+class MultiplexDeliveryTests(SimpleTestCase):
+    def test_message_sent_to_both_groups_is_delivered_once(self):
+        consumer = MultiplexConsumer()
+        sent = []
+
+        async def send(text_data=None, **kwargs):
+            sent.append(text_data)
+
+        consumer.send = send
+        event = {"type": "multiplex_message", "message_uuid": "a", "text": '{"content": "hi"}'}
+        # chat_{room} 그룹과 manager_{basespace} 그룹에서 각각 도착
+        async_to_sync(consumer.multiplex_message)(event)
+        async_to_sync(consumer.multiplex_message)(event)
+        async_to_sync(consumer.multiplex_message)({**event, "message_uuid": "b"})
+        self.assertEqual(sent, ['{"content": "hi"}', '{"content": "hi"}'])
+
+
+class ChatPresenceViewTests(ChatTestBase):
+    def test_guest_cannot_query_presence(self):
+        self.authenticate(self.guest)
+        response = self.client.get(reverse("chat-presence"), {"basespace_id": self.basespace.id})
+        self.assertEqual(response.status_code, 403)
+
+    def test_requires_basespace_or_rooms(self):
+        self.authenticate(self.admin_user)
+        response = self.client.get(reverse("chat-presence"))
+        self.assertEqual(response.status_code, 400)
+
+
+class MessageSearchTests(ChatTestBase):
+    def setUp(self):
+        super().setUp()
+        self.chat_room.append_message(sender=self.guest, content="Can I get a late checkout tomorrow?")
+        self.chat_room.append_message(sender=self.guest, content="수건을 더 주세요")
+        self.chat_room.append_message(sender=self.guest, content="Thank you")
+        self.url = reverse("message-search")
+
+    def test_search_ranks_matching_messages(self):
+        self.authenticate(self.admin_user)
+        response = self.client.get(self.url, {"q": "late checkout"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["content"] for m in response.data["results"]], ["Can I get a late checkout tomorrow?"])
+        self.assertEqual(response.data["results"][0]["chat_room"], self.chat_room.id)
+
+    def test_search_partial_korean_text(self):
+        self.authenticate(self.admin_user)
+        response = self.client.get(self.url, {"q": "수건"})
+        self.assertEqual([m["content"] for m in response.data["results"]], ["수건을 더 주세요"])
+
+    def test_search_pages_through_tied_ranks(self):
+        for _ in range(3):
+            self.chat_room.append_message(sender=self.guest, content="수건을 더 주세요")
+        self.authenticate(self.admin_user)
+        seen = []
+        cursor = None
+        while True:
+            params = {"q": "수건", "page_size": 1, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(self.url, params)
+            seen += [m["id"] for m in response.data["results"]]
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_manager_only_sees_own_basespace(self):
+        manager = User.objects.create_user(username="manager", email="manager@test.com", password="ManagerPass123")
+        UserProfile.objects.create(user=manager, role="MANAGER")
+        self.authenticate(manager)
+        response = self.client.get(self.url, {"q": "checkout"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_guest_cannot_search(self):
+        self.authenticate(self.guest)
+        response = self.client.get(self.url, {"q": "checkout"})
+        self.assertEqual(response.status_code, 403)
+
+
+class FakeArchiveStorage:
+    """업로드한 보관 파일을 메모리에 보관하는 s3_client 대체 객체"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        self.objects[key] = fileobj.read()
+
+    def get_object(self, Bucket, Key):
+        data = self.objects[Key]
+        return {"Body": StreamingBody(BytesIO(data), len(data))}
+
+
+class ChatArchiveTests(ChatTestBase):
+    def test_archive_exports_and_deletes_messages(self):
+        for i in range(3):
+            self.chat_room.append_message(sender=self.guest, content=f"message {i}")
+        storage = FakeArchiveStorage()
+        with mock.patch("chat.archive.s3_client", storage):
+            self.assertEqual(archive_chat_room(self.chat_room), 3)
+            # 이미 보관된 채팅방은 다시 보관하지 않음
+            self.assertEqual(archive_chat_room(self.chat_room), 0)
+            self.chat_room.refresh_from_db()
+            records = list(iter_archived_messages(self.chat_room))
+
+        self.assertFalse(Message.objects.filter(room=self.chat_room).exists())
+        self.assertEqual(list(storage.objects), [self.chat_room.archive_key])
+        self.assertEqual([record["content"] for record in records], ["message 0", "message 1", "message 2"])
+        self.assertEqual([record["seq"] for record in records], [1, 2, 3])
+
+    def test_archived_room_streams_to_manager_and_former_guest(self):
+        for i in range(2):
+            self.chat_room.append_message(sender=self.guest, content=f"message {i}")
+        # 체크아웃 후 비활성화된 채팅방만 보관 대상
+        CheckIn.objects.filter(pk=self.check_in.pk).update(checked_out=True)
+        ChatRoom.objects.filter(pk=self.chat_room.pk).update(is_active=False)
+        manager = User.objects.create_user(username="manager", email="manager@test.com", password="ManagerPass123")
+        UserProfile.objects.create(user=manager, role="MANAGER")
+        self.basespace.managers.add(manager)
+        storage = FakeArchiveStorage()
+        with mock.patch("chat.archive.s3_client", storage):
+            self.assertEqual(archive_chat_room(ChatRoom.objects.get(pk=self.chat_room.pk)), 2)
+            for user in (manager, self.guest):
+                self.authenticate(user)
+                response = self.client.get(reverse("chatroom-archive", args=[self.chat_room.id]))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Encoding"], "gzip")
+                lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+                self.assertEqual([json.loads(line)["content"] for line in lines], ["message 0", "message 1"])
+
+    def test_archive_empty_room_leaves_pointer_without_upload(self):
+        self.chat_room.is_active = False
+        self.chat_room.save()
+        self.assertEqual(archive_chat_room(self.chat_room), 0)
+        self.chat_room.refresh_from_db()
+        self.assertIsNotNone(self.chat_room.archived_at)
+        self.assertIsNone(self.chat_room.archive_key)
+
+        self.authenticate(self.guest)
+        response = self.client.get(reverse("chatroom-archive", args=[self.chat_room.id]))
+        self.assertEqual(response.status_code, 404)
@@ -1,4 +1,8 @@
+import json
+
 import deepl
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from hotel_admin import settings
 
 def translate_text(text, target_lang):
@@ -12,3 +16,40 @@ def translate_text(text, target_lang):
     result = translator.translate_text(text, target_lang=target_lang)
 
     return result.text
+
+
+def notify_chat_context_changed(chat_room_ids):
+    """
+    채팅방에 연결된 소켓들이 캐시해 둔 컨텍스트(고객 언어, 활성화 여부 등)를 다시 불러오도록 알립니다.
+    """
+    channel_layer = get_channel_layer()
+    for chat_room_id in chat_room_ids:
+        async_to_sync(channel_layer.group_send)(f"chat_{chat_room_id}", {"type": "chat_context_changed"})
+
+
+async def broadcast_chat_message(groups, payload):
+    """
+    채팅 메시지를 여러 그룹(chat_{room}, manager_{basespace})에 한 번씩만 전송합니다.
+    - 클라이언트에 보낼 JSON은 여기서 한 번만 직렬화하고 각 소켓은 그대로 전달합니다.
+    - 두 그룹에 모두 가입한 소켓은 message_uuid로 중복을 걸러 한 번만 받습니다. (MultiplexConsumer.multiplex_message)
+    """
+    channel_layer = get_channel_layer()
+    event = {
+        "type": "multiplex_message",
+        "message_uuid": payload["message_uuid"],
+        "text": json.dumps({"type": "multiplex_message", **payload}, ensure_ascii=False),
+    }
+    for group in dict.fromkeys(groups):
+        await channel_layer.group_send(group, event)
+
+
+def unread_rooms_changed_event(chat_room, counts):
+    """
+    매니저 그룹에 보낼 읽지 않은 채팅방 수 이벤트 (ChatRoomParticipant.unread_room_counts_after_message 결과)
+    채널 레이어 직렬화를 위해 사용자 ID는 문자열 키로 전달합니다.
+    """
+    return {
+        "type": "unread_rooms_changed",
+        "chat_room": chat_room.id,
+        "counts": {str(user_id): count for user_id, count in counts.items()},
+    }
@@ -1,30 +1,42 @@
-import boto3
-from django.conf import settings
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
+from accounts.principal import managed_basespace_ids
+from accounts.tokens import claims_manage_basespace
 from bookings.models import CheckIn
+from .archive import open_archive
 from .models import ChatRoom, Message, ChatRoomParticipant
+from .pagination import MessageCursorPagination, get_page_size
+from .search import search_messages
+from .presence import online_users_by_basespace, online_users_by_room
+from .storage import build_attachment_key, create_presigned_upload, confirm_attachment, find_attachment_blob, \
+    attachment_scope, is_sha256, AttachmentError, ATTACHMENT_UPLOAD_EXPIRES
 from .serializers import ChatRoomSerializer, MessageSerializer, ChatRoomListSerializer, ManagerChatRoomSerializer, \
-    CustomerChatRoomSerializer
-
-# MinIO (S3) 클라이언트 설정
-s3_client = boto3.client(
-    's3',
-    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-)
+    CustomerChatRoomSerializer, MessageSearchResultSerializer
+from .utils import notify_chat_context_changed, broadcast_chat_message, unread_rooms_changed_event
+
+# 채팅 내역 커서 페이지네이션 쿼리 파라미터
+message_cursor_parameters = [
+    openapi.Parameter('before', openapi.IN_QUERY, description="이 커서보다 이전 메시지 조회", type=openapi.TYPE_STRING),
+    openapi.Parameter('after', openapi.IN_QUERY, description="이 커서보다 이후 메시지 조회", type=openapi.TYPE_STRING),
+    openapi.Parameter('page_size', openapi.IN_QUERY, description="페이지 크기 (기본 50, 최대 200)", type=openapi.TYPE_INTEGER),
+    openapi.Parameter(
+        'since_seq', openapi.IN_QUERY,
+        description="재접속 시 마지막으로 받은 메시지 순번. 이후 메시지만 조회 (다음 페이지는 응답의 last_seq로 요청)",
+        type=openapi.TYPE_INTEGER
+    ),
+]
 
 
 # 관리자/매니저 권한은 UserProfile.role로 판단한다고 가정 (예: "ADMIN", "MANAGER")
@@ -32,7 +44,7 @@ s3_client = boto3.client(
 class ChatRoomViewSet(viewsets.ModelViewSet):
     """
     - 로그인한 사용자의 현재 체크인 정보를 기준으로 채팅방을 생성하거나 반환합니다.
-    - 관리자인 경우(UserProfile.role이 ADMIN 또는 MANAGER) 모든 활성 채팅방을 조회할 수 있습니다.
+    - ADMIN은 모든 활성 채팅방을, MANAGER는 담당 basespace의 활성 채팅방만 조회할 수 있습니다.
     """
     serializer_class = ChatRoomSerializer
     permission_classes = [IsAuthenticated]
@@ -47,9 +59,12 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return ChatRoom.objects.none()
 
-        # 관리자나 매니저인 경우 전체 활성 채팅방 반환
-        if hasattr(user, 'profile') and user.profile.role in ['ADMIN', 'MANAGER']:
+        # 관리자는 전체, 매니저는 담당 basespace의 활성 채팅방 반환 ((basespace, is_active) 인덱스 사용)
+        role = user.profile.role if hasattr(user, 'profile') else None
+        if role == 'ADMIN':
             return ChatRoom.objects.filter(is_active=True)
+        if role == 'MANAGER':
+            return ChatRoom.objects.filter(basespace_id__in=managed_basespace_ids(user), is_active=True)
 
         # 일반 사용자의 경우 체크인 정보를 기반으로 채팅방 반환
         check_in = CheckIn.objects.filter(
@@ -67,15 +82,49 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             openapi.IN_QUERY,
             description="베이스스페이스 ID",
             type=openapi.TYPE_INTEGER
-        )
+        ),
+        openapi.Parameter(
+            'group_by',
+            openapi.IN_QUERY,
+            description="basespace로 지정하면 담당 호텔 전체의 채팅방을 basespace별로 묶어 반환",
+            type=openapi.TYPE_STRING,
+            enum=['basespace']
+        ),
     ])
     def list(self, request, *args, **kwargs):
         basespace_id = request.query_params.get('basespace_id')
+        group_by_basespace = request.query_params.get('group_by') == 'basespace'
         queryset = self.get_queryset()
         if basespace_id:
             queryset = queryset.filter(basespace_id=basespace_id)
-        serializer = ChatRoomListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        queryset = queryset.select_related(
+            'checkin__hotel_room__room_type', 'checkin__user__profile', 'last_message'
+        )
+        if group_by_basespace:
+            queryset = queryset.select_related('basespace').order_by('basespace_id', 'id')
+        chat_rooms = list(queryset)
+        last_read_seqs = dict(ChatRoomParticipant.objects.filter(
+            chatroom__in=chat_rooms, user=request.user
+        ).values_list('chatroom_id', 'last_read_seq'))
+        serializer = ChatRoomListSerializer(chat_rooms, many=True, context={
+            'request': request,
+            'last_read_seqs': last_read_seqs,
+        })
+        if not group_by_basespace:
+            return Response(serializer.data)
+
+        # 같은 조회 결과를 basespace별로 묶음 (추가 쿼리 없음)
+        groups = {}
+        for chat_room, data in zip(chat_rooms, serializer.data):
+            group = groups.setdefault(chat_room.basespace_id, {
+                "basespace_id": chat_room.basespace_id,
+                "basespace_name": chat_room.basespace.name,
+                "unread_count": 0,
+                "chat_rooms": [],
+            })
+            group["unread_count"] += data["unread_count"]
+            group["chat_rooms"].append(data)
+        return Response(list(groups.values()))
 
 
     def create(self, request, *args, **kwargs):
@@ -113,7 +162,8 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             description="True일 경우 고객 메시지를 번역한 내용을 보여줍니다.",
             type=openapi.TYPE_BOOLEAN,
             required=False
-        )
+        ),
+        *message_cursor_parameters
     ])
     def retrieve(self, request, *args, **kwargs):
         """
@@ -128,8 +178,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         participant, created = ChatRoomParticipant.objects.get_or_create(
             chatroom=instance, user=request.user
         )
-        participant.last_read_time = now()
-        participant.save()
+        participant.mark_as_read(instance.message_seq)
 
         is_translated = request.query_params.get("is_translated", "false").lower() == "true"
 
@@ -149,25 +198,60 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         return Response(data)
 
 
+    @staticmethod
+    def archived_room_queryset(user):
+        """
+        보관 내역을 조회할 수 있는 채팅방 (보관 대상은 비활성/체크아웃된 채팅방이므로 get_queryset의 활성 조건을 적용하지 않음)
+        - ADMIN은 전체, MANAGER는 담당 basespace, 일반 사용자는 체크아웃 여부와 관계없이 본인 체크인의 채팅방
+        """
+        role = user.profile.role if hasattr(user, 'profile') else None
+        if role == 'ADMIN':
+            return ChatRoom.objects.all()
+        if role == 'MANAGER':
+            return ChatRoom.objects.filter(basespace_id__in=managed_basespace_ids(user))
+        return ChatRoom.objects.filter(checkin__user=user)
+
+    @swagger_auto_schema(
+        operation_description="보관 처리된 채팅방의 메시지 내역을 gzip 압축된 JSON Lines로 스트리밍합니다.",
+        responses={
+            200: openapi.Response(description="메시지 한 건당 한 줄의 JSON (Content-Encoding: gzip)"),
+            404: openapi.Response(description="보관된 메시지 없음"),
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def archive(self, request, pk=None):
+        instance = get_object_or_404(self.archived_room_queryset(request.user), pk=pk)
+        if not instance.archive_key:
+            return Response({"error": "보관된 메시지가 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        # 압축을 풀지 않고 오브젝트 스토리지 본문을 그대로 전달
+        body = open_archive(instance)
+        response = StreamingHttpResponse(body.iter_chunks(chunk_size=64 * 1024), content_type="application/x-ndjson")
+        response["Content-Encoding"] = "gzip"
+        return response
+
     @action(detail=True, methods=['post'])
     def mark_as_answered(self, request, pk=None):
         chat_room = self.get_object()
         if request.user.profile.role not in ['ADMIN', 'MANAGER']:
             return Response({"error": "권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
         chat_room.is_answered = True
-        chat_room.save()
+        # append_message가 잠금 아래에서 갱신하는 last_message/message_seq를 덮어쓰지 않도록 변경한 필드만 저장
+        chat_room.save(update_fields=['is_answered'])
+        notify_chat_context_changed([chat_room.id])
         return Response({"message": "답변 완료 상태로 변경되었습니다."}, status=status.HTTP_200_OK)
 
 
 class MessageViewSet(viewsets.ModelViewSet):
     """
     - 특정 채팅방의 모든 채팅 메시지 및 파일 내역을 조회하고, 메시지(텍스트, 파일)를 전송합니다.
-    - 파일 업로드 시 MinIO/S3에 업로드하고, 업로드된 파일 URL을 메시지에 포함합니다.
+    - 파일은 upload_url로 발급받은 presigned URL로 MinIO/S3에 직접 업로드한 뒤, 발급된 file_key를 메시지에 포함합니다.
     - 전송 후 WebSocket을 통해 실시간 알림을 보냅니다.
     """
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    pagination_class = MessageCursorPagination
 
     @swagger_auto_schema(manual_parameters=[
         openapi.Parameter(
@@ -175,7 +259,8 @@ class MessageViewSet(viewsets.ModelViewSet):
             openapi.IN_QUERY,
             description="채팅방 ID",
             type=openapi.TYPE_INTEGER
-        )
+        ),
+        *message_cursor_parameters
     ]
     )
     def list(self, request, *args, **kwargs):
@@ -202,19 +287,58 @@ class MessageViewSet(viewsets.ModelViewSet):
                 if user_role == 'ADMIN':
                     pass
                 elif user_role == 'MANAGER':
-                    is_manager = chat_room.basespace.managers.filter(id=user.id).exists()
+                    is_manager = claims_manage_basespace(self.request.auth, user, chat_room.basespace_id)
                     if not is_manager:
                         return Message.objects.none()
                 else:
                     return Message.objects.none()
 
-            return Message.objects.filter(room=chat_room).order_by("created_at")
+            return Message.objects.filter(room=chat_room).select_related('sender').order_by("created_at")
         return Message.objects.none()
 
-    def create(self, request, *args, **kwargs):
+    @swagger_auto_schema(
+        operation_description="담당 호텔의 채팅 메시지 검색 API (매니저/관리자 전용, 관련도순 정렬)",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="검색어", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('basespace_id', openapi.IN_QUERY, description="basespace ID", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('room_id', openapi.IN_QUERY, description="채팅방 ID", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="다음 페이지 커서", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="페이지 크기 (기본 50, 최대 200)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: MessageSearchResultSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        user = request.user
+        if user.profile.role not in ['ADMIN', 'MANAGER']:
+            return Response({"error": "권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"error": "검색어를 입력해주세요."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Message.objects.select_related('sender', 'room__checkin__hotel_room')
+        if user.profile.role == 'MANAGER':
+            queryset = queryset.filter(room__basespace_id__in=managed_basespace_ids(user))
+        basespace_id = request.query_params.get('basespace_id')
+        if basespace_id:
+            queryset = queryset.filter(room__basespace_id=basespace_id)
+        room_id = request.query_params.get('room_id')
+        if room_id:
+            queryset = queryset.filter(room_id=room_id)
+
+        messages, next_cursor = search_messages(
+            queryset, text, cursor=request.query_params.get('cursor'), page_size=get_page_size(request.query_params)
+        )
+        return Response({
+            "next_cursor": next_cursor,
+            "results": MessageSearchResultSerializer(messages, many=True).data,
+        })
+
+    def get_chat_room(self, request):
         """
-        로그인한 사용자가 메시지를 전송합니다.
-        파일이 포함된 경우 S3에 업로드 후 메시지 생성 및 WebSocket으로 전송합니다.
+        요청한 채팅방(room)을 조회하고 접근 권한을 검증합니다. 채팅방 ID가 없으면 사용자의 체크인 채팅방을 사용합니다.
+        (chat_room, 에러 Response) 튜플을 반환합니다.
         """
         user = request.user
         chat_room_id = request.data.get('room')
@@ -222,7 +346,7 @@ class MessageViewSet(viewsets.ModelViewSet):
             try:
                 chat_room = ChatRoom.objects.get(id=chat_room_id)
             except ChatRoom.DoesNotExist:
-                return Response({"error": "채팅방이 존재하지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+                return None, Response({"error": "채팅방이 존재하지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
 
             # 접근 권한 검증 (예: 체크인 고객, 해당 호텔의 관리자/매니저 등)
             chatroom_checkin_user = chat_room.checkin.user
@@ -231,11 +355,11 @@ class MessageViewSet(viewsets.ModelViewSet):
                 if user_role == 'ADMIN':
                     pass  # 관리자 허용
                 elif user_role == 'MANAGER':
-                    is_manager = chat_room.basespace.managers.filter(id=user.id).exists()
+                    is_manager = claims_manage_basespace(request.auth, user, chat_room.basespace_id)
                     if not is_manager:
-                        return Response({"error": "해당 호텔의 매니저만 접근할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN)
+                        return None, Response({"error": "해당 호텔의 매니저만 접근할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN)
                 else:
-                    return Response({"error": "접근 권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
+                    return None, Response({"error": "접근 권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
         else:
             # 요청 데이터에 채팅방 ID가 없는 경우, 기본적으로 사용자의 체크인에 연결된 채팅방을 조회합니다.
             check_in = CheckIn.objects.filter(
@@ -245,43 +369,112 @@ class MessageViewSet(viewsets.ModelViewSet):
                 checked_out=False
             ).first()
             if not check_in:
-                return Response({"error": "현재 체크인 내역이 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+                return None, Response({"error": "현재 체크인 내역이 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
             chat_room = ChatRoom.objects.filter(checkin=check_in).first()
             if not chat_room:
-                return Response({"error": "채팅방이 존재하지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
-
-        file_url = None
-        file_name = None
-        file_type = None
-
-        # 파일이 업로드된 경우 S3(MinIO)에 업로드
-        if "file" in request.FILES:
-            file = request.FILES["file"]
-            s3_client.upload_fileobj(file, settings.AWS_STORAGE_BUCKET_NAME, file.name)
-            file_url = f"{settings.AWS_S3_CUSTOM_DOMAIN}/{file.name}"
-            file_name = file.name
-            file_type = file.content_type
-
-        # 파일 관련 항목은 request.data에서 제거(이미 별도 처리됨)
-        data = request.data.dict()
+                return None, Response({"error": "채팅방이 존재하지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+        return chat_room, None
+
+    @swagger_auto_schema(
+        operation_description="첨부파일을 MinIO/S3로 직접 업로드하기 위한 presigned POST 발급 API",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "room": openapi.Schema(type=openapi.TYPE_INTEGER, description="채팅방 ID"),
+                "file_name": openapi.Schema(type=openapi.TYPE_STRING, description="원본 파일명"),
+                "content_type": openapi.Schema(type=openapi.TYPE_STRING, description="파일 MIME 타입"),
+                "sha256": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="(옵션) 파일 내용의 SHA-256 (소문자 hex). 이미 저장된 파일이면 upload가 null로 반환되어 업로드를 생략합니다."
+                ),
+            },
+            required=["file_name", "content_type"]
+        ),
+        responses={
+            200: openapi.Response(description="업로드 URL 발급 성공 (url, fields로 multipart POST 후 file_key로 메시지 전송)"),
+            400: openapi.Response(description="잘못된 요청"),
+            403: openapi.Response(description="권한 없음"),
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='upload-url')
+    def upload_url(self, request):
+        chat_room, error = self.get_chat_room(request)
+        if error:
+            return error
+
+        file_name = request.data.get("file_name")
+        content_type = request.data.get("content_type")
+        if not file_name or not content_type:
+            return Response({"error": "파일명과 파일 타입을 입력해주세요."}, status=status.HTTP_400_BAD_REQUEST)
+
+        sha256 = request.data.get("sha256")
+        if sha256:
+            sha256 = sha256.lower()
+            if not is_sha256(sha256):
+                return Response({"error": "잘못된 sha256 값입니다."}, status=status.HTTP_400_BAD_REQUEST)
+            role = request.user.profile.role if hasattr(request.user, 'profile') else None
+            blob = find_attachment_blob(sha256, attachment_scope(chat_room, request.user, role))
+            if blob:
+                # 볼 수 있는 채팅방에서 이미 사용한 같은 내용의 파일이면 업로드 없이 기존 키를 사용
+                return Response({
+                    "file_key": blob.key,
+                    "upload": None,
+                    "expires_in": ATTACHMENT_UPLOAD_EXPIRES,
+                }, status=status.HTTP_200_OK)
+
+        # 업로드는 항상 채팅방 키로 받고, sha256이 있으면 스토리지가 체크섬을 검증한 뒤 메시지 전송 시 해시 키로 옮김
+        file_key = build_attachment_key(chat_room.id, file_name)
+        return Response({
+            "file_key": file_key,
+            "upload": create_presigned_upload(file_key, content_type, sha256),
+            "expires_in": ATTACHMENT_UPLOAD_EXPIRES,
+        }, status=status.HTTP_200_OK)
+
+    def create(self, request, *args, **kwargs):
+        """
+        로그인한 사용자가 메시지를 전송합니다.
+        파일이 포함된 경우 upload_url로 직접 업로드를 마친 file_key를 확인한 뒤 메시지 생성 및 WebSocket으로 전송합니다.
+        """
+        user = request.user
+        chat_room, error = self.get_chat_room(request)
+        if error:
+            return error
+
+        data = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
         serializer = MessageSerializer(data=data)
         if serializer.is_valid():
+            file_url = None
+            file_name = None
+            file_type = None
+            attachment_key = None
+
+            # 업로드가 완료된 파일 키 확인 (파일 바이트는 앱 서버를 거치지 않음)
+            file_key = request.data.get("file_key")
+            if file_key:
+                try:
+                    attachment = confirm_attachment(chat_room, file_key, user, user.profile.role)
+                except AttachmentError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                attachment_key = attachment["file_key"]
+                file_url = attachment["file_url"]
+                file_name = request.data.get("file_name") or file_key.rsplit("/", 1)[-1]
+                file_type = attachment["file_type"]
+
             message = serializer.save(
                 room=chat_room,
                 sender=user,
+                attachment_key=attachment_key,
                 file_url=file_url,
                 file_name=file_name,
                 file_type=file_type
             )
-            chat_room.is_answered = False
-            chat_room.save()
-            # WebSocket 실시간 전송
-            channel_layer = get_channel_layer()
-            # 채팅방에 메시지 전송
-            async_to_sync(channel_layer.group_send)(
-                f"chat_{chat_room.id}",
+            # WebSocket 실시간 전송 (채팅방/매니저 그룹에 같은 메시지를 한 번씩만 전송)
+            async_to_sync(broadcast_chat_message)(
+                [f"chat_{chat_room.id}", f"manager_{chat_room.basespace_id}"],
                 {
-                    "type": "multiplex_message",
+                    "message_uuid": str(message.uuid),
+                    "seq": message.seq,
+                    "chat_room": chat_room.id,  # 어느 채팅방에서 온 메시지인지 전달
                     "sender": message.sender.username,
                     "content": message.content,
                     "file_url": file_url,
@@ -290,18 +483,12 @@ class MessageViewSet(viewsets.ModelViewSet):
                     "created_at": str(message.created_at),
                 }
             )
-            # 매니저에게 알림 전송
-            async_to_sync(channel_layer.group_send)(
-                f"manager_{chat_room.basespace.id}",
-                {
-                    "type": "manager_notification",
-                    "chat_room": chat_room.id,  # 어느 채팅방에서 온 메시지인지 전달
-                    "sender": message.sender.username,
-                    "content": message.content,
-                    "file_type": file_type,
-                    "created_at": str(message.created_at),
-                }
-            )
+            # 참여자별 읽지 않은 채팅방 수를 한 번만 계산해 매니저 소켓들에 전달
+            unread_counts = ChatRoomParticipant.unread_room_counts_after_message(chat_room, user.id)
+            if unread_counts:
+                async_to_sync(get_channel_layer().group_send)(
+                    f"manager_{chat_room.basespace_id}", unread_rooms_changed_event(chat_room, unread_counts)
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -314,22 +501,59 @@ class UnreadChatRoomsCountView(APIView):
         if user.profile.role not in ['ADMIN', 'MANAGER']:
             return Response({"error": "권한이 없습니다."}, status=403)
 
-        # 관리자가 참여한 모든 채팅방 조회
-        chat_rooms = ChatRoom.objects.filter(participants__user=user)
-
-        # 읽지 않은 메시지가 있는 채팅방 수 계산
-        unread_chat_rooms_count = 0
-        for chat_room in chat_rooms:
-            participant = ChatRoomParticipant.objects.get(chatroom=chat_room, user=user)
-            if participant.last_read_time:
-                unread_messages_count = Message.objects.filter(
-                    room=chat_room,
-                    created_at__gt=participant.last_read_time
-                ).count()
-            else:
-                unread_messages_count = Message.objects.filter(room=chat_room).count()
+        # 참여자별 마지막으로 읽은 순번과 채팅방 메시지 순번을 비교 (한 번의 COUNT 쿼리)
+        unread_chat_rooms_count = ChatRoomParticipant.unread_room_count(user)
+        return Response({"unread_chat_rooms_count": unread_chat_rooms_count})
 
-            if unread_messages_count > 0:
-                unread_chat_rooms_count += 1
 
-        return Response({"unread_chat_rooms_count": unread_chat_rooms_count})
\ No newline at end of file
+class ChatPresenceView(APIView):
+    """
+    매니저 채팅 목록 화면용 접속 상태 일괄 조회 API
+    - basespace_id 또는 room_ids(쉼표 구분) 중 하나로 조회합니다.
+    - Redis만 조회하며 채팅방 수와 무관하게 Redis 왕복 1회로 처리합니다.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="채팅방별 고객 접속 여부 일괄 조회 (매니저/관리자 전용)",
+        manual_parameters=[
+            openapi.Parameter('basespace_id', openapi.IN_QUERY, description="basespace ID", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('room_ids', openapi.IN_QUERY, description="채팅방 ID 목록 (쉼표 구분)", type=openapi.TYPE_STRING),
+        ],
+        responses={200: openapi.Response(description="채팅방별 접속 상태 목록")}
+    )
+    def get(self, request):
+        user = request.user
+        if user.profile.role not in ['ADMIN', 'MANAGER']:
+            return Response({"error": "권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        rooms = ChatRoom.objects.filter(is_active=True)
+        if user.profile.role == 'MANAGER':
+            rooms = rooms.filter(basespace_id__in=managed_basespace_ids(user))
+
+        basespace_id = request.query_params.get('basespace_id')
+        room_ids = request.query_params.get('room_ids')
+        try:
+            if basespace_id:
+                rooms = rooms.filter(basespace_id=int(basespace_id))
+            elif room_ids:
+                rooms = rooms.filter(id__in=[int(room_id) for room_id in room_ids.split(',') if room_id])
+            else:
+                return Response({"error": "basespace_id 또는 room_ids를 입력해주세요."}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({"error": "잘못된 ID 값입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        guests = dict(rooms.values_list('id', 'checkin__user_id'))
+        if basespace_id:
+            online = online_users_by_basespace(int(basespace_id))
+        else:
+            online = online_users_by_room(list(guests))
+
+        return Response([
+            {
+                "chat_room": room_id,
+                "guest_online": guest_id in online.get(room_id, set()),
+                "online_user_ids": sorted(online.get(room_id, set())),
+            }
+            for room_id, guest_id in guests.items()
+        ])
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+import weakref
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from hotel_admin.redis_client import get_async_redis
+from notifications.models import Notification, NotificationReadStatus
+from .db import db_sync_to_async
+from .models import ChatRoom, ChatRoomParticipant, Message
+
+logger = logging.getLogger(__name__)
+
+# 프로세스별 대기 메시지를 보관하는 Redis 해시 키 접두어 (uuid -> 메시지 JSON)
+PENDING_KEY_PREFIX = "chat:write_behind:"
+# 반복해서 저장에 실패한 메시지를 보관하는 Redis 해시 (uuid -> 메시지 JSON, 오류 내용 포함)
+# replay_chat_messages가 대기 메시지로 처리하지 않도록 PENDING_KEY_PREFIX와 겹치지 않는 키를 사용
+DEAD_LETTER_KEY = "chat:write_behind_dead"
+# 잘라서 저장할 수 있는 문자열 필드 (나머지 길이 초과는 enqueue 시 오류)
+TRUNCATED_FIELDS = ("file_name", "file_type")
+
+
+def clean_message_fields(fields):
+    """
+    지연 쓰기 대기열에 넣기 전에 DB 저장 시 실패할 값을 미리 정리합니다.
+    파일명/파일 타입은 컬럼 길이에 맞게 자르고, 잘라서 쓸 수 없는 파일 URL/키가 너무 길면 ValueError를 발생시킵니다.
+    """
+    cleaned = dict(fields)
+    for name, value in fields.items():
+        max_length = Message._meta.get_field(name).max_length
+        if not isinstance(value, str) or max_length is None or len(value) <= max_length:
+            continue
+        if name not in TRUNCATED_FIELDS:
+            raise ValueError(f"{name} 값이 너무 깁니다. (최대 {max_length}자)")
+        cleaned[name] = value[:max_length]
+    return cleaned
+
+
+def persist_buffered_messages(rows):
+    """
+    대기 중인 메시지들을 한 트랜잭션에서 일괄 저장합니다.
+    - 메시지는 bulk_create, 채팅방의 마지막 메시지/순번/답변 여부와 보낸 사람의 읽음 순번은 bulk_update로 갱신
+    - 이미 저장된 uuid는 건너뛰므로 같은 행을 여러 번 재처리해도 안전합니다.
+    저장된 메시지 수를 반환합니다.
+    """
+    with transaction.atomic():
+        # 채팅방 행을 ID 순서로 잠가 append_message 및 다른 프로세스의 저장과 순번이 어긋나지 않도록 함
+        rooms = {
+            room.id: room
+            for room in ChatRoom.objects.select_for_update().filter(
+                id__in={row["room_id"] for row in rows}
+            ).order_by('id')
+        }
+        saved = {
+            str(value) for value in Message.objects.filter(
+                uuid__in=[row["uuid"] for row in rows]
+            ).values_list('uuid', flat=True)
+        }
+
+        messages = []
+        new_rows = []
+        read_seqs = {}
+        for row in rows:
+            room = rooms.get(row["room_id"])
+            if room is None or row["uuid"] in saved:
+                continue
+            saved.add(row["uuid"])
+            room.message_seq += 1
+            messages.append(Message(
+                uuid=row["uuid"],
+                room=room,
+                seq=room.message_seq,
+                sender_id=row["sender_id"],
+                content=row["content"],
+                translated_content=row["translated_content"],
+                file_url=row["file_url"],
+                file_key=row.get("file_key"),
+                file_name=row["file_name"],
+                file_type=row["file_type"],
+                # 재처리된 메시지도 내역 순서가 바뀌지 않도록 클라이언트에 전송된 시각으로 저장
+                created_at=parse_datetime(row["queued_at"]) if row.get("queued_at") else timezone.now(),
+            ))
+            new_rows.append(row)
+            read_seqs[(room.id, row["sender_id"])] = room.message_seq
+        if not messages:
+            return 0
+
+        Message.objects.bulk_create(messages)
+
+        touched_rooms = {}
+        for message in messages:
+            message.room.last_message = message
+            message.room.is_answered = False
+            touched_rooms[message.room_id] = message.room
+        ChatRoom.objects.bulk_update(touched_rooms.values(), ['last_message', 'message_seq', 'is_answered'])
+
+        # 본인이 보낸 메시지는 읽은 것으로 처리
+        now = timezone.now()
+        participants = list(ChatRoomParticipant.objects.filter(
+            chatroom_id__in=touched_rooms, user_id__in={sender_id for _, sender_id in read_seqs}
+        ))
+        for participant in participants:
+            participant.last_read_seq = read_seqs.get((participant.chatroom_id, participant.user_id), participant.last_read_seq)
+            participant.last_read_time = now
+        ChatRoomParticipant.objects.bulk_update(participants, ['last_read_seq', 'last_read_time'])
+
+        notifications = [
+            (Notification(
+                sender_id=row["sender_id"],
+                title=row["notification"]["title"],
+                content=row["notification"]["content"],
+                notification_type=row["notification"]["notification_type"],
+                chat_room_id=row["room_id"],
+            ), row["notification"]["recipient_ids"])
+            for row in new_rows if row.get("notification")
+        ]
+        if notifications:
+            Notification.objects.bulk_create([notification for notification, _ in notifications])
+            NotificationReadStatus.objects.bulk_create([
+                NotificationReadStatus(notification=notification, recipient_id=recipient_id)
+                for notification, recipient_ids in notifications
+                for recipient_id in recipient_ids
+            ])
+    return len(messages)
+
+
+class MessageWriteBuffer:
+    """
+    웹소켓 메시지 지연 쓰기 버퍼 (프로세스/이벤트 루프당 하나)
+
+    enqueue()는 메시지를 Redis 해시에 기록한 뒤 바로 반환하므로, 호출한 쪽은 DB 저장을 기다리지 않고
+    메시지를 전송할 수 있습니다. 대기 중인 메시지는 CHAT_WRITE_BEHIND_FLUSH_MS마다 또는
+    CHAT_WRITE_BEHIND_BATCH_SIZE건이 쌓이면 persist_buffered_messages로 일괄 저장하고 Redis에서 제거합니다.
+    프로세스가 비정상 종료되면 Redis에 남은 메시지를 replay_chat_messages 명령으로 다시 저장합니다.
+
+    일괄 저장이 실패하면 한 건씩 다시 저장해 문제가 되는 메시지만 골라내므로, 잘못된 메시지 하나가
+    프로세스 전체의 저장을 막지 않습니다. (persist_rows_individually)
+    """
+
+    def __init__(self):
+        self.key = f"{PENDING_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+        self.redis = get_async_redis()
+        self.pending = []
+        self.flush_lock = asyncio.Lock()
+        self.flush_handle = None
+
+    async def enqueue(self, chat_room, sender, notification=None, **fields):
+        """
+        메시지를 대기열에 추가하고 저장 전의 Message 객체(uuid, created_at 포함)를 반환합니다.
+        notification은 함께 저장할 알림 정보입니다. (title, content, notification_type, recipient_ids)
+        """
+        fields = clean_message_fields(fields)
+        message = Message(uuid=uuid.uuid4(), room=chat_room, sender=sender, created_at=timezone.now(), **fields)
+        row = {
+            "uuid": str(message.uuid),
+            "room_id": chat_room.id,
+            "sender_id": sender.id,
+            "content": message.content,
+            "translated_content": message.translated_content,
+            "file_url": message.file_url,
+            "file_key": message.file_key,
+            "file_name": message.file_name,
+            "file_type": message.file_type,
+            "queued_at": message.created_at.isoformat(),
+            "notification": notification,
+        }
+        # DB 저장 전에 Redis에 먼저 기록 (프로세스 종료 시 재처리용)
+        await self.redis.hset(self.key, row["uuid"], json.dumps(row))
+        self.pending.append(row)
+
+        if len(self.pending) >= settings.CHAT_WRITE_BEHIND_BATCH_SIZE:
+            await self.flush()
+        else:
+            self.schedule_later()
+        return message
+
+    def schedule_flush(self):
+        self.flush_handle = None
+        asyncio.ensure_future(self.flush())
+
+    def schedule_later(self):
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(
+                settings.CHAT_WRITE_BEHIND_FLUSH_MS / 1000, self.schedule_flush
+            )
+
+    async def flush(self):
+        """대기 중인 메시지를 DB에 일괄 저장합니다. 실패한 메시지는 다음 주기에 다시 시도합니다."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        rows, self.pending = self.pending, []
+        # 진행 중인 저장이 있으면 끝날 때까지 기다림 (저장 순서 유지, 종료 직전 flush 보장)
+        async with self.flush_lock:
+            if not rows:
+                return
+            try:
+                await db_sync_to_async(persist_buffered_messages)(rows)
+            except Exception:
+                logger.exception("채팅 메시지 일괄 저장 실패 (%d건), 한 건씩 다시 저장합니다.", len(rows))
+                retry_rows = await self.persist_rows_individually(rows)
+                if retry_rows:
+                    self.pending = retry_rows + self.pending
+                    self.schedule_later()
+                return
+            await self.redis.hdel(self.key, *[row["uuid"] for row in rows])
+
+    async def persist_rows_individually(self, rows):
+        """
+        메시지를 한 건씩 저장하고 다시 시도할 메시지 목록을 반환합니다.
+        - 데이터 오류(IntegrityError/DataError: 삭제된 발신자, 길이 초과 등)는 해당 메시지의 실패 횟수만 늘리고,
+          CHAT_WRITE_BEHIND_MAX_ATTEMPTS회 실패하면 DEAD_LETTER_KEY로 옮겨 대기열에서 제거합니다.
+        - DB 연결 오류 등 그 밖의 오류는 일시적인 장애로 보고 남은 메시지를 실패 횟수 증가 없이 그대로 반환합니다.
+        """
+        saved, dead, retry = [], [], []
+        for index, row in enumerate(rows):
+            try:
+                await db_sync_to_async(persist_buffered_messages)([row])
+            except (IntegrityError, DataError) as e:
+                row["attempts"] = row.get("attempts", 0) + 1
+                if row["attempts"] < settings.CHAT_WRITE_BEHIND_MAX_ATTEMPTS:
+                    retry.append(row)
+                    continue
+                logger.error("채팅 메시지 저장 %d회 실패, 데드레터로 이동합니다. (uuid=%s): %s", row["attempts"], row["uuid"], e)
+                dead.append({**row, "error": str(e)})
+            except Exception:
+                logger.exception("채팅 메시지 저장 실패, 다음 주기에 재시도합니다.")
+                retry.extend(rows[index:])
+                break
+            else:
+                saved.append(row)
+
+        if dead:
+            await self.redis.hset(DEAD_LETTER_KEY, mapping={row["uuid"]: json.dumps(row) for row in dead})
+        if saved or dead:
+            await self.redis.hdel(self.key, *[row["uuid"] for row in saved + dead])
+        return retry
+
+
+_buffers = weakref.WeakKeyDictionary()
+
+
+def get_message_buffer():
+    """현재 이벤트 루프의 지연 쓰기 버퍼를 반환 (Redis 연결이 이벤트 루프에 묶여 있으므로 루프별로 생성)"""
+    loop = asyncio.get_running_loop()
+    if loop not in _buffers:
+        _buffers[loop] = MessageWriteBuffer()
+    return _buffers[loop]
@@ -0,0 +1,10 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotel_admin.settings')
+
+# run_worker.sh: celery -A hotel_admin worker
+app = Celery('hotel_admin')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
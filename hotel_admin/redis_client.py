@@ -0,0 +1,25 @@
+import asyncio
+import weakref
+
+import redis
+from django.conf import settings
+from redis import asyncio as aioredis
+
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_redis():
+    """동기 코드(뷰, 관리 명령 등)에서 사용하는 Redis 클라이언트 (프로세스당 연결 풀 하나)"""
+    global _client
+    if _client is None:
+        _client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    return _client
+
+
+def get_async_redis():
+    """웹소켓 컨슈머 등 비동기 코드에서 사용하는 Redis 클라이언트 (연결이 이벤트 루프에 묶이므로 루프별로 생성)"""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = aioredis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    return _async_clients[loop]
@@ -57,6 +57,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
     'django_extensions',
     'corsheaders',
     'storages',
@@ -69,7 +70,8 @@ INSTALLED_APPS = [
     'accounts',
     'bookings',
     'concierge',
-    'notifications'
+    'notifications',
+    'uploads'
 ]
 
 MIDDLEWARE = [
@@ -118,22 +120,72 @@ DATABASES = {
         'PASSWORD': os.environ.get("DB_PASSWORD", "12345678"),
         'HOST': os.environ.get("DB_HOST", "db"),
         'PORT': os.environ.get("DB_PORT", "5432"),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
+REDIS_PORT = int(os.environ.get("REDIS_PORT", "6379"))
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [
-                (
-                    os.environ.get("REDIS_HOST", "redis"),
-                    int(os.environ.get("REDIS_PORT", "6379"))
-                )
-            ],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
 }
+# 웹소켓 컨슈머/미들웨어의 DB 작업을 실행할 전용 스레드 풀 크기 (스레드마다 별도 DB 연결 사용)
+# 0이면 기존처럼 thread_sensitive 단일 스레드에서 실행합니다.
+CHAT_DB_POOL_SIZE = int(os.environ.get("CHAT_DB_POOL_SIZE", "8"))
+# 위 스레드 풀의 DB 연결 유지 시간 (초, CONN_MAX_AGE). 스레드 수가 고정되어 있으므로 이 풀에서만 연결을 재사용합니다.
+# ASGI HTTP 요청은 요청마다 스레드가 달라질 수 있어 기본값(요청 종료 시 연결 종료)을 유지합니다.
+CHAT_DB_CONN_MAX_AGE = int(os.environ.get("CHAT_DB_CONN_MAX_AGE", "60"))
+# 웹소켓 메시지 지연 쓰기(write-behind) 사용 여부
+# 켜면 메시지를 Redis에 기록한 뒤 바로 전송하고, DB 저장은 일정 주기/건수마다 모아서 처리합니다.
+CHAT_WRITE_BEHIND = os.environ.get("CHAT_WRITE_BEHIND", "false").lower() == "true"
+CHAT_WRITE_BEHIND_FLUSH_MS = int(os.environ.get("CHAT_WRITE_BEHIND_FLUSH_MS", "20"))
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("CHAT_WRITE_BEHIND_BATCH_SIZE", "500"))
+# 데이터 오류로 이 횟수만큼 저장에 실패한 메시지는 데드레터(Redis chat:write_behind_dead)로 옮김
+CHAT_WRITE_BEHIND_MAX_ATTEMPTS = int(os.environ.get("CHAT_WRITE_BEHIND_MAX_ATTEMPTS", "3"))
+# 웹소켓 read 프레임(읽음 처리)을 모아서 DB에 저장하는 주기 (초)
+CHAT_READ_RECEIPT_FLUSH_SECONDS = float(os.environ.get("CHAT_READ_RECEIPT_FLUSH_SECONDS", "3"))
+# 웹소켓 접속 상태 유지 시간 (초). 클라이언트는 이보다 짧은 주기로 heartbeat 프레임을 보냅니다.
+CHAT_PRESENCE_ENABLED = os.environ.get("CHAT_PRESENCE_ENABLED", "true").lower() == "true"
+CHAT_PRESENCE_TTL = int(os.environ.get("CHAT_PRESENCE_TTL", "60"))
+# 알림 전송 시 동시에 보내는 그룹(group_send) 수
+NOTIFICATION_FANOUT_CONCURRENCY = int(os.environ.get("NOTIFICATION_FANOUT_CONCURRENCY", "64"))
+# 공지/이벤트 알림을 백그라운드에서 보낼 때 한 번에 처리하는 수신자 수 (읽음 상태 저장 + 전송 단위)
+NOTIFICATION_FANOUT_CHUNK_SIZE = int(os.environ.get("NOTIFICATION_FANOUT_CHUNK_SIZE", "1000"))
+# 공지/이벤트를 주제 그룹(broadcast_all, basespace_{id}_guests 등)에 한 번만 전송할지 여부 (끄면 사용자별 전송)
+NOTIFICATION_TOPIC_GROUPS = os.environ.get("NOTIFICATION_TOPIC_GROUPS", "true").lower() == "true"
+
+# Celery (백그라운드 작업, run_worker.sh). 브로커는 Redis의 2번 DB 사용
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/2")
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# 캐시 (채널 레이어와 같은 Redis의 1번 DB 사용)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+    },
+}
+# JWT/웹소켓 인증 시 사용자, 프로필, 관리하는 basespace 목록을 캐시하는 시간 (초)
+# 권한 변경 시 signals에서 즉시 삭제하므로 캐시 만료는 안전장치 역할만 합니다.
+PRINCIPAL_CACHE_TTL = int(os.environ.get("PRINCIPAL_CACHE_TTL", "60"))
+# TEMP 고객 임시코드 로그인 유효 시간 (체크아웃 예정 일시 이후 추가 허용 시간)
+GUEST_CREDENTIAL_GRACE_HOURS = int(os.environ.get("GUEST_CREDENTIAL_GRACE_HOURS", "12"))
+# 체크아웃한 TEMP 사용자를 삭제하기까지의 보관 기간 (일, purge_temp_users 명령)
+TEMP_USER_RETENTION_DAYS = int(os.environ.get("TEMP_USER_RETENTION_DAYS", "90"))
+# 이메일 인증 코드 (Redis 저장): 유효 시간(초), 최대 실패 횟수, 재발송 대기(초), 기간(초)당 최대 발송 횟수
+VERIFICATION_CODE_TTL = int(os.environ.get("VERIFICATION_CODE_TTL", "600"))
+VERIFICATION_MAX_ATTEMPTS = int(os.environ.get("VERIFICATION_MAX_ATTEMPTS", "5"))
+VERIFICATION_RESEND_SECONDS = int(os.environ.get("VERIFICATION_RESEND_SECONDS", "60"))
+VERIFICATION_SEND_WINDOW = int(os.environ.get("VERIFICATION_SEND_WINDOW", "3600"))
+VERIFICATION_SEND_LIMIT = int(os.environ.get("VERIFICATION_SEND_LIMIT", "5"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -181,7 +233,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -196,6 +248,8 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": os.getenv("JWT_SIGNING_KEY"),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # 토큰 갱신 시 역할/관리 basespace claims를 현재 권한으로 다시 기록
+    "TOKEN_REFRESH_SERIALIZER": "accounts.tokens.ScopedTokenRefreshSerializer",
 }
 
 SWAGGER_SETTINGS = {
@@ -235,7 +289,16 @@ sentry_sdk.init(
 MEDIA_URL = '/photos/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'photos')
 
-DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+# Django 4.2+ 에서는 DEFAULT_FILE_STORAGE 대신 STORAGES를 사용합니다.
+# 업로드 파일은 내용 해시 기준으로 저장하여 같은 파일을 중복 저장하지 않습니다.
+STORAGES = {
+    "default": {
+        "BACKEND": "uploads.storage.ContentAddressedS3Storage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID", "admin")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", "admin123")
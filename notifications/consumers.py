@@ -3,11 +3,15 @@ import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from chat.db import db_sync_to_async
+from .topics import user_topic_groups
+
 logger = logging.getLogger(__name__)
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"]
+        self.topic_groups = []
         if self.user.is_anonymous:
             # 익명 사용자는 연결 차단
             await self.close()
@@ -15,14 +19,33 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             # 사용자별 그룹에 가입: 그룹명 = "notifications_{user_id}"
             self.group_name = f"notifications_{self.user.id}"
             await self.channel_layer.group_add(self.group_name, self.channel_name)
+            # 공지/이벤트용 주제 그룹 가입 (전체, 언어별, 체크인 중인 호텔)
+            await self.sync_topic_groups()
             await self.accept()
-            logger.info(f"✅ WebSocket 연결됨: {self.user.id} (그룹: {self.group_name})")
+            logger.info(f"✅ WebSocket 연결됨: {self.user.id} (그룹: {self.group_name}, 주제: {self.topic_groups})")
 
     async def disconnect(self, close_code):
+        if self.user.is_anonymous:
+            return
         # 그룹에서 탈퇴
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        for group in self.topic_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
         logger.info(f"🔌 WebSocket 연결 종료됨: {self.user.id}")
 
+    async def sync_topic_groups(self):
+        """현재 역할/언어/체크인 상태에 맞게 주제 그룹을 다시 가입/탈퇴합니다."""
+        groups = await db_sync_to_async(user_topic_groups)(self.user.id)
+        for group in set(self.topic_groups) - set(groups):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        for group in set(groups) - set(self.topic_groups):
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.topic_groups = groups
+
+    async def topics_changed(self, event):
+        # 체크인/체크아웃/언어 변경 시 서버에서 보내는 이벤트
+        await self.sync_topic_groups()
+
     async def send_notification(self, event):
         # WebSocket을 통해 알림 전송 (JSON 형태)
         message = event["message"]
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from notifications.utils import group_send_many, notification_event
+
+
+class Command(BaseCommand):
+    help = (
+        "알림 전송(fan-out)을 사용자별 순차 group_send, 동시 전송(group_send_many), "
+        "주제 그룹(topic group) group_send 한 번으로 각각 실행해 소요 시간을 비교합니다. (DB 사용 안 함) "
+        "예: --recipients 10000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=2000, help="수신자 수 (notifications_{id} 그룹 수)")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256], help="동시 전송 수 (여러 값 가능)")
+        parser.add_argument("--rounds", type=int, default=3, help="방식별 반복 횟수 (최솟값/평균 출력)")
+        parser.add_argument(
+            "--channel-layer", choices=["memory", "redis"], default="redis",
+            help="memory: InMemoryChannelLayer, redis: 설정의 CHANNEL_LAYERS 사용 (로컬 Redis 필요)"
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["channel_layer"] == "memory":
+            overrides["CHANNEL_LAYERS"] = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        with override_settings(**overrides):
+            results = asyncio.run(self.run_benchmark(options))
+
+        self.stdout.write(
+            f"recipients={options['recipients']} channel_layer={options['channel_layer']} rounds={options['rounds']}"
+        )
+        baseline = min(results["sequential"])
+        for name, timings in results.items():
+            best = min(timings)
+            self.stdout.write(
+                f"  {name:<18} best={best * 1000:8.1f}ms mean={sum(timings) / len(timings) * 1000:8.1f}ms "
+                f"per_recipient={best / options['recipients'] * 1e6:7.1f}us speedup={baseline / best:5.1f}x"
+            )
+
+    async def run_benchmark(self, options):
+        channel_layer = get_channel_layer()
+        recipients = range(options["recipients"])
+        groups = [f"benchmark_notifications_{i}" for i in recipients]
+        topic = "benchmark_broadcast_all"
+        # 수신자마다 채널 하나씩 사용자별 그룹과 주제 그룹에 가입 (실제 알림 소켓과 같은 구성)
+        channels = [await channel_layer.new_channel() for _ in recipients]
+        await asyncio.gather(*(channel_layer.group_add(g, c) for g, c in zip(groups, channels)))
+        await asyncio.gather(*(channel_layer.group_add(topic, c) for c in channels))
+        event = notification_event({
+            "id": 1, "title": "benchmark", "content": "fan-out", "notification_type": "ANNOUNCEMENT",
+            "created_at": None, "chat_room": None,
+        })
+
+        results = {"sequential": []}
+        results.update({f"concurrent({n})": [] for n in options["concurrency"]})
+        results["topic_group"] = []
+        try:
+            for _ in range(options["rounds"]):
+                start = time.perf_counter()
+                for group in groups:
+                    await channel_layer.group_send(group, event)
+                results["sequential"].append(time.perf_counter() - start)
+                await self.drain(channel_layer, channels)
+
+                for n in options["concurrency"]:
+                    start = time.perf_counter()
+                    await group_send_many(groups, event, concurrency=n, channel_layer=channel_layer)
+                    results[f"concurrent({n})"].append(time.perf_counter() - start)
+                    await self.drain(channel_layer, channels)
+
+                start = time.perf_counter()
+                await channel_layer.group_send(topic, event)
+                results["topic_group"].append(time.perf_counter() - start)
+                await self.drain(channel_layer, channels)
+        finally:
+            await asyncio.gather(*(channel_layer.group_discard(g, c) for g, c in zip(groups, channels)))
+            await asyncio.gather(*(channel_layer.group_discard(topic, c) for c in channels))
+        return results
+
+    async def drain(self, channel_layer, channels):
+        """다음 측정에 영향이 없도록 채널에 쌓인 메시지를 모두 수신 (채널 용량 초과 방지)"""
+        await asyncio.gather(*(channel_layer.receive(channel) for channel in channels))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from notifications.models import DeliveryStatus, NotificationDelivery
+from notifications.tasks import deliver_notification
+
+
+class Command(BaseCommand):
+    help = "워커 중단 등으로 완료되지 않은 공지/이벤트 알림 전송을 다시 등록합니다. (마지막으로 처리한 수신자 다음부터 이어서 전송)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--minutes", type=int, default=10, help="마지막 진행 이후 이 시간(분)이 지난 전송만 대상")
+
+    def handle(self, *args, **options):
+        deliveries = NotificationDelivery.objects.exclude(status=DeliveryStatus.DONE.name).filter(
+            updated_at__lt=now() - timedelta(minutes=options["minutes"])
+        ).values_list('id', flat=True)
+        count = 0
+        for delivery_id in deliveries:
+            deliver_notification.delay(delivery_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"알림 전송 {count}건을 다시 등록했습니다."))
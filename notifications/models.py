@@ -52,3 +52,34 @@ class NotificationReadStatus(models.Model):
         """알림을 읽음 처리하는 메서드"""
         self.read_at = timezone.now()
         self.save()
+
+
+class DeliveryStatus(ChoiceEnum):
+    PENDING = "대기"
+    RUNNING = "전송 중"
+    DONE = "완료"
+    FAILED = "실패"
+
+
+class NotificationDelivery(models.Model):
+    """
+    공지/이벤트 알림의 백그라운드 전송 진행 상태 (notifications.tasks.deliver_notification)
+    수신자를 ID 순서로 나눠 처리하며, 처리한 마지막 수신자 ID를 읽음 상태 저장과 같은 트랜잭션에서 기록하므로
+    작업이 중단되어도 그 다음 수신자부터 이어서 처리합니다.
+    사용자별 웹소켓 전송은 전송 후에 pushed_recipient_id로 따로 기록하므로, 읽음 상태만 저장되고
+    전송되지 않은 묶음은 이어서 처리할 때 다시 전송합니다. (전송은 최소 한 번)
+    """
+    notification = models.OneToOneField(Notification, on_delete=models.CASCADE, related_name="delivery")
+    basespace_id = models.IntegerField(null=True, blank=True, verbose_name="대상 basespace ID")
+    language = models.CharField(max_length=50, blank=True, default="", verbose_name="대상 언어 (EVENT)")
+    status = models.CharField(
+        max_length=20, choices=DeliveryStatus.choices(), default=DeliveryStatus.PENDING.name, db_index=True
+    )
+    total = models.PositiveIntegerField(null=True, blank=True, verbose_name="전체 수신자 수")
+    delivered = models.PositiveIntegerField(default=0, verbose_name="처리한 수신자 수")
+    last_recipient_id = models.BigIntegerField(default=0, verbose_name="마지막으로 처리한 수신자 ID")
+    pushed_recipient_id = models.BigIntegerField(default=0, verbose_name="웹소켓 전송을 마친 마지막 수신자 ID")
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
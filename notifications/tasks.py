@@ -0,0 +1,135 @@
+import logging
+from itertools import islice
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DeliveryStatus, Notification, NotificationDelivery, NotificationReadStatus, NotificationType
+from .topics import language_code, topic_group
+from .utils import group_send_many, notification_event
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+def notification_recipients(notification_type, basespace_id=None, language=None):
+    """
+    알림 유형별 수신자 ID 쿼리셋 (ID 순서, notifications.topics.topic_group과 같은 대상)
+    - EVENT: 모든 일반 사용자 (언어를 지정하면 해당 언어 사용자)
+    - ANNOUNCEMENT: 해당 basespace에 체크인 중(체크아웃 전)인 고객
+    """
+    if notification_type == NotificationType.EVENT.name:
+        users = User.objects.filter(profile__role='GENERAL')
+        if language_code(language):
+            users = users.filter(profile__language__iexact=language)
+    elif notification_type == NotificationType.ANNOUNCEMENT.name and basespace_id:
+        users = User.objects.filter(
+            checkins__hotel_room__room_type__basespace_id=basespace_id, checkins__checked_out=False
+        ).distinct()
+    else:
+        users = User.objects.none()
+    return users.order_by('id').values_list('id', flat=True)
+
+
+def deliver_chunk(delivery, recipient_ids):
+    """
+    수신자 한 묶음의 읽음 상태를 저장하고, 같은 트랜잭션에서 진행 상태(마지막 수신자 ID)를 기록합니다.
+    다른 워커가 이미 같은 전송을 진행한 경우(작업 중복 실행) False를 반환합니다.
+    """
+    with transaction.atomic():
+        last_recipient_id = NotificationDelivery.objects.select_for_update().values_list(
+            'last_recipient_id', flat=True
+        ).get(id=delivery.id)
+        if last_recipient_id != delivery.last_recipient_id:
+            return False
+        NotificationReadStatus.objects.bulk_create([
+            NotificationReadStatus(notification_id=delivery.notification_id, recipient_id=recipient_id)
+            for recipient_id in recipient_ids
+        ])
+        delivery.last_recipient_id = recipient_ids[-1]
+        delivery.delivered += len(recipient_ids)
+        delivery.save(update_fields=['last_recipient_id', 'delivered', 'updated_at'])
+    return True
+
+
+def mark_pushed(delivery, recipient_id):
+    """사용자별 웹소켓 전송을 마친 마지막 수신자 ID를 기록합니다. (읽음 상태 저장과 별도로, 전송 이후에 기록)"""
+    delivery.pushed_recipient_id = recipient_id
+    NotificationDelivery.objects.filter(id=delivery.id, pushed_recipient_id__lt=recipient_id).update(
+        pushed_recipient_id=recipient_id, updated_at=timezone.now()
+    )
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def deliver_notification(self, delivery_id):
+    """
+    알림을 수신자 묶음(NOTIFICATION_FANOUT_CHUNK_SIZE명)마다 읽음 상태 저장 → 웹소켓 전송 순서로 처리합니다.
+    NOTIFICATION_TOPIC_GROUPS가 켜져 있으면 사용자별 전송 대신, 읽음 상태를 모두 저장한 뒤 주제 그룹에 한 번만 전송합니다.
+    수신자는 서버 사이드 커서로 스트리밍하므로 수신자 수와 관계없이 메모리 사용량이 일정합니다.
+    실패하거나 워커가 중단되면 last_recipient_id 다음 수신자부터 이어서 읽음 상태를 저장하고,
+    사용자별 전송은 pushed_recipient_id 다음 수신자부터 다시 전송합니다.
+    (읽음 상태는 한 번만 저장되고, 웹소켓 전송은 최소 한 번 - 중단 직전 묶음은 중복 전송될 수 있음)
+    """
+    with transaction.atomic():
+        delivery = NotificationDelivery.objects.select_for_update().select_related('notification').get(id=delivery_id)
+        if delivery.status == DeliveryStatus.DONE.name:
+            return delivery.delivered
+        notification = delivery.notification
+        recipients = notification_recipients(
+            notification.notification_type, delivery.basespace_id, delivery.language
+        )
+        delivery.status = DeliveryStatus.RUNNING.name
+        if delivery.total is None:
+            delivery.total = recipients.count()
+        delivery.save(update_fields=['status', 'total', 'updated_at'])
+
+    event = notification_event({
+        "id": notification.id,
+        "title": notification.title,
+        "content": notification.content,
+        "notification_type": notification.notification_type,
+        "created_at": notification.created_at.isoformat(),
+        "chat_room": notification.chat_room_id,
+    })
+    topic = None
+    if settings.NOTIFICATION_TOPIC_GROUPS:
+        topic = topic_group(notification.notification_type, delivery.basespace_id, delivery.language)
+    try:
+        # 사용자별 전송은 읽음 상태만 저장되고 전송되지 않은 수신자부터 다시 훑음
+        resume_after = delivery.last_recipient_id if topic is not None else delivery.pushed_recipient_id
+        pending = recipients.filter(id__gt=resume_after).iterator(chunk_size=settings.NOTIFICATION_FANOUT_CHUNK_SIZE)
+        while chunk := list(islice(pending, settings.NOTIFICATION_FANOUT_CHUNK_SIZE)):
+            unsaved = [recipient_id for recipient_id in chunk if recipient_id > delivery.last_recipient_id]
+            if unsaved and not deliver_chunk(delivery, unsaved):
+                logger.warning("다른 작업이 같은 알림을 전송 중이어서 중단합니다. (delivery=%s)", delivery.id)
+                return delivery.delivered
+            if topic is None:
+                async_to_sync(group_send_many)([f"notifications_{recipient_id}" for recipient_id in chunk], event)
+                mark_pushed(delivery, chunk[-1])
+        if topic is not None:
+            async_to_sync(get_channel_layer().group_send)(topic, event)
+    except Exception as e:
+        delivery.status = DeliveryStatus.FAILED.name
+        delivery.error = str(e)
+        delivery.save(update_fields=['status', 'error', 'updated_at'])
+        logger.exception("알림 전송 실패 (delivery=%s, 처리 %s/%s)", delivery.id, delivery.delivered, delivery.total)
+        raise
+
+    delivery.status = DeliveryStatus.DONE.name
+    delivery.finished_at = timezone.now()
+    delivery.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return delivery.delivered
+
+
+def enqueue_delivery(notification, basespace_id=None, language=None):
+    """알림의 백그라운드 전송을 등록합니다. (트랜잭션 커밋 이후 작업 실행)"""
+    delivery = NotificationDelivery.objects.create(
+        notification=notification, basespace_id=basespace_id, language=language or ""
+    )
+    transaction.on_commit(lambda: deliver_notification.delay(delivery.id))
+    return delivery
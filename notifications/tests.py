@@ -1,3 +1,128 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import UserProfile
+from bookings.models import CheckIn, Reservation
+from spaces.models import BaseSpace, HotelRoomType, HotelRoom
+from .models import Notification, NotificationDelivery, NotificationReadStatus
+from .tasks import deliver_notification
+from .topics import basespace_guests_group, user_topic_groups
+from .utils import group_send_many, notification_event
+
+
+class GroupSendManyTests(SimpleTestCase):
+    def test_sends_to_every_group(self):
+        channel_layer = InMemoryChannelLayer()
+
+        async def run():
+            channels = [await channel_layer.new_channel() for _ in range(20)]
+            for i, channel in enumerate(channels):
+                await channel_layer.group_add(f"notifications_{i}", channel)
+            failed = await group_send_many(
+                [f"notifications_{i}" for i in range(20)],
+                notification_event({"id": 7, "title": "공지", "chat_room": None}),
+                concurrency=4,
+                channel_layer=channel_layer,
+            )
+            return failed, [await channel_layer.receive(channel) for channel in channels]
+
+        failed, events = async_to_sync(run)()
+        self.assertEqual(failed, 0)
+        self.assertEqual(len(events), 20)
+        self.assertTrue(all(event["message"]["id"] == 7 for event in events))
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    NOTIFICATION_FANOUT_CHUNK_SIZE=2,
+)
+class NotificationDeliveryTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username="manager", email="manager@test.com", password="ManagerPass123")
+        UserProfile.objects.create(user=self.manager, role="MANAGER")
+        self.basespace = BaseSpace.objects.create(name="Test Hotel", location=Point(0, 0))
+        room_type = HotelRoomType.objects.create(basespace=self.basespace, name="Standard", nickname="Std")
+        self.guests = []
+        for i in range(3):
+            guest = User.objects.create_user(username=f"guest{i}", email=f"guest{i}@test.com")
+            UserProfile.objects.create(user=guest, role="TEMP")
+            hotel_room = HotelRoom.objects.create(room_number=f"10{i}", room_type=room_type, status="빈 방")
+            reservation = Reservation.objects.create(
+                user=guest, space=room_type, start_date=date.today(), end_date=date.today() + timedelta(days=1), people=1
+            )
+            CheckIn.objects.create(
+                user=guest, hotel_room=hotel_room, reservation=reservation, check_in_date=date.today(),
+                check_out_date=date.today() + timedelta(days=1), temp_code=f"99999{i}",
+            )
+            self.guests.append(guest)
+        self.notification = Notification.objects.create(
+            sender=self.manager, title="공지", content="수영장 점검", notification_type="ANNOUNCEMENT"
+        )
+
+    def test_delivers_in_chunks_and_resumes(self):
+        delivery = NotificationDelivery.objects.create(notification=self.notification, basespace_id=self.basespace.id)
+        # 첫 번째 고객까지 처리된 뒤 중단된 상태에서 이어서 전송
+        NotificationReadStatus.objects.create(notification=self.notification, recipient=self.guests[0])
+        NotificationDelivery.objects.filter(id=delivery.id).update(
+            status="FAILED", delivered=1, last_recipient_id=self.guests[0].id
+        )
+
+        self.assertEqual(deliver_notification(delivery.id), 3)
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, "DONE")
+        self.assertEqual(delivery.total, 3)
+        self.assertEqual(
+            sorted(self.notification.read_statuses.values_list('recipient_id', flat=True)),
+            [guest.id for guest in self.guests],
+        )
+        # 완료된 전송은 다시 실행해도 중복 저장하지 않음
+        deliver_notification(delivery.id)
+        self.assertEqual(self.notification.read_statuses.count(), 3)
+
+    @override_settings(NOTIFICATION_TOPIC_GROUPS=False)
+    def test_resume_repushes_saved_but_unpushed_chunk(self):
+        channel_layer = get_channel_layer()
+        channels = []
+        for guest in self.guests:
+            channel = async_to_sync(channel_layer.new_channel)()
+            async_to_sync(channel_layer.group_add)(f"notifications_{guest.id}", channel)
+            channels.append(channel)
+        delivery = NotificationDelivery.objects.create(notification=self.notification, basespace_id=self.basespace.id)
+        # 첫 번째 묶음(2명)의 읽음 상태는 저장됐지만 웹소켓 전송 전에 중단된 상태
+        for guest in self.guests[:2]:
+            NotificationReadStatus.objects.create(notification=self.notification, recipient=guest)
+        NotificationDelivery.objects.filter(id=delivery.id).update(
+            status="FAILED", delivered=2, last_recipient_id=self.guests[1].id
+        )
+
+        self.assertEqual(deliver_notification(delivery.id), 3)
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.pushed_recipient_id, self.guests[-1].id)
+        self.assertEqual(self.notification.read_statuses.count(), 3)
+        for channel in channels:
+            event = async_to_sync(channel_layer.receive)(channel)
+            self.assertEqual(event["message"]["id"], self.notification.id)
+
+    def test_topic_groups_follow_check_in(self):
+        guest = self.guests[0]
+        self.assertEqual(user_topic_groups(guest.id), [basespace_guests_group(self.basespace.id)])
+        CheckIn.objects.filter(user=guest).update(checked_out=True)
+        self.assertEqual(user_topic_groups(guest.id), [])
+        self.assertEqual(user_topic_groups(self.manager.id), [])
+
+    def test_announcement_sent_once_to_topic_group(self):
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(basespace_guests_group(self.basespace.id), channel)
+        delivery = NotificationDelivery.objects.create(notification=self.notification, basespace_id=self.basespace.id)
+
+        deliver_notification(delivery.id)
+
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(event["message"]["id"], self.notification.id)
+        self.assertEqual(self.notification.read_statuses.count(), 3)
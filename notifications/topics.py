@@ -0,0 +1,62 @@
+import re
+
+from asgiref.sync import async_to_sync
+
+from accounts.models import UserProfile
+from bookings.models import CheckIn
+from .models import NotificationType
+from .utils import group_send_many
+
+# 알림 소켓이 사용자별 그룹(notifications_{user_id}) 외에 함께 가입하는 주제 그룹
+# - broadcast_all              일반 사용자 전체 (EVENT)
+# - broadcast_lang_{code}      언어별 일반 사용자 (언어를 지정한 EVENT)
+# - basespace_{id}_guests      해당 호텔에 체크인 중인 고객 (ANNOUNCEMENT)
+# 공지/이벤트는 사용자 수와 관계없이 주제 그룹에 group_send 한 번으로 전송합니다.
+BROADCAST_ALL = "broadcast_all"
+
+
+def language_code(language):
+    """그룹 이름에 사용할 수 있는 언어 코드 (소문자, 영문/숫자/하이픈만)"""
+    return re.sub(r"[^a-z0-9-]", "", (language or "").lower())
+
+
+def language_group(language):
+    return f"broadcast_lang_{language_code(language)}"
+
+
+def basespace_guests_group(basespace_id):
+    return f"basespace_{basespace_id}_guests"
+
+
+def topic_group(notification_type, basespace_id=None, language=None):
+    """알림 유형에 해당하는 주제 그룹 (notifications.tasks.notification_recipients와 같은 대상)"""
+    if notification_type == NotificationType.EVENT.name:
+        return language_group(language) if language_code(language) else BROADCAST_ALL
+    if notification_type == NotificationType.ANNOUNCEMENT.name and basespace_id:
+        return basespace_guests_group(basespace_id)
+    return None
+
+
+def user_topic_groups(user_id):
+    """사용자가 가입해야 하는 주제 그룹 목록 (역할/언어, 체크인 중인 호텔 기준)"""
+    groups = []
+    profile = UserProfile.objects.filter(user_id=user_id).values('role', 'language').first()
+    if profile and profile["role"] == 'GENERAL':
+        groups.append(BROADCAST_ALL)
+        if language_code(profile["language"]):
+            groups.append(language_group(profile["language"]))
+    basespace_ids = CheckIn.objects.filter(
+        user_id=user_id, checked_out=False
+    ).values_list('hotel_room__room_type__basespace_id', flat=True).distinct()
+    groups.extend(basespace_guests_group(basespace_id) for basespace_id in basespace_ids)
+    return groups
+
+
+def notify_topics_changed(user_ids):
+    """
+    체크인/체크아웃/언어 변경 등으로 주제 그룹이 바뀐 사용자들의 알림 소켓에 그룹을 다시 계산하도록 알립니다.
+    트랜잭션 안에서는 transaction.on_commit으로 호출합니다.
+    """
+    async_to_sync(group_send_many)(
+        [f"notifications_{user_id}" for user_id in user_ids], {"type": "topics_changed"}
+    )
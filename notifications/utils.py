@@ -1,40 +1,89 @@
-from asgiref.sync import sync_to_async
+import asyncio
+import logging
+
 from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from chat.db import db_sync_to_async
 from .models import Notification, NotificationReadStatus
 
-async def send_notification_to_users(user_ids, message):
-    channel_layer = get_channel_layer()
-    for user_id in user_ids:
-        await channel_layer.group_send(
-            f"notifications_{user_id}",
-            {
-                "type": "send_notification",
-                "message": {
-                    "id": message.get("id"),
-                    "title": message.get("title"),
-                    "content": message.get("content"),
-                    "notification_type": message.get("notification_type"),
-                    "created_at": message.get("created_at"),
-                    "chat_room": message.get("chat_room").id
-                }
-            }
+logger = logging.getLogger(__name__)
+
+
+def notification_event(message):
+    """알림 소켓(NotificationConsumer)으로 보내는 이벤트"""
+    chat_room = message.get("chat_room")
+    return {
+        "type": "send_notification",
+        "message": {
+            "id": message.get("id"),
+            "title": message.get("title"),
+            "content": message.get("content"),
+            "notification_type": message.get("notification_type"),
+            "created_at": message.get("created_at"),
+            # ChatRoom 객체 또는 ID
+            "chat_room": getattr(chat_room, "id", chat_room),
+        }
+    }
+
+
+async def group_send_many(groups, event, concurrency=None, channel_layer=None):
+    """
+    여러 그룹에 같은 이벤트를 동시에 전송합니다.
+    동시 전송 수는 concurrency(기본 NOTIFICATION_FANOUT_CONCURRENCY)개로 제한하며,
+    일부 그룹 전송이 실패해도 나머지는 계속 전송합니다. 실패한 그룹 수를 반환합니다.
+    """
+    channel_layer = channel_layer or get_channel_layer()
+    groups = list(groups)
+    pending = iter(groups)
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        # 워커들이 같은 이터레이터에서 다음 그룹을 가져감 (동시 전송 수 = 워커 수)
+        for group in pending:
+            try:
+                await channel_layer.group_send(group, event)
+            except Exception:
+                failed += 1
+                logger.exception("알림 전송 실패 (그룹: %s)", group)
+
+    workers = min(concurrency or settings.NOTIFICATION_FANOUT_CONCURRENCY, len(groups))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return failed
+
+
+def create_notification(user_ids, message):
+    """알림과 수신자별 읽음 상태를 한 트랜잭션에서 저장합니다."""
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            sender=message.get("sender"),
+            title=message.get("title"),
+            content=message.get("content"),
+            notification_type=message.get("notification_type"),
+            chat_room=message.get("chat_room")
         )
+        NotificationReadStatus.objects.bulk_create([
+            NotificationReadStatus(notification=notification, recipient_id=user_id)
+            for user_id in user_ids
+        ])
+    return notification
+
+
+async def send_notification_to_users(user_ids, message, persist=True):
+    """
+    사용자들에게 실시간 알림을 전송합니다.
+    persist=True이면 알림과 읽음 상태를 먼저 저장한 뒤 알림 ID를 포함해 전송하므로, 클라이언트가 받은 ID로 바로 조회할 수 있습니다.
+    persist=False이면 전송만 합니다. (이미 저장한 경우 message에 id를 넣어 호출, 채팅 지연 쓰기는 호출한 쪽에서 저장)
+    """
+    user_ids = list(user_ids)
+    if persist:
+        notification = await db_sync_to_async(create_notification)(user_ids, message)
+        message = {
+            **message,
+            "id": notification.id,
+            "created_at": message.get("created_at") or notification.created_at.isoformat(),
+        }
 
-    # 알림 DB에 저장
-    notification = await sync_to_async(Notification.objects.create)(
-        sender=message.get("sender"),
-        title=message.get("title"),
-        content=message.get("content"),
-        notification_type=message.get("notification_type"),
-        chat_room = message.get("chat_room")
-    )
-    await sync_to_async(NotificationReadStatus.objects.bulk_create)([
-        NotificationReadStatus(notification=notification, recipient_id=user_id)
-        for user_id in user_ids
-    ],
-        batch_size=None,
-        ignore_conflicts=False,
-        update_conflicts=False,
-        update_fields=None,
-        unique_fields=None
-    )
\ No newline at end of file
+    await group_send_many((f"notifications_{user_id}" for user_id in user_ids), notification_event(message))
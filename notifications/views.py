@@ -1,15 +1,15 @@
 from django.contrib.auth import get_user_model
 from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from chat.models import ChatRoom
-from .models import Notification, NotificationType, NotificationReadStatus
-from bookings.models import CheckIn
+from .models import Notification, NotificationType, NotificationReadStatus, NotificationDelivery
 from .serializers import NotificationSerializer
+from .tasks import enqueue_delivery
+from .utils import send_notification_to_users
 from django.utils import timezone
 from rest_framework.generics import get_object_or_404
 
@@ -44,6 +44,24 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return list(message_notifications) + list(other_notifications)
 
 
+    @action(detail=True, methods=['get'], url_path='delivery')
+    def delivery(self, request, pk=None):
+        """공지/이벤트 알림의 백그라운드 전송 진행 상태 (보낸 사람 전용)"""
+        delivery = get_object_or_404(
+            NotificationDelivery, notification_id=pk, notification__sender=request.user
+        )
+        return Response(self.delivery_data(delivery), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def delivery_data(delivery):
+        return {
+            "id": delivery.id,
+            "status": delivery.status,
+            "total": delivery.total,
+            "delivered": delivery.delivered,
+            "finished_at": delivery.finished_at,
+        }
+
     @action(detail=True, methods=['post'], url_path='mark-notifications-read')
     def mark_notifications_read(self, request, pk=None):
         """특정 발신자의 모든 메시지 알림을 읽음 처리"""
@@ -68,26 +86,27 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
         return Response({"status": "Notification marked as read"}, status=status.HTTP_200_OK)
 
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        delivery = getattr(self, 'notification_delivery', None)
+        if delivery:
+            response.data["delivery"] = self.delivery_data(delivery)
+        return response
+
     def perform_create(self, serializer):
         """알림을 생성하고 WebSocket으로 전송"""
         chat_room_id = self.request.data.get('chat_room_id')
         chat_room = ChatRoom.objects.get(id=chat_room_id) if chat_room_id else None
         notification = serializer.save(sender=self.request.user, chat_room=chat_room)  # 공지 내용은 한 번만 저장됨
 
-        if notification.notification_type == NotificationType.EVENT.name:
-            recipients = User.objects.filter(userprofile__role='general')
-
-        elif notification.notification_type == NotificationType.ANNOUNCEMENT.name:
-            basespace_id = self.request.data.get('basespace_id')
-            if basespace_id:
-                # basespace_id로 호텔룸에 연결된 basespace를 필터링하고 아직 체크아웃하지 않은 CheckIn 조회
-                checkins = CheckIn.objects.filter(
-                    hotel_room__floor__basespace=basespace_id,
-                    checked_out=False
-                )
-                recipients = User.objects.filter(id__in=[checkin.user.id for checkin in checkins])
-            else:
-                recipients = []
+        if notification.notification_type in [NotificationType.EVENT.name, NotificationType.ANNOUNCEMENT.name]:
+            # 수신자 조회, 읽음 상태 저장, 전송은 백그라운드 작업에서 묶음 단위로 처리 (수신자 수와 무관하게 바로 응답)
+            self.notification_delivery = enqueue_delivery(
+                notification,
+                basespace_id=self.request.data.get('basespace_id'),
+                language=self.request.data.get('language'),
+            )
+            return
 
         elif notification.notification_type == NotificationType.MESSAGE.name:
             recipients = [self.request.user]  # 1:1 채팅이면 특정 유저에게만 전송
@@ -101,7 +120,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         ]
         NotificationReadStatus.objects.bulk_create(read_status_entries)  # 🚀 대량 저장
 
-        # ✅ WebSocket으로 즉시 알림 전송
+        # ✅ WebSocket으로 즉시 알림 전송 (저장은 위에서 완료)
         async_to_sync(send_notification_to_users)([r.id for r in recipients], {
             "id": notification.id,
             "title": notification.title,
@@ -109,21 +128,4 @@ class NotificationViewSet(viewsets.ModelViewSet):
             "notification_type": notification.notification_type,
             "created_at": notification.created_at.isoformat(),
             "chat_room": chat_room_id
-        })
-
-async def send_notification_to_users(user_ids, message):
-    channel_layer = get_channel_layer()
-    for user_id in user_ids:
-        await channel_layer.group_send(
-            f"notifications_{user_id}",
-            {
-                "type": "send_notification",
-                "message": {
-                    "id": message.get("id"),
-                    "title": message.get("title"),
-                    "content": message.get("content"),
-                    "notification_type": message.get("notification_type"),
-                    "created_at": message.get("created_at")
-                }
-            }
-        )
\ No newline at end of file
+        }, persist=False)
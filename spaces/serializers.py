@@ -4,6 +4,7 @@ from django.contrib.auth.models import User
 from django.utils.timezone import localtime, now
 from django.utils.translation import gettext_lazy as _
 from accounts.models import UserProfile
+from accounts.tokens import claims_manage_basespace
 from bookings.models import Review, ReviewPhoto, Like
 from concierge.models import AIConcierge
 from spaces.models import (
@@ -137,8 +138,8 @@ class HotelRoomSerializer(serializers.ModelSerializer):
 
     def validate_room_type(self, value):
         # 요청한 사용자가 해당 호텔(BaseSpace) 관리자인지 확인
-        user = self.context['request'].user
-        if not value.basespace.managers.filter(id=user.id).exists():
+        request = self.context['request']
+        if not claims_manage_basespace(request.auth, request.user, value.basespace_id):
             raise serializers.ValidationError("해당 호텔의 관리자가 아닙니다.")
         return value
 
@@ -0,0 +1,51 @@
+from django.db import models, transaction
+from django.db.models import F
+
+
+class StoredBlob(models.Model):
+    """
+    내용 해시(SHA-256) 기준으로 저장된 파일 인덱스
+    같은 내용의 파일은 한 번만 저장하고 참조 수(ref_count)로 공유합니다.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    key = models.CharField(max_length=255, unique=True, verbose_name='스토리지 키')
+    size = models.PositiveBigIntegerField(verbose_name='파일 크기')
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='참조 수')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.ref_count})"
+
+    @classmethod
+    def add_reference(cls, sha256, key, size, content_type=""):
+        """
+        해시에 해당하는 파일의 참조 수를 1 증가시킵니다. 처음 저장되는 파일이면 인덱스를 생성합니다.
+        (blob, created) 튜플을 반환합니다.
+        """
+        with transaction.atomic():
+            blob, created = cls.objects.select_for_update().get_or_create(
+                sha256=sha256,
+                defaults={"key": key, "size": size, "content_type": content_type or "", "ref_count": 1},
+            )
+            if not created:
+                cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                blob.ref_count += 1
+        return blob, created
+
+    @classmethod
+    def release(cls, key):
+        """
+        참조 수를 1 감소시킵니다.
+        마지막 참조였으면 인덱스를 삭제하고 True를 반환합니다(실제 파일 삭제는 호출한 쪽에서 처리).
+        인덱스에 없는 키이면 None을 반환합니다.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(key=key).first()
+            if blob is None:
+                return None
+            if blob.ref_count > 1:
+                cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return False
+            blob.delete()
+            return True
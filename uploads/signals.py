@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.signals import post_delete
+
+from .storage import ContentAddressedStorageMixin, is_blob_key
+
+
+def file_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, FileField)]
+
+
+def release_stored_files(sender, instance, **kwargs):
+    """파일 필드를 가진 객체가 삭제되면 커밋 이후 해시 저장 파일의 참조 수를 감소"""
+    for field in file_fields(sender):
+        name = getattr(instance, field.attname)
+        name = getattr(name, "name", name)
+        if not is_blob_key(name) or not isinstance(field.storage, ContentAddressedStorageMixin):
+            continue
+        transaction.on_commit(lambda storage=field.storage, name=name: storage.delete(name))
+
+
+# 파일 필드가 있는 모델에만 연결 (모든 모델에 연결하면 다른 모델의 대량 삭제가 fast delete를 쓰지 못함)
+for model in apps.get_models():
+    if file_fields(model):
+        post_delete.connect(release_stored_files, sender=model, dispatch_uid=f"release_stored_files_{model._meta.label}")
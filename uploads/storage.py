@@ -0,0 +1,66 @@
+import hashlib
+import mimetypes
+import os
+
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from .models import StoredBlob
+
+BLOB_PREFIX = "cas"
+HASH_CHUNK_SIZE = 64 * 1024  # 해시 계산 시 한 번에 읽는 크기 (파일 전체를 메모리에 올리지 않음)
+
+
+def hash_chunks(chunks):
+    """청크 단위로 SHA-256을 계산하여 (hex digest, 전체 크기)를 반환"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def blob_key(sha256, file_name):
+    """내용 해시 기반 키 생성 (예: cas/ab/ab12...ef.jpg)"""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{extension}"
+
+
+def is_blob_key(key):
+    return bool(key) and key.startswith(f"{BLOB_PREFIX}/")
+
+
+def sha256_from_key(key):
+    return os.path.splitext(os.path.basename(key))[0]
+
+
+class ContentAddressedStorageMixin:
+    """
+    업로드 파일을 원본 파일명/upload_to 경로 대신 내용 해시로 저장하는 스토리지 믹스인
+    - 이미 같은 내용의 파일이 저장되어 있으면 업로드하지 않고 참조 수만 증가시킵니다.
+    - delete()는 참조 수를 감소시키고 마지막 참조일 때만 실제 파일을 삭제합니다.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # 실제 키는 _save에서 내용 해시로 결정되므로 이름 중복 검사를 하지 않음
+        return name
+
+    def _save(self, name, content):
+        sha256, size = hash_chunks(content.chunks(chunk_size=HASH_CHUNK_SIZE))
+        key = blob_key(sha256, name)
+        if not StoredBlob.objects.filter(sha256=sha256).exists():
+            content.seek(0)
+            key = super()._save(key, content)
+        content_type = getattr(content, "content_type", None) or mimetypes.guess_type(name)[0]
+        blob, _ = StoredBlob.add_reference(sha256, key, size, content_type)
+        return blob.key
+
+    def delete(self, name):
+        released = StoredBlob.release(name)
+        if released or (released is None and not is_blob_key(name)):
+            # 마지막 참조이거나, 해시 저장 도입 이전의 파일이면 실제로 삭제
+            super().delete(name)
+
+
+class ContentAddressedS3Storage(ContentAddressedStorageMixin, S3Boto3Storage):
+    pass
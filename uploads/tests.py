@@ -0,0 +1,42 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+
+from uploads.models import StoredBlob
+from uploads.storage import ContentAddressedStorageMixin, blob_key, hash_chunks
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    pass
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedFileSystemStorage(location=self.location)
+
+    def test_identical_files_are_stored_once(self):
+        first = self.storage.save("basespace_photos/menu.pdf", ContentFile(b"same menu", name="menu.pdf"))
+        second = self.storage.save("review_photos/other.PDF", ContentFile(b"same menu", name="other.PDF"))
+        sha256, size = hash_chunks([b"same menu"])
+        self.assertEqual(first, blob_key(sha256, "menu.pdf"))
+        self.assertEqual(first, second)
+        blob = StoredBlob.objects.get(sha256=sha256)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, size)
+
+    def test_delete_keeps_file_until_last_reference(self):
+        name = self.storage.save("a.txt", ContentFile(b"hello"))
+        self.storage.save("b.txt", ContentFile(b"hello"))
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(key=name).ref_count, 1)
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredBlob.objects.filter(key=name).exists())